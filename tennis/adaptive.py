@@ -0,0 +1,115 @@
+"""
+Este arquivo define a simulação adaptativa, que simula partidas em lotes até que o intervalo
+de confiança de uma estatística atinja a precisão desejada.
+"""
+from math import sqrt
+from statistics import NormalDist
+
+from analysis import RunningStats
+from tennisClasses import TennisMatch
+
+ADAPTIVE_TARGETS = {
+    "winrate": lambda results: results["winner"],
+    "points": lambda results: results["pPoints"] + results["qPoints"],
+    "games": lambda results: results["gamesP"] + results["gamesQ"],
+}
+"""
+Estatísticas que podem ser usadas como critério de parada, associadas à função que extrai o
+valor de cada partida dos resultados de `tennis.tennisClasses.TennisMatch.simulateBatch`:
+taxa de vitória de P, pontos por partida e games por partida.
+"""
+
+
+def getInterval(target: str, stats, z: float):
+    """
+    Calcula o intervalo de confiança da média de `target`. Para "winrate", usa o intervalo
+    de Wilson, que não colapsa para largura zero quando todas as partidas têm o mesmo
+    vencedor; para as demais estatísticas, usa o intervalo normal.
+
+    Args:
+        target (str): estatística, uma das chaves de `ADAPTIVE_TARGETS`
+        stats (`tennis.analysis.RunningStats`): estatísticas de `target`
+        z (float): quantil da normal associado ao nível de confiança
+
+    Returns:
+        (float, float): centro e metade da largura do intervalo
+    """
+    if target != "winrate":
+        return (stats.getMean(), z * stats.getStandardError())
+    count = stats.getCount()
+    rate = stats.getMean()
+    scale = 1 + z * z / count
+    center = (rate + z * z / (2 * count)) / scale
+    halfWidth = (
+        z * sqrt(rate * (1 - rate) / count + z * z / (4 * count * count)) / scale
+    )
+    return (center, halfWidth)
+
+
+def simulateUntilPrecision(
+    engine,
+    target: str,
+    halfWidth: float,
+    confidence=0.95,
+    batchSize=1000,
+    maxMatches=10_000_000,
+    minBatches=2,
+):
+    """
+    Simula partidas em lotes com `tennis.tennisClasses.TennisMatch.simulateBatch` até que a
+    metade da largura do intervalo de confiança da média de `target` seja no máximo
+    `halfWidth`, ou até `maxMatches` partidas. A parada só é avaliada depois de `minBatches`
+    lotes, para que um primeiro lote sem variância não encerre a simulação com ±0; o
+    intervalo é calculado por `getInterval`.
+
+    Depois do primeiro lote, o tamanho de cada lote é estimado a partir da variância
+    observada (`n = (z dp / halfWidth)^2`), limitado entre `batchSize` e a quantidade de
+    partidas já simuladas, para que a simulação não passe muito do necessário.
+
+    Args:
+        engine (`tennis.batch.BatchGameEngine`): Motor usado para simular os games.
+        target (str): estatística de parada, uma das chaves de `ADAPTIVE_TARGETS`
+        halfWidth (float): metade da largura desejada do intervalo de confiança
+        confidence (float): nível de confiança do intervalo
+        batchSize (int): tamanho mínimo de cada lote
+        maxMatches (int): quantidade máxima de partidas
+        minBatches (int): quantidade mínima de lotes
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                mean (float): média observada de `target`,
+                halfWidth (float): metade da largura do intervalo atingido,
+                low (float), high (float): limites do intervalo,
+                matches (int): quantidade de partidas simuladas,
+                batches (int): quantidade de lotes,
+                converged (bool): False se `maxMatches` foi atingido antes da precisão,
+                stats (`tennis.analysis.RunningStats`): estatísticas de `target`
+            }
+    """
+    extract = ADAPTIVE_TARGETS[target]
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    stats = RunningStats()
+    batches = 0
+    nextBatch = batchSize
+    while True:
+        results = TennisMatch.simulateBatch(engine, nextBatch)
+        stats.addArray(extract(results))
+        batches += 1
+        (center, achieved) = getInterval(target, stats, z)
+        count = stats.getCount()
+        if (achieved <= halfWidth and batches >= minBatches) or count >= maxMatches:
+            break
+        needed = (achieved / halfWidth) ** 2 * count
+        nextBatch = int(min(max(needed - count, batchSize), count, maxMatches - count))
+    return {
+        "mean": stats.getMean(),
+        "halfWidth": achieved,
+        "low": center - achieved,
+        "high": center + achieved,
+        "matches": count,
+        "batches": batches,
+        "converged": achieved <= halfWidth,
+        "stats": stats,
+    }
@@ -0,0 +1,849 @@
+"""
+Este arquivo define os acumuladores usados na análise dos resultados simulados. Todos
+consomem os dados em uma única passada e usam memória constante, de modo que a análise
+funciona para datasets maiores que a memória disponível.
+"""
+import numpy as np
+import os
+import json
+
+from sinks import (
+    readManifest,
+    openColumnarShard,
+    summarizeMatch,
+    listDatasetFiles,
+    readFileRecords,
+)
+
+MISSING_SUMMARY_MESSAGE = "O dataset não possui os totais de games e pontos das partidas. Simule com --detail summary ou superior."
+"""
+Mensagem de erro exibida ao analisar partidas simuladas com `tennis.markov.DETAIL_NONE`.
+"""
+
+
+class RunningStats:
+    """
+    Acumulador de média e desvio padrão em uma passada, usando o algoritmo de Welford.
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        """
+        Adiciona um valor ao acumulador.
+
+        Args:
+            value (float): valor a ser adicionado
+        """
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+    def addArray(self, values):
+        """
+        Adiciona um vetor de valores ao acumulador, calculando suas estatísticas com o NumPy
+        e combinando-as com as atuais através de `merge`.
+
+        Args:
+            values (np.ndarray): valores a serem adicionados
+        """
+        if len(values) == 0:
+            return
+        chunk = RunningStats()
+        chunk._count = len(values)
+        chunk._mean = float(np.mean(values))
+        chunk._m2 = float(np.sum((np.asarray(values, dtype=np.float64) - chunk._mean) ** 2))
+        self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Combina as estatísticas de outro acumulador com as deste, usando a fórmula de Chan
+        para a combinação das variâncias.
+
+        Args:
+            other (`RunningStats`): acumulador a ser combinado
+        """
+        if other._count == 0:
+            return
+        count = self._count + other._count
+        delta = other._mean - self._mean
+        self._mean += delta * other._count / count
+        self._m2 += other._m2 + delta * delta * self._count * other._count / count
+        self._count = count
+
+    def getCount(self):
+        """
+        Returns:
+            (int) quantidade de valores adicionados
+        """
+        return self._count
+
+    def getMean(self):
+        """
+        Returns:
+            (float) média dos valores adicionados
+        """
+        return self._mean
+
+    def getDP(self):
+        """
+        Returns:
+            (float) desvio padrão populacional dos valores adicionados, com a mesma fórmula de
+            `utils.dp`
+        """
+        if self._count == 0:
+            return 0.0
+        return (self._m2 / self._count) ** 0.5
+
+    def getStandardError(self):
+        """
+        Returns:
+            (float) erro padrão da média, usando a variância amostral (com n - 1)
+        """
+        if self._count < 2:
+            return float("inf")
+        return (self._m2 / (self._count - 1) / self._count) ** 0.5
+
+    def toJSON(self):
+        """
+        Returns:
+            [int, float, float]: quantidade, média e soma dos quadrados dos desvios
+        """
+        return [self._count, self._mean, self._m2]
+
+    @staticmethod
+    def fromJSON(data):
+        """
+        Reconstrói um acumulador a partir do formato de `toJSON`.
+
+        Returns:
+            `RunningStats`: o acumulador
+        """
+        stats = RunningStats()
+        (stats._count, stats._mean, stats._m2) = data
+        return stats
+
+
+class IntHistogram:
+    """
+    Histograma de valores inteiros, usado para desenhar os boxplots sem guardar um valor por
+    partida. Como a quantidade de pontos, games e sets de uma partida é pequena, o
+    histograma ocupa espaço proporcional à quantidade de valores distintos.
+    """
+
+    def __init__(self):
+        self._counts = {}
+
+    def add(self, value: int):
+        """
+        Adiciona um valor ao histograma.
+
+        Args:
+            value (int): valor a ser adicionado
+        """
+        self._counts[value] = self._counts.get(value, 0) + 1
+
+    def addArray(self, values):
+        """
+        Adiciona um vetor de valores ao histograma.
+
+        Args:
+            values (np.ndarray): valores a serem adicionados
+        """
+        uniqueValues, counts = np.unique(values, return_counts=True)
+        for value, count in zip(uniqueValues.tolist(), counts.tolist()):
+            self._counts[value] = self._counts.get(value, 0) + count
+
+    def merge(self, other):
+        """
+        Combina as contagens de outro histograma com as deste.
+
+        Args:
+            other (`IntHistogram`): histograma a ser combinado
+        """
+        for value, count in other._counts.items():
+            self._counts[value] = self._counts.get(value, 0) + count
+
+    def percentile(self, q: float):
+        """
+        Calcula um percentil dos valores, com a mesma interpolação linear de `np.percentile`.
+
+        Args:
+            q (float): percentil desejado, entre 0 e 100
+
+        Returns:
+            (float) o percentil
+        """
+        values = sorted(self._counts)
+        total = sum(self._counts.values())
+        position = q / 100 * (total - 1)
+        lower = int(np.floor(position))
+        fraction = position - lower
+
+        def valueAt(index):
+            seen = 0
+            for value in values:
+                seen += self._counts[value]
+                if index < seen:
+                    return value
+            return values[-1]
+
+        lowerValue = valueAt(lower)
+        if fraction == 0:
+            return float(lowerValue)
+        return lowerValue + (valueAt(lower + 1) - lowerValue) * fraction
+
+    def boxplotStats(self):
+        """
+        Calcula as estatísticas de um boxplot no formato aceito por `Axes.bxp`, com as mesmas
+        regras de `Axes.boxplot` (bigodes a 1,5 vezes a distância interquartil).
+
+        Returns:
+            dict: estatísticas do boxplot
+        """
+        q1 = self.percentile(25)
+        q3 = self.percentile(75)
+        iqr = q3 - q1
+        inside = [v for v in self._counts if q1 - 1.5 * iqr <= v <= q3 + 1.5 * iqr]
+        return {
+            "med": self.percentile(50),
+            "q1": q1,
+            "q3": q3,
+            "whislo": min(inside),
+            "whishi": max(inside),
+            "fliers": sorted(v for v in self._counts if v < min(inside) or v > max(inside)),
+        }
+
+    def toJSON(self):
+        """
+        Returns:
+            [[int, int]]: pares (valor, contagem), ordenados pelo valor
+        """
+        return sorted([value, count] for value, count in self._counts.items())
+
+    @staticmethod
+    def fromJSON(data):
+        """
+        Reconstrói um histograma a partir do formato de `toJSON`.
+
+        Returns:
+            `IntHistogram`: o histograma
+        """
+        histogram = IntHistogram()
+        histogram._counts = {value: count for value, count in data}
+        return histogram
+
+
+class _GroupState:
+    """
+    Estado de um `GroupCounter` supondo que a primeira partida acumulada esteja em uma
+    determinada posição do dataset, módulo o tamanho do grupo. As partidas anteriores à
+    primeira fronteira de grupo ficam no prefixo, pois pertencem a um grupo iniciado antes.
+    """
+
+    def __init__(self, groupSize: int, offset: int):
+        self.groupSize = groupSize
+        self.headLength = (groupSize - offset) % groupSize
+        self.prefixP = 0
+        self.prefixSize = 0
+        self.closed = self.headLength == 0
+        self.currentP = 0
+        self.currentSize = 0
+        self.pStats = RunningStats()
+        self.qStats = RunningStats()
+
+    def add(self, pWon: bool):
+        if not self.closed:
+            self.prefixP += 1 if pWon else 0
+            self.prefixSize += 1
+            self.closed = self.prefixSize == self.headLength
+            return
+        self.currentP += 1 if pWon else 0
+        self.currentSize += 1
+        if self.currentSize == self.groupSize:
+            self.closeGroup()
+
+    def addArray(self, pWon):
+        position = 0
+        while position < len(pWon) and (not self.closed or self.currentSize > 0):
+            self.add(bool(pWon[position]))
+            position += 1
+        body = pWon[position:]
+        fullCount = len(body) // self.groupSize * self.groupSize
+        if fullCount > 0:
+            groups = body[:fullCount].reshape(-1, self.groupSize).sum(axis=1)
+            self.pStats.addArray(groups)
+            self.qStats.addArray(self.groupSize - groups)
+        for value in body[fullCount:].tolist():
+            self.add(value)
+
+    def closeGroup(self):
+        self.pStats.add(self.currentP)
+        self.qStats.add(self.currentSize - self.currentP)
+        self.currentP = 0
+        self.currentSize = 0
+
+    def merge(self, other):
+        """
+        Acrescenta ao fim deste estado as partidas de `other`, que deve ter sido criado com
+        a posição seguinte à última partida deste estado.
+        """
+        if not self.closed:
+            self.prefixP += other.prefixP
+            self.prefixSize += other.prefixSize
+            self.closed = other.closed
+            self.pStats.merge(other.pStats)
+            self.qStats.merge(other.qStats)
+            self.currentP = other.currentP
+            self.currentSize = other.currentSize
+            return
+        self.currentP += other.prefixP
+        self.currentSize += other.prefixSize
+        if other.closed:
+            if self.currentSize > 0:
+                self.closeGroup()
+            self.pStats.merge(other.pStats)
+            self.qStats.merge(other.qStats)
+            self.currentP = other.currentP
+            self.currentSize = other.currentSize
+
+    def toJSON(self):
+        data = dict(self.__dict__)
+        data["pStats"] = self.pStats.toJSON()
+        data["qStats"] = self.qStats.toJSON()
+        return data
+
+    @staticmethod
+    def fromJSON(data):
+        state = _GroupState(data["groupSize"], 0)
+        state.__dict__.update(data)
+        state.pStats = RunningStats.fromJSON(data["pStats"])
+        state.qStats = RunningStats.fromJSON(data["qStats"])
+        return state
+
+
+class GroupCounter:
+    """
+    Conta as vitórias de P e de Q em grupos de três partidas consecutivas, acumulando a média
+    e o desvio padrão dessas contagens. O último grupo pode ter menos de três partidas.
+
+    Contadores de trechos consecutivos de um dataset podem ser combinados com `merge`. Como a
+    posição em que cada trecho começa só é conhecida na combinação, o contador mantém um
+    `_GroupState` para cada posição inicial possível, módulo o tamanho do grupo.
+    """
+
+    def __init__(self, groupSize=3):
+        self._groupSize = groupSize
+        self._count = 0
+        self._states = [_GroupState(groupSize, offset) for offset in range(groupSize)]
+
+    def add(self, pWon: bool):
+        """
+        Adiciona o resultado de uma partida.
+
+        Args:
+            pWon (bool): True se P venceu a partida
+        """
+        self._count += 1
+        for state in self._states:
+            state.add(pWon)
+
+    def addArray(self, pWon):
+        """
+        Adiciona os resultados de um vetor de partidas, na ordem do vetor.
+
+        Args:
+            pWon (np.ndarray): vetor booleano, True onde P venceu a partida
+        """
+        pWon = np.asarray(pWon, dtype=bool)
+        self._count += len(pWon)
+        for state in self._states:
+            state.addArray(pWon)
+
+    def merge(self, other):
+        """
+        Acrescenta ao fim deste contador as partidas contadas por `other`.
+
+        Args:
+            other (`GroupCounter`): contador do trecho seguinte do dataset
+        """
+        for offset, state in enumerate(self._states):
+            state.merge(other._states[(offset + self._count) % self._groupSize])
+        self._count += other._count
+
+    def getStats(self):
+        """
+        Retorna as estatísticas dos grupos, incluindo o grupo incompleto final, sem alterar
+        o estado do contador.
+
+        Returns:
+            (`RunningStats`, `RunningStats`): estatísticas das vitórias de P e de Q por grupo
+        """
+        state = self._states[0]
+        pStats = RunningStats()
+        qStats = RunningStats()
+        pStats.merge(state.pStats)
+        qStats.merge(state.qStats)
+        if state.currentSize > 0:
+            pStats.add(state.currentP)
+            qStats.add(state.currentSize - state.currentP)
+        return (pStats, qStats)
+
+    def toJSON(self):
+        """
+        Returns:
+            dict: o estado do contador, em um formato serializável em JSON
+        """
+        return {
+            "groupSize": self._groupSize,
+            "count": self._count,
+            "states": [state.toJSON() for state in self._states],
+        }
+
+    @staticmethod
+    def fromJSON(data):
+        """
+        Reconstrói um contador a partir do formato de `toJSON`.
+
+        Returns:
+            `GroupCounter`: o contador
+        """
+        counter = GroupCounter(data["groupSize"])
+        counter._count = data["count"]
+        counter._states = [_GroupState.fromJSON(state) for state in data["states"]]
+        return counter
+
+
+class MatchStatsAggregator:
+    """
+    Acumula, em uma única passada, todos os valores exibidos pela análise de um dataset.
+    O uso geral da classe segue o seguinte fluxo:
+        - Instanciação da classe;
+        - Chamada de `addRecord` para cada partida em JSON, ou de `addMatchArrays` e
+        `addDraws` para dados colunares;
+        - Leitura dos resultados através dos métodos `get*`.
+    """
+
+    COUNTERS = ("setsP", "setsQ", "gamesP", "gamesQ", "pointsP", "pointsQ")
+    """
+    Contadores acumulados por partida.
+    """
+
+    def __init__(self):
+        self._matchCount = 0
+        self._pWins = 0
+        self._firstWinner = None
+        self._groups = GroupCounter()
+        self._stats = {name: RunningStats() for name in MatchStatsAggregator.COUNTERS}
+        self._histograms = {name: IntHistogram() for name in MatchStatsAggregator.COUNTERS}
+        self._totals = {name: 0 for name in MatchStatsAggregator.COUNTERS}
+        self._draws = RunningStats()
+
+    def addRecord(self, record: dict):
+        """
+        Adiciona uma partida no formato de `tennis.tennisClasses.TennisMatch.toJSON`, em
+        qualquer nível de detalhe a partir de `tennis.markov.DETAIL_SUMMARY`.
+
+        Args:
+            record (dict): dados da partida
+        """
+        summary = summarizeMatch(record)
+        if summary is None:
+            raise ValueError(MISSING_SUMMARY_MESSAGE)
+        winner = record["matchResult"]["winner"]
+        values = (
+            record["matchResult"]["score"]["p"],
+            record["matchResult"]["score"]["q"],
+        ) + summary
+        if self._firstWinner is None:
+            self._firstWinner = winner
+        self._matchCount += 1
+        self._pWins += 1 if winner == "p" else 0
+        self._groups.add(winner == "p")
+        for name, value in zip(MatchStatsAggregator.COUNTERS, values):
+            self._stats[name].add(value)
+            self._histograms[name].add(value)
+            self._totals[name] += value
+        for setData in record.get("matchData", []):
+            for gameData in setData.get("setData", []):
+                for point in gameData.get("gameData", []):
+                    self._draws.add(point["resultValue"])
+
+    def addMatchArrays(self, pWon, **counters):
+        """
+        Adiciona um bloco de partidas a partir de vetores, como os da tabela de partidas do
+        formato colunar.
+
+        Args:
+            pWon (np.ndarray): vetor booleano, True onde P venceu a partida
+            **counters (np.ndarray): um vetor para cada nome de `COUNTERS`
+        """
+        if len(pWon) == 0:
+            return
+        if self._firstWinner is None:
+            self._firstWinner = "p" if pWon[0] else "q"
+        self._matchCount += len(pWon)
+        self._pWins += int(np.count_nonzero(pWon))
+        self._groups.addArray(pWon)
+        for name in MatchStatsAggregator.COUNTERS:
+            self._stats[name].addArray(counters[name])
+            self._histograms[name].addArray(counters[name])
+            self._totals[name] += int(np.sum(counters[name], dtype=np.int64))
+
+    def addDraws(self, values):
+        """
+        Adiciona um vetor de números sorteados.
+
+        Args:
+            values (np.ndarray): números sorteados
+        """
+        self._draws.addArray(values)
+
+    def merge(self, other):
+        """
+        Acrescenta a este acumulador os valores acumulados por `other`, como se as partidas
+        de `other` viessem logo após as deste no dataset.
+
+        Args:
+            other (`MatchStatsAggregator`): acumulador do trecho seguinte do dataset
+        """
+        if self._firstWinner is None:
+            self._firstWinner = other._firstWinner
+        self._matchCount += other._matchCount
+        self._pWins += other._pWins
+        self._groups.merge(other._groups)
+        for name in MatchStatsAggregator.COUNTERS:
+            self._stats[name].merge(other._stats[name])
+            self._histograms[name].merge(other._histograms[name])
+            self._totals[name] += other._totals[name]
+        self._draws.merge(other._draws)
+
+    def toJSON(self):
+        """
+        Returns:
+            dict: os valores acumulados, em um formato serializável em JSON
+        """
+        return {
+            "matchCount": self._matchCount,
+            "pWins": self._pWins,
+            "firstWinner": self._firstWinner,
+            "groups": self._groups.toJSON(),
+            "stats": {name: stats.toJSON() for name, stats in self._stats.items()},
+            "histograms": {
+                name: histogram.toJSON() for name, histogram in self._histograms.items()
+            },
+            "totals": self._totals,
+            "draws": self._draws.toJSON(),
+        }
+
+    @staticmethod
+    def fromJSON(data):
+        """
+        Reconstrói um acumulador a partir do formato de `toJSON`.
+
+        Returns:
+            `MatchStatsAggregator`: o acumulador
+        """
+        aggregator = MatchStatsAggregator()
+        aggregator._matchCount = data["matchCount"]
+        aggregator._pWins = data["pWins"]
+        aggregator._firstWinner = data["firstWinner"]
+        aggregator._groups = GroupCounter.fromJSON(data["groups"])
+        aggregator._stats = {
+            name: RunningStats.fromJSON(stats) for name, stats in data["stats"].items()
+        }
+        aggregator._histograms = {
+            name: IntHistogram.fromJSON(histogram)
+            for name, histogram in data["histograms"].items()
+        }
+        aggregator._totals = dict(data["totals"])
+        aggregator._draws = RunningStats.fromJSON(data["draws"])
+        return aggregator
+
+    def getMatchCount(self):
+        """
+        Returns:
+            (int) quantidade de partidas
+        """
+        return self._matchCount
+
+    def getPWins(self):
+        """
+        Returns:
+            (int) quantidade de partidas vencidas por P
+        """
+        return self._pWins
+
+    def getFirstWinner(self):
+        """
+        Returns:
+            (str) vencedor da primeira partida do dataset
+        """
+        return self._firstWinner
+
+    def getGroupStats(self):
+        """
+        Returns:
+            (`RunningStats`, `RunningStats`) estatísticas das vitórias de P e de Q em grupos
+            de três partidas, como em `GroupCounter.getStats`
+        """
+        return self._groups.getStats()
+
+    def getStats(self, name: str):
+        """
+        Args:
+            name (str): nome de um dos contadores de `COUNTERS`
+
+        Returns:
+            (`RunningStats`) estatísticas do contador por partida
+        """
+        return self._stats[name]
+
+    def getHistogram(self, name: str):
+        """
+        Args:
+            name (str): nome de um dos contadores de `COUNTERS`
+
+        Returns:
+            (`IntHistogram`) histograma do contador por partida
+        """
+        return self._histograms[name]
+
+    def getTotal(self, name: str):
+        """
+        Args:
+            name (str): nome de um dos contadores de `COUNTERS`
+
+        Returns:
+            (int) soma do contador em todas as partidas
+        """
+        return self._totals[name]
+
+    def getDraws(self):
+        """
+        Returns:
+            (`RunningStats`) estatísticas dos números sorteados; vazio se o dataset não
+            possuir os dados de cada ponto
+        """
+        return self._draws
+
+
+def aggregateRecords(records):
+    """
+    Analisa partidas no formato JSON, consumindo-as uma de cada vez.
+
+    Args:
+        records (iterable): partidas, como as produzidas por `tennis.sinks.readRecords`
+
+    Returns:
+        `MatchStatsAggregator`: os valores acumulados
+    """
+    aggregator = MatchStatsAggregator()
+    for record in records:
+        aggregator.addRecord(record)
+    return aggregator
+
+
+def analyzeFile(path: str):
+    """
+    Analisa um único arquivo de dados `.json` ou `.jsonl`.
+
+    Args:
+        path (str): caminho do arquivo
+
+    Returns:
+        `MatchStatsAggregator`: os valores acumulados
+    """
+    return aggregateRecords(readFileRecords(path))
+
+
+def analyzeColumnarShard(shardPath: str, chunkSize=1 << 22):
+    """
+    Analisa um shard do formato colunar de `tennis.sinks.ColumnarSink`. As tabelas são
+    mapeadas em memória e percorridas em blocos de `chunkSize` linhas.
+
+    Args:
+        shardPath (str): pasta do shard
+        chunkSize (int): quantidade de linhas processadas por vez
+
+    Returns:
+        `MatchStatsAggregator`: os valores acumulados
+    """
+    aggregator = MatchStatsAggregator()
+    tables = openColumnarShard(shardPath)
+    matches = tables["matches"]
+    draws = tables["points"]["draw"]
+    for start in range(0, len(matches), chunkSize):
+        chunk = matches[start : start + chunkSize]
+        if (chunk["pointsP"] < 0).any():
+            raise ValueError(MISSING_SUMMARY_MESSAGE)
+        aggregator.addMatchArrays(
+            chunk["winner"] == 1,
+            **{name: chunk[name] for name in MatchStatsAggregator.COUNTERS}
+        )
+    for start in range(0, len(draws), chunkSize):
+        aggregator.addDraws(draws[start : start + chunkSize])
+    return aggregator
+
+
+class AnalysisIndex:
+    """
+    Índice persistente da análise de um dataset, guardado no arquivo oculto `INDEX_FILE`
+    dentro da própria pasta do dataset. Para cada arquivo (ou shard colunar), o índice guarda
+    apenas o acumulador parcial (estatísticas, histogramas e grupos), identificado pelo
+    caminho, pela data de modificação e pelo tamanho do arquivo, de modo que o tamanho do
+    índice não cresce com a quantidade de partidas. Assim, uma nova análise só lê os arquivos
+    novos ou alterados.
+    """
+
+    INDEX_FILE = ".analysis-index.json"
+    """
+    Nome do arquivo do índice.
+    """
+
+    VERSION = 2
+    """
+    Versão do formato do índice. Índices de outras versões são descartados.
+    """
+
+    def __init__(self, datasetPath: str):
+        """
+        Carrega o índice de um dataset, ou cria um índice vazio.
+
+        Args:
+            datasetPath (str): pasta do dataset
+        """
+        self._path = os.path.join(datasetPath, AnalysisIndex.INDEX_FILE)
+        self._entries = {}
+        self._usedKeys = set()
+        self._changed = False
+        if os.path.exists(self._path):
+            with open(self._path, "r") as indexFile:
+                data = json.loads(indexFile.read())
+            if data.get("version") == AnalysisIndex.VERSION:
+                self._entries = data["files"]
+
+    @staticmethod
+    def getSignature(path: str):
+        """
+        Calcula a assinatura de um arquivo ou de um shard colunar.
+
+        Args:
+            path (str): caminho do arquivo ou da pasta do shard
+
+        Returns:
+            [int, int]: maior data de modificação, em nanossegundos, e tamanho total
+        """
+        if os.path.isdir(path):
+            stats = [os.stat(entry.path) for entry in os.scandir(path) if entry.is_file()]
+        else:
+            stats = [os.stat(path)]
+        return [max(stat.st_mtime_ns for stat in stats), sum(stat.st_size for stat in stats)]
+
+    def get(self, key: str, signature):
+        """
+        Retorna o acumulador de um arquivo, se ele estiver no índice com a mesma assinatura.
+
+        Args:
+            key (str): caminho do arquivo relativo à pasta do dataset
+            signature ([int, int]): assinatura atual, como em `getSignature`
+
+        Returns:
+            `MatchStatsAggregator`: o acumulador, ou None se o arquivo precisar ser lido
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry["signature"] != signature:
+            return None
+        self._usedKeys.add(key)
+        return MatchStatsAggregator.fromJSON(entry["aggregate"])
+
+    def put(self, key: str, signature, aggregator):
+        """
+        Guarda os resultados da análise de um arquivo no índice.
+
+        Args:
+            key (str): caminho do arquivo relativo à pasta do dataset
+            signature ([int, int]): assinatura do arquivo, como em `getSignature`
+            aggregator (`MatchStatsAggregator`): acumulador do arquivo
+        """
+        self._usedKeys.add(key)
+        self._entries[key] = {"signature": signature, "aggregate": aggregator.toJSON()}
+        self._changed = True
+
+    def save(self):
+        """
+        Escreve o índice em disco, descartando arquivos que não existem mais no dataset. Se
+        nenhum arquivo foi adicionado, alterado ou removido, o índice não é reescrito.
+        """
+        if not self._changed and self._usedKeys == set(self._entries):
+            return
+        files = {key: self._entries[key] for key in sorted(self._usedKeys)}
+        temporaryPath = self._path + ".tmp"
+        with open(temporaryPath, "w") as indexFile:
+            indexFile.write(json.dumps({"version": AnalysisIndex.VERSION, "files": files}))
+        os.replace(temporaryPath, self._path)
+
+
+def aggregateDataset(datasetPath: str, workers=1, useIndex=True):
+    """
+    Analisa um dataset em qualquer formato gerado por `tennis.sinks`. Cada arquivo (ou
+    shard colunar) é analisado separadamente, possivelmente em paralelo, e os acumuladores
+    parciais são combinados com `MatchStatsAggregator.merge` na ordem do dataset, de modo
+    que o resultado não depende da quantidade de processos.
+
+    Com `useIndex`, os acumuladores de cada arquivo são guardados em um `AnalysisIndex`, e
+    apenas os arquivos novos ou alterados desde a última análise são lidos.
+
+    Args:
+        datasetPath (str): pasta do dataset
+        workers (int): quantidade de processos usados na análise
+        useIndex (bool): se True, usa e atualiza o índice da pasta do dataset
+
+    Returns:
+        `MatchStatsAggregator`: os valores acumulados
+    """
+    manifest = readManifest(datasetPath)
+    if manifest is not None and manifest["format"] == "columnar":
+        task = analyzeColumnarShard
+        keys = [shard["dir"] for shard in manifest["shards"]]
+    else:
+        task = analyzeFile
+        keys = [os.path.basename(path) for path in listDatasetFiles(datasetPath)]
+    paths = [os.path.join(datasetPath, key) for key in keys]
+
+    index = AnalysisIndex(datasetPath) if useIndex else None
+    partials = [None] * len(keys)
+    signatures = [None] * len(keys)
+    if index is not None:
+        for i, (key, path) in enumerate(zip(keys, paths)):
+            signatures[i] = AnalysisIndex.getSignature(path)
+            partials[i] = index.get(key, signatures[i])
+    pending = [i for i, partial in enumerate(partials) if partial is None]
+    pendingPaths = [paths[i] for i in pending]
+
+    if workers > 1 and len(pending) > 1:
+        from multiprocessing import Pool
+
+        with Pool(workers) as pool:
+            chunkSize = max(1, len(pending) // (workers * 8))
+            results = pool.imap(task, pendingPaths, chunkSize)
+            for i, partial in zip(pending, results):
+                partials[i] = partial
+                if index is not None:
+                    index.put(keys[i], signatures[i], partial)
+    else:
+        for i, path in zip(pending, pendingPaths):
+            partials[i] = task(path)
+            if index is not None:
+                index.put(keys[i], signatures[i], partials[i])
+
+    if index is not None:
+        index.save()
+    aggregator = MatchStatsAggregator()
+    for partial in partials:
+        aggregator.merge(partial)
+    return aggregator
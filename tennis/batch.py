@@ -0,0 +1,116 @@
+"""
+Este arquivo define o motor de simulação em lote, que avança vários games de tênis
+simultaneamente usando vetores do NumPy, sem chamadas Python por ponto.
+"""
+import numpy as np
+
+from markov import MarkovNode
+
+
+class BatchGameEngine:
+    """
+    Classe que simula N games independentes ao mesmo tempo a partir da tabela de transição
+    compilada de `MarkovNode` (ver `tennis.markov.TransitionTable`).
+    O uso geral da classe segue o seguinte fluxo:
+        - Criação e população dos nós da classe `MarkovNode`;
+        - Instanciação da classe `BatchGameEngine` usando o `MarkovNode` inicial e um seed;
+        - Chamada de `simulateGames` com a quantidade de games desejada.
+
+    O motor também pode ser executado sobre a cadeia da partida inteira gerada por
+    `tennis.tennisClasses.compileMatchChain`; nesse caso, cada "game" simulado é uma partida
+    completa, sem nenhuma troca de camada (game, set, partida) em Python.
+    """
+
+    def __init__(self, initialNode, tgtSeed, table=None, tiltedProbP=None):
+        """
+        Construtor da classe.
+
+        Args:
+            initialNode (`MarkovNode` | str): Nó inicial de cada game, ou o nome do estado
+                inicial na tabela.
+            tgtSeed (int): Seed para o gerador de números aleatórios do NumPy.
+            table (`tennis.markov.TransitionTable`): Tabela de transição compilada. Se
+                omitida, é usada a tabela de `MarkovNode.getTable`.
+            tiltedProbP (float | dict): Se informada, os pontos são sorteados com esta
+                probabilidade de vitória de P em todos os estados transientes (ou, se for um
+                dicionário, nos nós informados, como em `MarkovNode.compile`), em vez da
+                probabilidade da tabela, e cada game acumula o logaritmo da razão de
+                verossimilhança entre as duas, para amostragem por importância (ver
+                `tennis.rare`).
+        """
+        self._table = table if table is not None else MarkovNode.getTable()
+        if not isinstance(initialNode, str):
+            initialNode = initialNode.getName()
+        self._initialState = self._table.getStateId(initialNode)
+        self._seed = tgtSeed
+        self._rng = np.random.default_rng(tgtSeed)
+        self._tilted = tiltedProbP is not None
+        if self._tilted:
+            if isinstance(tiltedProbP, dict):
+                drawProbP = self._table.probP.copy()
+                for name, prob in tiltedProbP.items():
+                    drawProbP[self._table.getStateId(name)] = float(prob)
+            else:
+                drawProbP = np.where(self._table.absorbing, 0.0, float(tiltedProbP))
+            self._drawProbP = drawProbP
+            with np.errstate(divide="ignore", invalid="ignore"):
+                self._logRatioP = np.log(self._table.probP) - np.log(drawProbP)
+                self._logRatioQ = np.log(1 - self._table.probP) - np.log(1 - drawProbP)
+        else:
+            self._drawProbP = self._table.probP
+
+    def simulateGames(self, count: int):
+        """
+        Simula `count` games independentes. A cada passo, um valor aleatório é sorteado
+        para cada game ainda em andamento; games que atingem um estado absorvente deixam
+        de ser avançados.
+
+        Args:
+            count (int): Quantidade de games a serem simulados.
+
+        Returns:
+            dict: vetores com uma posição por game, no formato
+
+                {
+                    winner (bool): True se o jogador P venceu o game,
+                    pPoints (int): pontos do jogador P,
+                    qPoints (int): pontos do jogador Q,
+                    state (int): estado absorvente final,
+                    logWeight (float): logaritmo da razão de verossimilhança do game entre a
+                        probabilidade da tabela e `tiltedProbP` (zero sem `tiltedProbP`)
+                }
+        """
+        table = self._table
+        state = np.full(count, self._initialState, dtype=np.intp)
+        pPoints = np.zeros(count, dtype=np.int64)
+        qPoints = np.zeros(count, dtype=np.int64)
+        logWeight = np.zeros(count)
+        drawProbP = self._drawProbP
+        active = np.flatnonzero(~table.absorbing[state])
+        while active.size > 0:
+            current = state[active]
+            scoredP = self._rng.random(active.size) < drawProbP[current]
+            state[active] = np.where(scoredP, table.nextP[current], table.nextQ[current])
+            if self._tilted:
+                logWeight[active] += np.where(
+                    scoredP, self._logRatioP[current], self._logRatioQ[current]
+                )
+            pPoints[active] += scoredP
+            qPoints[active] += ~scoredP
+            active = active[~table.absorbing[state[active]]]
+        return {
+            "winner": table.winner[state] == 1,
+            "pPoints": pPoints,
+            "qPoints": qPoints,
+            "state": state,
+            "logWeight": logWeight,
+        }
+
+    def getSeed(self):
+        """
+        Retorna o seed usado para gerar os números aleatórios.
+
+        Returns:
+            int: Seed usado para gerar os números aleatórios.
+        """
+        return self._seed
@@ -0,0 +1,449 @@
+"""
+benchmark.py
+====================================
+Suíte de benchmarks do projeto. Cada benchmark usa seeds fixos e datasets sintéticos de
+tamanho fixo, gerados em uma pasta temporária, e mede a vazão de uma camada da simulação ou
+da análise (pontos, games, sets ou partidas por segundo, e MB por segundo na análise). Os
+resultados são salvos em JSON em `results/benchmarks`, e podem ser comparados com uma
+execução anterior para detectar regressões:
+
+    python tennis/benchmark.py
+    python tennis/benchmark.py --compare results/benchmarks/anterior.json
+"""
+from main import loadData, loadStateTable, buildChain
+from markov import MarkovGraph, MarkovNode, DETAIL_POINT, DETAIL_SUMMARY
+from tennisClasses import TennisSet, TennisMatch, solveMatchCurve
+from hierarchical import SampledGameGraph
+from batch import BatchGameEngine
+from sinks import createSink
+from analysis import aggregateDataset
+from utils import spawnSeeds
+
+import numpy as np
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import platform
+import tempfile
+from time import perf_counter, strftime
+
+BENCHMARK_VERSION = 1
+"""
+Versão do formato dos resultados. Resultados de versões diferentes não são comparados.
+"""
+
+STATE_PATH = "tennis/stateList.csv"
+MAIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+SEED = 12345
+
+
+def timeBest(function, repeat: int):
+    """
+    Executa `function` `repeat` vezes e retorna o menor tempo, que é a medida menos afetada
+    por ruído do sistema.
+
+    Args:
+        function (function): função sem argumentos; o seu retorno é repassado
+        repeat (int): quantidade de execuções
+
+    Returns:
+        (float, object): menor tempo em segundos e o retorno da última execução
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        startTime = perf_counter()
+        result = function()
+        best = min(best, perf_counter() - startTime)
+    return (best, result)
+
+
+def benchLoadData(scale: float, repeat: int):
+    count = max(1, int(200 * scale))
+    (seconds, _) = timeBest(lambda: [loadData(STATE_PATH) for _ in range(count)], repeat)
+    return {"seconds": seconds, "count": count, "unit": "loads"}
+
+
+def benchLoadStateTable(scale: float, repeat: int):
+    count = max(1, int(200 * scale))
+    loadStateTable(STATE_PATH)
+    (seconds, _) = timeBest(
+        lambda: [loadStateTable(STATE_PATH) for _ in range(count)], repeat
+    )
+    return {"seconds": seconds, "count": count, "unit": "loads"}
+
+
+def benchGetNextNode(scale: float, repeat: int, detail=DETAIL_POINT):
+    count = max(1, int(200_000 * scale))
+    initialNode = MarkovNode.getNodeById("0-0")
+
+    def run():
+        graph = MarkovGraph(initialNode, SEED, detail=detail)
+        points = 0
+        while points < count:
+            graph.simulateGame()
+            points += sum(graph.getScore())
+            graph.reset()
+        return points
+
+    (seconds, points) = timeBest(run, repeat)
+    return {"seconds": seconds, "count": points, "unit": "points"}
+
+
+def benchSimulateGame(scale: float, repeat: int):
+    count = max(1, int(20_000 * scale))
+    initialNode = MarkovNode.getNodeById("0-0")
+
+    def run():
+        graph = MarkovGraph(initialNode, SEED, detail=DETAIL_SUMMARY)
+        for _ in range(count):
+            graph.simulateGame()
+            graph.reset()
+
+    (seconds, _) = timeBest(run, repeat)
+    return {"seconds": seconds, "count": count, "unit": "games"}
+
+
+def benchTennisSet(scale: float, repeat: int):
+    count = max(1, int(2_000 * scale))
+    initialNode = MarkovNode.getNodeById("0-0")
+
+    def run():
+        tennisSet = TennisSet(MarkovGraph(initialNode, SEED, detail=DETAIL_SUMMARY))
+        for _ in range(count):
+            tennisSet.simulate()
+            tennisSet.reset()
+
+    (seconds, _) = timeBest(run, repeat)
+    return {"seconds": seconds, "count": count, "unit": "sets"}
+
+
+def benchTennisMatch(scale: float, repeat: int, detail=DETAIL_POINT, graphClass=MarkovGraph):
+    count = max(1, int(500 * scale))
+    initialNode = MarkovNode.getNodeById("0-0")
+    seeds = spawnSeeds(SEED, count)
+
+    def run():
+        points = 0
+        for seed in seeds:
+            match = TennisMatch(graphClass(initialNode, seed, detail=detail))
+            match.simulate()
+            points += sum(match.getPoints())
+        return points
+
+    (seconds, points) = timeBest(run, repeat)
+    return {
+        "seconds": seconds,
+        "count": count,
+        "unit": "matches",
+        "extra": {"points": points, "pointsPerSecond": points / seconds},
+    }
+
+
+def benchBatch(scale: float, repeat: int):
+    count = max(1, int(20_000 * scale))
+    initialNode = MarkovNode.getNodeById("0-0")
+
+    def run():
+        results = TennisMatch.simulateBatch(BatchGameEngine(initialNode, SEED), count)
+        return int((results["pPoints"] + results["qPoints"]).sum())
+
+    (seconds, points) = timeBest(run, repeat)
+    return {
+        "seconds": seconds,
+        "count": count,
+        "unit": "matches",
+        "extra": {"points": points, "pointsPerSecond": points / seconds},
+    }
+
+
+def benchExactCurve(scale: float, repeat: int):
+    count = max(1, int(10_000 * scale))
+    table = MarkovNode.getTable()
+    initialNode = MarkovNode.getNodeById("0-0")
+    probs = np.linspace(0, 1, count)
+    (seconds, _) = timeBest(lambda: solveMatchCurve(table, initialNode, probs), repeat)
+    return {"seconds": seconds, "count": count, "unit": "probabilities"}
+
+
+def writeDataset(path: str, outputFormat: str, count: int, detail=DETAIL_POINT):
+    """
+    Gera um dataset sintético com `count` partidas e seeds fixos.
+
+    Returns:
+        (float, int): tempo de escrita em segundos e tamanho do dataset em bytes
+    """
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    initialNode = MarkovNode.getNodeById("0-0")
+    records = []
+    for seed in spawnSeeds(SEED, count):
+        match = TennisMatch(MarkovGraph(initialNode, seed, detail=detail))
+        match.simulate()
+        records.append(match.toJSON())
+    startTime = perf_counter()
+    with createSink(outputFormat, path, None, None, MarkovNode.getTable()) as sink:
+        for record in records:
+            sink.write(record)
+    seconds = perf_counter() - startTime
+    size = sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path)
+        for name in names
+    )
+    return (seconds, size)
+
+
+def benchDataset(scale: float, repeat: int, workDir: str, outputFormat: str):
+    count = max(1, int(300 * scale))
+    path = os.path.join(workDir, outputFormat)
+    (writeSeconds, size) = writeDataset(path, outputFormat, count)
+    (seconds, _) = timeBest(lambda: aggregateDataset(path, 1, useIndex=False), repeat)
+    megabytes = size / (1 << 20)
+    return {
+        "seconds": seconds,
+        "count": count,
+        "unit": "matches",
+        "extra": {
+            "megabytes": megabytes,
+            "megabytesPerSecond": megabytes / seconds,
+            "writeMegabytesPerSecond": megabytes / writeSeconds,
+        },
+    }
+
+
+BENCHMARKS = {
+    "loadData": benchLoadData,
+    "loadStateTable": benchLoadStateTable,
+    "getNextNode.point": lambda scale, repeat: benchGetNextNode(scale, repeat),
+    "getNextNode.summary": lambda scale, repeat: benchGetNextNode(
+        scale, repeat, DETAIL_SUMMARY
+    ),
+    "simulateGame": benchSimulateGame,
+    "TennisSet.simulate": benchTennisSet,
+    "TennisMatch.simulate.point": lambda scale, repeat: benchTennisMatch(scale, repeat),
+    "TennisMatch.simulate.summary": lambda scale, repeat: benchTennisMatch(
+        scale, repeat, DETAIL_SUMMARY
+    ),
+    "TennisMatch.simulate.hierarchical": lambda scale, repeat: benchTennisMatch(
+        scale, repeat, DETAIL_SUMMARY, SampledGameGraph
+    ),
+    "TennisMatch.simulateBatch": benchBatch,
+    "solveMatchCurve": benchExactCurve,
+}
+"""
+Benchmarks que não dependem de arquivos, associados à função que os executa. Cada função
+recebe o fator de escala do tamanho da carga e a quantidade de repetições.
+"""
+
+DATASET_BENCHMARKS = {
+    "analysis.files": "files",
+    "analysis.jsonl": "jsonl",
+    "analysis.columnar": "columnar",
+}
+"""
+Benchmarks de análise (`analysis.aggregateDataset`, usada por `main.generateStats`),
+associados ao formato do dataset sintético.
+"""
+
+STARTUP_BENCHMARKS = {
+    "startup.simulate": ["--simulate", "-C", "1", "--seed", str(SEED)],
+    "startup.exact": ["--exact"],
+}
+"""
+Benchmarks de inicialização, que executam `main.py` em um novo processo com os argumentos
+associados. O tempo de importação do NumPy, que limita o tempo de inicialização, é medido
+junto como referência.
+"""
+
+
+def runCommand(args):
+    """
+    Returns:
+        float: tempo, em segundos, de uma execução do comando, sem a sua saída
+    """
+    startTime = perf_counter()
+    subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return perf_counter() - startTime
+
+
+def benchStartup(scale: float, repeat: int, workDir: str, args):
+    count = max(1, int(5 * scale))
+    command = [sys.executable, MAIN_PATH] + args + [
+        "--output-path",
+        os.path.join(workDir, "startup"),
+    ]
+    # A primeira execução aquece o cache do sistema de arquivos e o cache de `loadStateTable`.
+    runCommand(command)
+    (seconds, _) = timeBest(lambda: [runCommand(command) for _ in range(count)], repeat)
+    (numpySeconds, _) = timeBest(
+        lambda: [runCommand([sys.executable, "-c", "import numpy"]) for _ in range(count)],
+        repeat,
+    )
+    return {
+        "seconds": seconds,
+        "count": count,
+        "unit": "runs",
+        "extra": {
+            "millisecondsPerRun": seconds / count * 1000,
+            "numpyImportMilliseconds": numpySeconds / count * 1000,
+        },
+    }
+
+
+def runBenchmarks(scale=1.0, repeat=3, names=None):
+    """
+    Executa os benchmarks.
+
+    Args:
+        scale (float): fator de escala do tamanho da carga de cada benchmark
+        repeat (int): quantidade de repetições; é guardado o menor tempo
+        names ([str]): benchmarks a serem executados. Se omitido, executa todos.
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                version (int), timestamp (str), python (str), numpy (str), platform (str),
+                scale (float), repeat (int),
+                results: {
+                    nome do benchmark: {
+                        seconds (float): menor tempo,
+                        count (int): quantidade de unidades processadas,
+                        unit (str): unidade,
+                        rate (float): unidades por segundo,
+                        extra (dict): medidas adicionais, como pontos ou MB por segundo
+                    }
+                }
+            }
+    """
+    buildChain(STATE_PATH)
+    allNames = list(BENCHMARKS) + list(DATASET_BENCHMARKS) + list(STARTUP_BENCHMARKS)
+    names = allNames if names is None else names
+    results = {}
+    workDir = tempfile.mkdtemp(prefix="tennis-benchmark-")
+    try:
+        for name in names:
+            if name in BENCHMARKS:
+                result = BENCHMARKS[name](scale, repeat)
+            elif name in STARTUP_BENCHMARKS:
+                result = benchStartup(scale, repeat, workDir, STARTUP_BENCHMARKS[name])
+            else:
+                result = benchDataset(scale, repeat, workDir, DATASET_BENCHMARKS[name])
+            result["rate"] = result["count"] / result["seconds"]
+            results[name] = result
+            print(formatResult(name, result))
+    finally:
+        shutil.rmtree(workDir)
+    return {
+        "version": BENCHMARK_VERSION,
+        "timestamp": strftime("%Y-%m-%d-%H-%M-%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "scale": scale,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def formatResult(name: str, result: dict):
+    """
+    Returns:
+        str: uma linha com a vazão de um benchmark
+    """
+    line = "{:<36} {:>14.1f} {}/s".format(name, result["rate"], result["unit"])
+    extra = result.get("extra", {})
+    if "pointsPerSecond" in extra:
+        line += "  {:>12.1f} points/s".format(extra["pointsPerSecond"])
+    if "megabytesPerSecond" in extra:
+        line += "  {:>8.2f} MB/s".format(extra["megabytesPerSecond"])
+    if "millisecondsPerRun" in extra:
+        line += "  {:>8.1f} ms/run (import numpy: {:.1f} ms)".format(
+            extra["millisecondsPerRun"], extra["numpyImportMilliseconds"]
+        )
+    return line
+
+
+def compareResults(current: dict, baseline: dict, threshold: float):
+    """
+    Compara a vazão de cada benchmark com uma execução anterior.
+
+    Args:
+        current (dict): resultado de `runBenchmarks`
+        baseline (dict): resultado anterior, no mesmo formato
+        threshold (float): queda relativa de vazão a partir da qual um benchmark é
+            considerado uma regressão (0.1 = 10%)
+
+    Returns:
+        [str]: nomes dos benchmarks com regressão
+    """
+    if baseline.get("version") != current["version"]:
+        print("versão diferente do resultado anterior; comparação ignorada")
+        return []
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = result["rate"] / previous["rate"]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "REGRESSÃO"
+            regressions.append(name)
+        print("{:<36} {:>7.2f}x {}".format(name, ratio, flag))
+    return regressions
+
+
+def checkArgs():
+    parser = argparse.ArgumentParser(description="Benchmarks da simulação e da análise")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Fator de escala do tamanho da carga de cada benchmark",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Quantidade de repetições de cada benchmark"
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(BENCHMARKS) + list(DATASET_BENCHMARKS) + list(STARTUP_BENCHMARKS),
+        help="Executa apenas o benchmark informado; pode ser repetida",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join("results", "benchmarks"),
+        help="Pasta onde os resultados são salvos",
+    )
+    parser.add_argument(
+        "--compare", help="Resultado anterior (JSON) com o qual os resultados são comparados"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Queda relativa de vazão considerada uma regressão",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = checkArgs()
+    report = runBenchmarks(args.scale, args.repeat, args.only)
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    outputPath = os.path.join(args.output, "{}.json".format(report["timestamp"]))
+    with open(outputPath, "w") as outputFile:
+        outputFile.write(json.dumps(report, indent=2))
+    print("resultados salvos em {}".format(outputPath))
+    if args.compare:
+        with open(args.compare, "r") as baselineFile:
+            baseline = json.loads(baselineFile.read())
+        if compareResults(report, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,344 @@
+"""
+Este arquivo define a simulação hierárquica, em que cada game é sorteado de uma só vez a
+partir da distribuição exata dos seus resultados, sem percorrer a cadeia ponto a ponto.
+"""
+from collections import OrderedDict
+import threading
+import numpy as np
+
+from markov import MarkovNode, UniformStream, DETAIL_GAME
+
+
+def solveGameOutcomes(table, initialNode, tolerance=1e-15):
+    """
+    Calcula a distribuição conjunta exata de (vencedor, pontos de P, pontos de Q) de um game.
+
+    A massa de probabilidade é propagada ponto a ponto sobre os pares (estado, placar). Como
+    a cadeia pode ter ciclos (Deuce/AdvA/AdvB), a quantidade de resultados possíveis é
+    infinita; a propagação para quando a massa ainda em estados transientes é menor que
+    `tolerance`, e a distribuição é normalizada sobre os resultados encontrados.
+
+    Args:
+        table (`tennis.markov.TransitionTable`): Tabela de transição compilada.
+        initialNode (`MarkovNode`): Nó inicial do game.
+        tolerance (float): Massa máxima descartada no truncamento.
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                outcomes ([(bool, int, int)]): resultados possíveis, como (P venceu,
+                    pontos de P, pontos de Q), ordenados pela quantidade de pontos,
+                probabilities (np.ndarray): probabilidade de cada resultado,
+                truncatedMass (float): massa descartada no truncamento
+            }
+    """
+    (nextP, nextQ, probP, absorbing) = table.asLists()
+    mass = {(table.getStateId(initialNode.getName()), 0, 0): 1.0}
+    finished = {}
+    remaining = 1.0
+    while remaining >= tolerance:
+        step = {}
+        for (state, pPoints, qPoints), prob in mass.items():
+            for nextState, nextPoints, transitionProb in (
+                (nextP[state], (pPoints + 1, qPoints), probP[state]),
+                (nextQ[state], (pPoints, qPoints + 1), 1 - probP[state]),
+            ):
+                if transitionProb == 0:
+                    continue
+                if absorbing[nextState]:
+                    key = (bool(table.winner[nextState] == 1),) + nextPoints
+                    finished[key] = finished.get(key, 0.0) + prob * transitionProb
+                else:
+                    key = (nextState,) + nextPoints
+                    step[key] = step.get(key, 0.0) + prob * transitionProb
+        mass = step
+        remaining = sum(mass.values())
+    outcomes = sorted(finished, key=lambda outcome: (outcome[1] + outcome[2], outcome))
+    probabilities = np.array([finished[outcome] for outcome in outcomes])
+    return {
+        "outcomes": outcomes,
+        "probabilities": probabilities / probabilities.sum(),
+        "truncatedMass": remaining,
+    }
+
+
+class AliasTable:
+    """
+    Tabela de alias (método de Vose) para sortear índices de uma distribuição discreta
+    qualquer em tempo constante, com um único valor uniforme por sorteio.
+    """
+
+    __slots__ = ("_size", "_prob", "_alias")
+
+    def __init__(self, probabilities):
+        """
+        Constrói a tabela.
+
+        Args:
+            probabilities ([float]): probabilidade de cada índice. Deve somar 1.
+        """
+        size = len(probabilities)
+        scaled = [float(prob) * size for prob in probabilities]
+        prob = [1.0] * size
+        alias = list(range(size))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # Sobras de `small` ou `large` só existem por erro de arredondamento e ficam com
+        # probabilidade 1.
+        self._size = size
+        self._prob = prob
+        self._alias = alias
+
+    def __len__(self):
+        return self._size
+
+    def sample(self, uniform: float):
+        """
+        Sorteia um índice.
+
+        Args:
+            uniform (float): valor uniforme em [0, 1). A parte inteira de `uniform * n`
+                escolhe a coluna da tabela, e a parte fracionária decide entre a coluna e o
+                seu alias.
+
+        Returns:
+            int: índice sorteado.
+        """
+        scaled = uniform * self._size
+        column = int(scaled)
+        if scaled - column < self._prob[column]:
+            return column
+        return self._alias[column]
+
+    def sampleArray(self, uniform):
+        """
+        Versão vetorizada de `sample`.
+
+        Args:
+            uniform (np.ndarray): valores uniformes em [0, 1).
+
+        Returns:
+            np.ndarray: índices sorteados.
+        """
+        scaled = np.asarray(uniform) * self._size
+        column = scaled.astype(np.intp)
+        prob = np.asarray(self._prob)
+        alias = np.asarray(self._alias)
+        return np.where(scaled - column < prob[column], column, alias[column])
+
+
+class GameOutcomeSampler:
+    """
+    Distribuição exata dos resultados de um game (ver `solveGameOutcomes`) junto da sua
+    `AliasTable`. É calculada uma única vez por tabela de transição e nó inicial, através de
+    `GameOutcomeSampler.get`, e compartilhada por todos os `SampledGameGraph`.
+    """
+
+    CACHE_SIZE = 32
+    """
+    Quantidade máxima de instâncias guardadas em `_samplers`.
+    """
+
+    _samplers = OrderedDict()
+    """
+    Cache LRU de instâncias, indexado pelo fingerprint da tabela de transição (ver
+    `tennis.markov.TransitionTable.getFingerprint`) e pelo nome do nó inicial. Não guarda
+    referências às tabelas, e as instâncias menos usadas são descartadas ao atingir
+    `CACHE_SIZE`.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, table, initialNode):
+        """
+        Calcula a distribuição e constrói a tabela de alias.
+
+        Args:
+            table (`tennis.markov.TransitionTable`): Tabela de transição compilada.
+            initialNode (`MarkovNode`): Nó inicial do game.
+        """
+        solution = solveGameOutcomes(table, initialNode)
+        self._outcomes = solution["outcomes"]
+        self._probabilities = solution["probabilities"]
+        self._alias = AliasTable(self._probabilities)
+
+    @staticmethod
+    def get(table, initialNode):
+        """
+        Retorna o `GameOutcomeSampler` de uma tabela e nó inicial, calculando-o na primeira
+        chamada.
+
+        Args:
+            table (`tennis.markov.TransitionTable`): Tabela de transição compilada.
+            initialNode (`MarkovNode`): Nó inicial do game.
+
+        Returns:
+            `GameOutcomeSampler`: o sampler
+        """
+        key = (table.getFingerprint(), initialNode.getName())
+        samplers = GameOutcomeSampler._samplers
+        with GameOutcomeSampler._lock:
+            sampler = samplers.get(key)
+            if sampler is not None:
+                samplers.move_to_end(key)
+                return sampler
+        sampler = GameOutcomeSampler(table, initialNode)
+        with GameOutcomeSampler._lock:
+            samplers[key] = sampler
+            while len(samplers) > GameOutcomeSampler.CACHE_SIZE:
+                samplers.popitem(last=False)
+        return sampler
+
+    def sample(self, uniform: float):
+        """
+        Sorteia o resultado de um game.
+
+        Args:
+            uniform (float): valor uniforme em [0, 1).
+
+        Returns:
+            (bool, int, int): P venceu, pontos de P e pontos de Q.
+        """
+        return self._outcomes[self._alias.sample(uniform)]
+
+    def getOutcomes(self):
+        """
+        Returns:
+            [(bool, int, int)]: resultados possíveis, como em `solveGameOutcomes`
+        """
+        return self._outcomes
+
+    def getProbabilities(self):
+        """
+        Returns:
+            np.ndarray: probabilidade de cada resultado de `getOutcomes`
+        """
+        return self._probabilities
+
+
+class SampledGameGraph:
+    """
+    Substituto de `tennis.markov.MarkovGraph` que sorteia cada game inteiro com um único
+    valor aleatório, a partir de um `GameOutcomeSampler`. Possui a mesma interface usada por
+    `tennis.tennisClasses.TennisSet` e `tennis.tennisClasses.TennisMatch`, e os resultados de
+    sets e partidas têm a mesma distribuição dos obtidos com `MarkovGraph`. Como os pontos não
+    são simulados, o nível de detalhe é limitado a `tennis.markov.DETAIL_GAME`.
+    """
+
+    def __init__(self, initialNode, tgtSeed, table=None, detail=DETAIL_GAME):
+        """
+        Construtor da classe.
+
+        Args:
+            initialNode (`MarkovNode`): Nó inicial de cada game.
+            tgtSeed (int): Seed para o gerador de números aleatórios.
+            table (`tennis.markov.TransitionTable`): Tabela de transição compilada. Se
+                omitida, é usada a tabela de `MarkovNode.getTable`.
+            detail (int): Nível de detalhe dos resultados. Valores acima de
+                `tennis.markov.DETAIL_GAME` são tratados como `DETAIL_GAME`.
+        """
+        table = table if table is not None else MarkovNode.getTable()
+        self._sampler = GameOutcomeSampler.get(table, initialNode)
+        self._seed = tgtSeed
+        self._detail = min(detail, DETAIL_GAME)
+        self._stream = UniformStream(tgtSeed)
+        self._draws = iter(())
+        self._pWon = False
+        self._pScore = 0
+        self._qScore = 0
+
+    def simulateGame(self):
+        """
+        Sorteia o resultado de um game.
+        """
+        result = next(self._draws, None)
+        if result is None:
+            self._draws = self._stream.nextBlock()
+            result = next(self._draws)
+        (self._pWon, self._pScore, self._qScore) = self._sampler.sample(result)
+
+    def getWinner(self):
+        """
+        Retorna o vencedor do game.
+
+        Returns:
+            str: "p" se o jogador P venceu o game, "q" se o jogador Q venceu o game.
+        """
+        return "p" if self._pWon else "q"
+
+    def getScore(self):
+        """
+        Retorna os pontos de cada jogador no game.
+
+        Returns:
+            (int, int): pontos do jogador P e pontos do jogador Q.
+        """
+        return (self._pScore, self._qScore)
+
+    def getDetail(self):
+        """
+        Retorna o nível de detalhe dos resultados.
+
+        Returns:
+            int: Nível de detalhe, no máximo `tennis.markov.DETAIL_GAME`.
+        """
+        return self._detail
+
+    def getResults(self):
+        """
+        Retorna os resultados do game no formato de `tennis.markov.MarkovGraph.getResults`,
+        sem o campo ``data``.
+        """
+        return self.formatResults(self.getLog())
+
+    def getLog(self):
+        """
+        Retorna os dados do game atual no formato de `tennis.markov.MarkovGraph.getLog`,
+        sem o registro dos pontos.
+        """
+        return (self._pScore, self._qScore, None)
+
+    def formatResults(self, log: tuple):
+        """
+        Converte os dados de um game, no formato de `getLog`, para o formato de `getResults`.
+        """
+        (pScore, qScore, _) = log
+        return {
+            "gameResult": {"p": pScore, "q": qScore},
+            "gameWinner": "p" if pScore > qScore else "q",
+        }
+
+    def reset(self, tgtSeed=None):
+        """
+        Reseta o modelo para um novo game.
+
+        Args:
+            tgtSeed (int): Seed para o gerador de números aleatórios. Se omitido, o gerador
+                da instância continua a sequência atual.
+        """
+        self._pWon = False
+        self._pScore = 0
+        self._qScore = 0
+        if tgtSeed is not None:
+            self._stream.seed(tgtSeed)
+            self._draws = iter(())
+
+    def getSeed(self):
+        """
+        Retorna o seed usado para gerar os números aleatórios.
+
+        Returns:
+            int: Seed usado para gerar os números aleatórios.
+        """
+        return self._seed
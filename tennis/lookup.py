@@ -0,0 +1,224 @@
+"""
+Este arquivo define a tabela de probabilidades de vitória durante a partida, pré-calculada
+para todos os estados alcançáveis e consultada em tempo constante.
+"""
+import numpy as np
+import json
+import os
+
+from markov import solveAbsorbingChainSparse
+from tennisClasses import compileMatchChain
+
+TABLE_VERSION = 1
+"""
+Versão do formato dos arquivos de `WinProbabilityTable`.
+"""
+
+
+class WinProbabilityTable:
+    """
+    Probabilidade de P vencer a partida a partir de cada estado (nó do game, placar de games
+    do set atual, placar de sets), guardada em um vetor denso do NumPy de dimensões
+    (nós, games de P, games de Q, sets de P, sets de Q). Estados que não podem ser alcançados
+    com as regras de `tennis.tennisClasses.TennisSet` e `tennis.tennisClasses.TennisMatch`
+    valem NaN.
+
+    A tabela é calculada uma única vez por `build`, a partir da cadeia da partida inteira
+    (`tennis.tennisClasses.compileMatchChain`) resolvida por
+    `tennis.markov.solveAbsorbingChainSparse`, e pode ser salva e carregada com `save` e
+    `load`.
+    """
+
+    def __init__(self, names, values, fingerprint: str):
+        """
+        Inicializa a tabela. Normalmente não é chamado diretamente; ver `build` e `load`.
+
+        Args:
+            names ([str]): nome de cada nó do game, na ordem da primeira dimensão
+            values (np.ndarray): probabilidades, nas dimensões descritas acima
+            fingerprint (str): `tennis.markov.TransitionTable.getFingerprint` da tabela de
+                transição usada no cálculo
+        """
+        self._names = list(names)
+        self._ids = {name: i for i, name in enumerate(self._names)}
+        self._values = values
+        self._fingerprint = fingerprint
+
+    @staticmethod
+    def build(table, initialNode):
+        """
+        Calcula a tabela.
+
+        Args:
+            table (`tennis.markov.TransitionTable`): Tabela de transição de um game.
+            initialNode (`MarkovNode`): Nó inicial de cada game.
+
+        Returns:
+            `WinProbabilityTable`: a tabela
+        """
+        matchTable = compileMatchChain(table, initialNode)
+        solution = solveAbsorbingChainSparse(matchTable)
+        pColumns = [
+            column
+            for column, state in enumerate(solution["absorbing"])
+            if matchTable.winner[state] == 1
+        ]
+        pWins = solution["absorptionProbabilities"][:, pColumns].sum(axis=1)
+        keys = []
+        for state in np.flatnonzero(~matchTable.absorbing):
+            (point, games, sets) = matchTable.getName(state).split("|")
+            (gamesP, gamesQ) = (int(score) for score in games.split("-"))
+            (setsP, setsQ) = (int(score) for score in sets.split("-"))
+            keys.append((table.getStateId(point), gamesP, gamesQ, setsP, setsQ, state))
+        shape = (len(table),) + tuple(
+            max(key[i] for key in keys) + 1 for i in range(1, 5)
+        )
+        values = np.full(shape, np.nan)
+        for (point, gamesP, gamesQ, setsP, setsQ, state) in keys:
+            values[point, gamesP, gamesQ, setsP, setsQ] = pWins[state]
+        return WinProbabilityTable(table.names, values, table.getFingerprint())
+
+    @staticmethod
+    def load(path: str, mmap=True):
+        """
+        Carrega uma tabela salva por `save`.
+
+        Args:
+            path (str): caminho da tabela, sem extensão
+            mmap (bool): se True, o vetor é mapeado em memória em vez de lido por inteiro
+
+        Returns:
+            `WinProbabilityTable`: a tabela
+        """
+        with open(path + ".json", "r") as metadataFile:
+            metadata = json.loads(metadataFile.read())
+        if metadata.get("version") != TABLE_VERSION:
+            raise ValueError("Versão desconhecida da tabela em {}".format(path))
+        values = np.load(path + ".npy", mmap_mode="r" if mmap else None)
+        return WinProbabilityTable(metadata["names"], values, metadata["fingerprint"])
+
+    @staticmethod
+    def loadOrBuild(path: str, table, initialNode):
+        """
+        Carrega a tabela salva em `path` se ela tiver sido calculada a partir de `table`, ou
+        a calcula e salva caso contrário.
+
+        Args:
+            path (str): caminho da tabela, sem extensão
+            table (`tennis.markov.TransitionTable`): Tabela de transição de um game.
+            initialNode (`MarkovNode`): Nó inicial de cada game.
+
+        Returns:
+            `WinProbabilityTable`: a tabela
+        """
+        if os.path.exists(path + ".json") and os.path.exists(path + ".npy"):
+            winTable = WinProbabilityTable.load(path)
+            if winTable.getFingerprint() == table.getFingerprint():
+                return winTable
+        winTable = WinProbabilityTable.build(table, initialNode)
+        winTable.save(path)
+        return winTable
+
+    def save(self, path: str):
+        """
+        Salva a tabela em dois arquivos: `path.npy`, com o vetor de probabilidades, e
+        `path.json`, com os nomes dos nós e a identificação da tabela de transição.
+
+        Args:
+            path (str): caminho da tabela, sem extensão
+        """
+        folder = os.path.dirname(path)
+        if folder != "" and not os.path.exists(folder):
+            os.makedirs(folder)
+        np.save(path + ".npy", self._values)
+        with open(path + ".json", "w") as metadataFile:
+            metadataFile.write(
+                json.dumps(
+                    {
+                        "version": TABLE_VERSION,
+                        "names": self._names,
+                        "shape": list(self._values.shape),
+                        "fingerprint": self._fingerprint,
+                    }
+                )
+            )
+
+    def lookup(self, nodeName: str, gamesP: int, gamesQ: int, setsP: int, setsQ: int):
+        """
+        Consulta a probabilidade de P vencer a partida a partir de um estado.
+
+        Args:
+            nodeName (str): nome do nó do game, como "30-15"
+            gamesP (int): games de P no set atual
+            gamesQ (int): games de Q no set atual
+            setsP (int): sets de P
+            setsQ (int): sets de Q
+
+        Returns:
+            float: a probabilidade
+
+        Raises:
+            ValueError: se o nó não existir ou se o estado não puder ser alcançado em uma
+                partida
+        """
+        return self._lookup(
+            nodeName,
+            (gamesP, gamesQ, setsP, setsQ),
+            "{}|{}-{}|{}-{}".format(nodeName, gamesP, gamesQ, setsP, setsQ),
+        )
+
+    def lookupName(self, stateName: str):
+        """
+        Consulta a probabilidade de P vencer a partida a partir de um estado no formato de
+        `tennis.tennisClasses.compileMatchChain`, como "30-15|4-3|1-1".
+
+        Returns:
+            float: a probabilidade
+
+        Raises:
+            ValueError: se o nome não estiver nesse formato, se o nó não existir ou se o
+                estado não puder ser alcançado em uma partida
+        """
+        parts = stateName.split("|") if isinstance(stateName, str) else []
+        scores = [part.split("-") for part in parts[1:]]
+        if (
+            len(parts) != 3
+            or any(len(score) != 2 for score in scores)
+            or not all(value.isdigit() for score in scores for value in score)
+        ):
+            raise ValueError(
+                'Estado inválido "{}": o formato esperado é nó|gamesP-gamesQ|setsP-setsQ, '
+                'como "30-15|4-3|1-1"'.format(stateName)
+            )
+        return self._lookup(
+            parts[0], tuple(int(value) for score in scores for value in score), stateName
+        )
+
+    def _lookup(self, nodeName: str, scores: tuple, stateName: str):
+        if nodeName not in self._ids:
+            raise ValueError(
+                'Estado inválido "{}": nó desconhecido "{}"'.format(stateName, nodeName)
+            )
+        index = (self._ids[nodeName],) + scores
+        if min(index) < 0 or any(
+            value >= size for value, size in zip(index, self._values.shape)
+        ):
+            raise ValueError('Estado inalcançável: "{}"'.format(stateName))
+        value = float(self._values[index])
+        if value != value:
+            raise ValueError('Estado inalcançável: "{}"'.format(stateName))
+        return value
+
+    def getValues(self):
+        """
+        Returns:
+            np.ndarray: o vetor de probabilidades
+        """
+        return self._values
+
+    def getFingerprint(self):
+        """
+        Returns:
+            str: identificação da tabela de transição usada no cálculo
+        """
+        return self._fingerprint
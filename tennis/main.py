@@ -3,18 +3,33 @@ main.py
 ====================================
 O módulo principal do projeto
 """
-from utils import getSeedFromTime, mean, dp
-from markov import MarkovGraph, MarkovNode
-from tennisClasses import TennisMatch
+from utils import getSeedFromTime, spawnSeeds
+from markov import (
+    MarkovGraph,
+    MarkovNode,
+    checkProbabilities,
+    solveGame,
+    solveAbsorbingChainSparse,
+    DETAIL_LEVELS,
+    DETAIL_POINT,
+)
+from tennisClasses import TennisMatch, solveMatch, compileMatchChain, solveMatchCurve
 
-import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 import csv
 
 import os
+import sys
 import json
+import pickle
 import argparse
+from functools import partial
+from time import perf_counter
+
+STATE_CACHE_VERSION = 1
+"""
+Versão do formato do cache de `loadStateTable`. Caches de outras versões são descartados.
+"""
 
 
 def loadData(path: str):
@@ -52,15 +67,131 @@ def loadData(path: str):
     return data
 
 
-def mainSimulate(simulationCount: int):
+def validateData(data: dict):
     """
-    Carrega os dados, constrói a cadeia de Markov e simula um jogo de tênis.
+    Verifica os dados carregados por `loadData`: cada nó deve ter os dois nós seguintes ou
+    nenhum (nós finais), os nós seguintes devem existir e as probabilidades informadas devem
+    ser números entre 0 e 1.
 
     Args:
-        simulationCount (int): Quantidade de partidas a serem simuladas.
+        data (dict): dados no formato de `loadData`
+
+    Raises:
+        ValueError: se os dados forem inválidos
+    """
+    for name, row in data.items():
+        if (row["nodeP"] is None) != (row["nodeQ"] is None):
+            raise ValueError("O nó {} deve ter os dois nós seguintes ou nenhum".format(name))
+        for key in ("nodeP", "nodeQ"):
+            if row[key] is not None and row[key] not in data:
+                raise ValueError(
+                    "O nó {} referencia o nó inexistente {}".format(name, row[key])
+                )
+        for key in ("probP", "probQ"):
+            if row[key] == "":
+                continue
+            try:
+                value = float(row[key])
+            except ValueError:
+                value = None
+            if value is None or not 0 <= value <= 1:
+                raise ValueError(
+                    "Probabilidade inválida no nó {}: {}".format(name, row[key])
+                )
+
+
+def validateTilt(tilt, nodeNames):
+    """
+    Verifica a probabilidade de ponto alterada de `--tilt`, no formato de
+    `rare.estimateRareEvent`: um número, ou um dicionário de nós para números. Para que o
+    estimador continue não enviesado, cada probabilidade deve estar estritamente entre 0 e 1.
+
+    Args:
+        tilt (float | dict): valor lido de `--tilt`
+        nodeNames ([str]): nomes dos nós da cadeia
+
+    Raises:
+        ValueError: se o valor for inválido
+    """
+    values = tilt.items() if isinstance(tilt, dict) else [(None, tilt)]
+    if not values:
+        raise ValueError("o dicionário deve informar ao menos um nó")
+    for name, value in values:
+        if name is not None and name not in nodeNames:
+            raise ValueError("nó desconhecido {}".format(name))
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or not 0 < value < 1
+        ):
+            raise ValueError(
+                "a probabilidade deve ser um número estritamente entre 0 e 1: {}".format(
+                    json.dumps(value)
+                )
+            )
+
+
+def getStateCachePath(path: str):
+    """
+    Returns:
+        str: caminho do cache de `loadStateTable` para o arquivo CSV em `path`, um arquivo
+            oculto na mesma pasta
+    """
+    (folder, name) = os.path.split(path)
+    return os.path.join(folder, ".{}.cache".format(name))
+
+
+def loadStateTable(path: str):
+    """
+    Carrega e valida os dados de um arquivo CSV com `loadData` e `validateData`, guardando o
+    resultado em um cache binário (ver `getStateCachePath`). O cache é identificado pela
+    data de modificação e pelo tamanho do CSV, e é refeito sempre que o CSV muda. Se o cache
+    não puder ser lido ou escrito, os dados são lidos diretamente do CSV.
+
+    Args:
+        path (str): Caminho para o arquivo CSV, no formato descrito em `loadData`.
 
+    Returns:
+        dict: dados no formato de `loadData`
     """
-    data = loadData("tennis/stateList.csv")
+    stat = os.stat(path)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    cachePath = getStateCachePath(path)
+    try:
+        with open(cachePath, "rb") as cacheFile:
+            cached = pickle.load(cacheFile)
+        if cached["version"] == STATE_CACHE_VERSION and cached["signature"] == signature:
+            return cached["data"]
+    except Exception:
+        # Cache ausente, corrompido ou de outro formato: é refeito a partir do CSV.
+        pass
+    data = loadData(path)
+    validateData(data)
+    try:
+        temporaryPath = cachePath + ".tmp"
+        with open(temporaryPath, "wb") as cacheFile:
+            pickle.dump(
+                {"version": STATE_CACHE_VERSION, "signature": signature, "data": data},
+                cacheFile,
+            )
+        os.replace(temporaryPath, cachePath)
+    except OSError:
+        pass
+    return data
+
+
+def buildChain(path: str):
+    """
+    Carrega os dados de um arquivo CSV com `loadStateTable`, cria os nós de `MarkovNode` e
+    compila a cadeia.
+
+    Args:
+        path (str): Caminho para o arquivo CSV, no formato descrito em `loadData`.
+
+    Returns:
+        `tennis.markov.TransitionTable`: A tabela de transição compilada.
+    """
+    data = loadStateTable(path)
     for key in data:
         MarkovNode(
             key,
@@ -70,158 +201,700 @@ def mainSimulate(simulationCount: int):
             data[key]["nodeQ"],
         )
     MarkovNode.populateNodes()
+    return MarkovNode.getTable()
+
+
+def initWorker(statePath: str):
+    """
+    Inicializa um processo de simulação, construindo a cadeia de Markov localmente.
+
+    Args:
+        statePath (str): Caminho para o arquivo CSV da cadeia.
+    """
+    buildChain(statePath)
+
+
+def simulateMatch(matchSeed: int, detail=DETAIL_POINT, hierarchical=False, rows=False):
+    """
+    Simula uma partida completa com um seed próprio. Pode ser executada em qualquer processo
+    inicializado por `initWorker`.
+
+    Args:
+        matchSeed (int): Seed do gerador de números aleatórios da partida.
+        detail (int): Nível de detalhe dos resultados, como `markov.DETAIL_POINT`.
+        hierarchical (bool): Se True, cada game é sorteado de uma só vez por
+            `hierarchical.SampledGameGraph`, e o nível de detalhe é limitado a
+            `markov.DETAIL_GAME`.
+        rows (bool): Se True, retorna a partida no formato de `TennisMatch.toRows`, usado
+            pelo formato de saída colunar, em vez de `TennisMatch.toJSON`.
+
+    Returns:
+        dict: Os dados da partida, no formato de `TennisMatch.toJSON` ou de
+            `TennisMatch.toRows`.
+    """
+    if hierarchical:
+        from hierarchical import SampledGameGraph
+
+        graphClass = SampledGameGraph
+    else:
+        graphClass = MarkovGraph
+    graph = graphClass(MarkovNode.getNodeById("0-0"), matchSeed, detail=detail)
+    match = TennisMatch(graph)
+    match.simulate()
+    if rows:
+        return match.toRows()
+    return match.toJSON()
+
+
+def mainSimulate(
+    simulationCount: int,
+    useBatch=False,
+    workers=1,
+    masterSeed=None,
+    outputFormat="files",
+    outputPath=os.path.join("results", "matches"),
+    shardBytes=None,
+    shardRecords=None,
+    detail=DETAIL_POINT,
+    hierarchical=False,
+    flat=False,
+    precision=None,
+    precisionTarget="winrate",
+    confidence=0.95,
+    queueSize=None,
+):
+    """
+    Carrega os dados, constrói a cadeia de Markov e simula um jogo de tênis.
+
+    Cada partida recebe um seed derivado do seed mestre por `utils.spawnSeeds`, e os
+    resultados são escritos na ordem das partidas, de modo que os arquivos gerados são
+    idênticos para qualquer quantidade de processos.
+
+    Args:
+        simulationCount (int): Quantidade de partidas a serem simuladas.
+        useBatch (bool): Se True, simula todas as partidas de uma vez usando o motor
+            vetorizado de `batch.BatchGameEngine`, sem gerar os dados ponto a ponto.
+        workers (int): Quantidade de processos usados para simular as partidas.
+        masterSeed (int): Seed mestre. Se omitido, é derivado do tempo atual.
+        outputFormat (str): Formato de saída, "files", "jsonl" ou "columnar" (ver
+            `sinks.createSink`).
+        outputPath (str): Pasta onde os resultados são escritos.
+        shardBytes (int): Tamanho máximo de cada shard, em bytes.
+        shardRecords (int): Quantidade máxima de partidas por shard.
+        detail (int): Nível de detalhe dos resultados, como `markov.DETAIL_POINT`.
+        hierarchical (bool): Se True, sorteia cada game de uma só vez a partir da
+            distribuição exata dos seus resultados (ver `hierarchical.SampledGameGraph`).
+        flat (bool): Se True, junto de `useBatch`, simula as partidas sobre a cadeia da
+            partida inteira (ver `tennisClasses.compileMatchChain`).
+        precision (float): Se informada, ignora `simulationCount` e simula em lotes até que
+            a metade da largura do intervalo de confiança de `precisionTarget` seja no máximo
+            esse valor (ver `mainSimulateAdaptive`).
+        precisionTarget (str): Estatística usada como critério de parada.
+        confidence (float): Nível de confiança do intervalo.
+        queueSize (int): Se informado, a serialização e a escrita são feitas em uma thread
+            separada, com uma fila limitada a este tamanho (ver `sinks.BackgroundSink`).
+    """
+    statePath = "tennis/stateList.csv"
+    buildChain(statePath)
     initialNode = MarkovNode.getNodeById("0-0")
-    for i in range(0, simulationCount):
-        simTime = getSeedFromTime(i + 1)
-        print("Simulating game with seed {}".format(simTime))
-        graph = MarkovGraph(initialNode, simTime)
-        match = TennisMatch(graph)
-        match.simulate(True)
+    if masterSeed is None:
+        masterSeed = getSeedFromTime(1)
+    if precision is not None:
+        mainSimulateAdaptive(
+            initialNode, precisionTarget, precision, confidence, masterSeed
+        )
+        return
+    if useBatch:
+        if flat:
+            mainSimulateFlat(initialNode, simulationCount, masterSeed)
+        else:
+            mainSimulateBatch(initialNode, simulationCount, masterSeed)
+        return
+    from sinks import createSink
+
+    print("Simulating {} matches with master seed {}".format(simulationCount, masterSeed))
+    seeds = spawnSeeds(masterSeed, simulationCount)
+    simulate = partial(
+        simulateMatch,
+        detail=detail,
+        hierarchical=hierarchical,
+        rows=outputFormat == "columnar",
+    )
+    try:
+        sink = createSink(
+            outputFormat,
+            outputPath,
+            shardBytes,
+            shardRecords,
+            MarkovNode.getTable(),
+            queueSize,
+        )
+    except ValueError as error:
+        print(error)
+        exit(1)
+    with sink:
+        if workers > 1:
+            from multiprocessing import Pool
+
+            with Pool(workers, initializer=initWorker, initargs=(statePath,)) as pool:
+                chunkSize = max(1, simulationCount // (workers * 8))
+                for i, record in enumerate(pool.imap(simulate, seeds, chunkSize)):
+                    print("Simulating game with seed {}".format(seeds[i]))
+                    sink.write(record)
+        else:
+            for matchSeed in seeds:
+                print("Simulating game with seed {}".format(matchSeed))
+                sink.write(simulate(matchSeed))
 
 
-def generateStats(datasetPath: str, shouldShowGraphs: bool):
+def mainSimulateBatch(initialNode, simulationCount: int, simTime: int):
     """
-    Analisa os resultados de uma partida armazenados em um dataset.
+    Simula um lote de partidas com o motor vetorizado e exibe um resumo dos resultados.
+
+    Args:
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+        simulationCount (int): Quantidade de partidas a serem simuladas.
+        simTime (int): Seed do gerador de números aleatórios.
+    """
+    from batch import BatchGameEngine
+
+    print("Simulating {} matches in batch with seed {}".format(simulationCount, simTime))
+    engine = BatchGameEngine(initialNode, simTime)
+    results = TennisMatch.simulateBatch(engine, simulationCount)
+    pWins = int(np.count_nonzero(results["winner"]))
+    print(
+        "p ganha {} de {} partidas, {}%".format(
+            pWins, simulationCount, pWins / simulationCount * 100
+        )
+    )
+    print("media de pontos de P por partida = {}".format(results["pPoints"].mean()))
+    print("media de pontos de Q por partida = {}".format(results["qPoints"].mean()))
+    print("media de games de P por partida = {}".format(results["gamesP"].mean()))
+    print("media de games de Q por partida = {}".format(results["gamesQ"].mean()))
+
+
+def mainSimulateFlat(initialNode, simulationCount: int, simTime: int):
+    """
+    Simula um lote de partidas com o motor vetorizado sobre a cadeia da partida inteira,
+    gerada por `tennisClasses.compileMatchChain`, e exibe um resumo dos resultados.
+
+    Args:
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+        simulationCount (int): Quantidade de partidas a serem simuladas.
+        simTime (int): Seed do gerador de números aleatórios.
+    """
+    from batch import BatchGameEngine
+
+    print(
+        "Simulating {} matches in batch on the flattened chain with seed {}".format(
+            simulationCount, simTime
+        )
+    )
+    matchTable = compileMatchChain(MarkovNode.getTable(), initialNode)
+    engine = BatchGameEngine(
+        "{}|0-0|0-0".format(initialNode.getName()), simTime, matchTable
+    )
+    results = engine.simulateGames(simulationCount)
+    pWins = int(np.count_nonzero(results["winner"]))
+    print(
+        "p ganha {} de {} partidas, {}%".format(
+            pWins, simulationCount, pWins / simulationCount * 100
+        )
+    )
+    print("media de pontos de P por partida = {}".format(results["pPoints"].mean()))
+    print("media de pontos de Q por partida = {}".format(results["qPoints"].mean()))
+    finalStates = np.bincount(results["state"], minlength=len(matchTable))
+    for state in np.flatnonzero(finalStates):
+        print(
+            "    {}: {} partidas".format(matchTable.getName(state), finalStates[state])
+        )
+
+
+def mainSimulateAdaptive(
+    initialNode, target: str, halfWidth: float, confidence: float, simTime: int
+):
+    """
+    Simula partidas em lote até que o intervalo de confiança de `target` atinja a precisão
+    desejada, com `adaptive.simulateUntilPrecision`, e exibe o intervalo obtido.
+
+    Args:
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+        target (str): estatística de parada, uma das chaves de `adaptive.ADAPTIVE_TARGETS`.
+        halfWidth (float): metade da largura desejada do intervalo de confiança.
+        confidence (float): nível de confiança do intervalo.
+        simTime (int): Seed do gerador de números aleatórios.
+    """
+    from batch import BatchGameEngine
+    from adaptive import simulateUntilPrecision
+
+    print(
+        "Simulating until {} is within ±{} ({:.0%} confidence) with seed {}".format(
+            target, halfWidth, confidence, simTime
+        )
+    )
+    startTime = perf_counter()
+    result = simulateUntilPrecision(
+        BatchGameEngine(initialNode, simTime), target, halfWidth, confidence
+    )
+    elapsed = perf_counter() - startTime
+    print(
+        "{} = {} ± {} [{}, {}]".format(
+            target, result["mean"], result["halfWidth"], result["low"], result["high"]
+        )
+    )
+    print(
+        "{} partidas em {} lotes, {:.3f} s".format(
+            result["matches"], result["batches"], elapsed
+        )
+    )
+    if not result["converged"]:
+        print("limite de partidas atingido antes da precisão desejada")
+
+
+def mainExact(flat=False):
+    """
+    Carrega os dados, constrói a cadeia de Markov e exibe os valores exatos de um game,
+    calculados com `tennis.markov.solveGame`, e de um set e uma partida, calculados com
+    `tennis.tennisClasses.solveMatch`, sem simular nenhuma partida.
+
+    Args:
+        flat (bool): Se True, também resolve a cadeia da partida inteira (ver
+            `tennisClasses.compileMatchChain`) com `markov.solveAbsorbingChainSparse`.
+    """
+    startTime = perf_counter()
+    table = buildChain("tennis/stateList.csv")
+    result = solveGame(table, MarkovNode.getNodeById("0-0"))
+    matchResult = solveMatch(result["pWins"])
+    elapsed = (perf_counter() - startTime) * 1000
+
+    print("probabilidade de P vencer um game: {}".format(result["pWins"]))
+    print("probabilidade de Q vencer um game: {}".format(result["qWins"]))
+    print("em média, cada game tem {} pontos".format(result["expectedPoints"]))
+    print("tempo esperado até o fim do game a partir de cada estado:")
+    for name, state in result["states"].items():
+        print(
+            "    {}: {} pontos, P vence com probabilidade {}".format(
+                name, state["expectedPoints"], state["pWins"]
+            )
+        )
+    print("probabilidade de P vencer um set: {}".format(matchResult["set"]["pWins"]))
+    print("probabilidade de Q vencer um set: {}".format(matchResult["set"]["qWins"]))
+    print("distribuição dos placares finais de um set:")
+    for score, prob in sorted(matchResult["set"]["scores"].items()):
+        print("    {}: {}".format(score, prob))
+    print("probabilidade de P vencer a partida: {}".format(matchResult["pWins"]))
+    print("probabilidade de Q vencer a partida: {}".format(matchResult["qWins"]))
+    print("distribuição dos placares finais de uma partida:")
+    for score, prob in sorted(matchResult["scores"].items()):
+        print("    {}: {}".format(score, prob))
+    print("calculado em {:.3f} ms".format(elapsed))
+    if flat:
+        mainExactFlat(table, MarkovNode.getNodeById("0-0"))
+
+
+def mainExactFlat(table, initialNode):
+    """
+    Compila a cadeia da partida inteira e exibe os valores exatos calculados sobre ela.
+
+    Args:
+        table (`tennis.markov.TransitionTable`): Tabela de transição de um game.
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+    """
+    startTime = perf_counter()
+    matchTable = compileMatchChain(table, initialNode)
+    solution = solveAbsorbingChainSparse(matchTable)
+    elapsed = (perf_counter() - startTime) * 1000
+    initialState = matchTable.getStateId("{}|0-0|0-0".format(initialNode.getName()))
+    absorption = solution["absorptionProbabilities"][initialState]
+    print(
+        "cadeia da partida inteira: {} estados, {} componentes".format(
+            len(matchTable), solution["components"]
+        )
+    )
+    for column, state in enumerate(solution["absorbing"]):
+        print("    {}: {}".format(matchTable.getName(state), absorption[column]))
+    pWins = sum(
+        absorption[column]
+        for column, state in enumerate(solution["absorbing"])
+        if matchTable.winner[state] == 1
+    )
+    print("probabilidade de P vencer a partida: {}".format(pWins))
+    print(
+        "em média, cada partida tem {} pontos".format(
+            solution["expectedSteps"][initialState]
+        )
+    )
+    print("calculado em {:.3f} ms".format(elapsed))
+
+
+def mainSweep(
+    configs,
+    simulationCount: int,
+    workers=1,
+    masterSeed=None,
+    cachePath=os.path.join("results", "cache"),
+):
+    """
+    Executa uma varredura de parâmetros com `sweep.runSweep` e exibe a tabela de resultados.
+
+    Args:
+        configs ([float | dict]): configurações, como em `sweep.loadSweepFile`.
+        simulationCount (int): Quantidade de partidas simuladas por configuração.
+        workers (int): Quantidade de processos.
+        masterSeed (int): Seed usado em todas as configurações. Se omitido, é usado 0, para
+            que os resultados possam ser reaproveitados do cache.
+        cachePath (str): Pasta do cache de resultados.
+    """
+    from sweep import runSweep, formatSweepTable
+
+    statePath = "tennis/stateList.csv"
+    buildChain(statePath)
+    if masterSeed is None:
+        masterSeed = 0
+    print(
+        "Sweeping {} configurations, {} matches each, with seed {}".format(
+            len(configs), simulationCount, masterSeed
+        )
+    )
+    startTime = perf_counter()
+    results = runSweep(
+        configs,
+        "0-0",
+        simulationCount,
+        masterSeed,
+        workers,
+        cachePath,
+        initializer=initWorker,
+        initargs=(statePath,),
+    )
+    elapsed = perf_counter() - startTime
+    print(formatSweepTable(results))
+    cached = sum(1 for result in results if result["cached"])
+    print(
+        "{} configurações do cache, {} calculadas, em {:.3f} s".format(
+            cached, len(results) - cached, elapsed
+        )
+    )
+
+
+def mainCurve(probs, outputPath=None):
+    """
+    Calcula de uma só vez, com `tennisClasses.solveMatchCurve`, as probabilidades exatas de P
+    vencer um game, um set e uma partida (e as suas derivadas) para cada probabilidade de P
+    vencer um ponto. Os resultados são exibidos em uma tabela ou, se `outputPath` for
+    informado, salvos em um arquivo `.npz` com um vetor por coluna.
+
+    Args:
+        probs ([float]): probabilidades de P vencer um ponto.
+        outputPath (str): Caminho do arquivo `.npz` de saída.
+    """
+    table = buildChain("tennis/stateList.csv")
+    probs = np.asarray(probs, dtype=float)
+    startTime = perf_counter()
+    curve = solveMatchCurve(table, MarkovNode.getNodeById("0-0"), probs)
+    elapsed = (perf_counter() - startTime) * 1000
+    columns = ("game", "set", "match", "dGame", "dSet", "dMatch")
+    if outputPath is not None:
+        np.savez(outputPath, p=probs, **{name: curve[name] for name in columns})
+        print("curva salva em {}".format(outputPath))
+    else:
+        print("p " + " ".join(columns))
+        for i, prob in enumerate(probs):
+            print(
+                "{} {}".format(
+                    prob, " ".join("{:.6f}".format(curve[name][i]) for name in columns)
+                )
+            )
+    print("{} pontos calculados em {:.3f} ms".format(probs.size, elapsed))
+
+
+def mainLookup(stateNames, tablePath=os.path.join("results", "winProbability")):
+    """
+    Consulta a probabilidade de P vencer a partida a partir de estados no meio da partida,
+    usando a tabela de `lookup.WinProbabilityTable`, que é calculada e salva em `tablePath`
+    na primeira execução.
+
+    Args:
+        stateNames ([str]): estados no formato "30-15|4-3|1-1" (nó do game, games e sets).
+        tablePath (str): Caminho da tabela, sem extensão.
+    """
+    from lookup import WinProbabilityTable
+
+    table = buildChain("tennis/stateList.csv")
+    startTime = perf_counter()
+    winTable = WinProbabilityTable.loadOrBuild(
+        tablePath, table, MarkovNode.getNodeById("0-0")
+    )
+    elapsed = (perf_counter() - startTime) * 1000
+    print("tabela {} carregada em {:.3f} ms".format(tablePath, elapsed))
+    for stateName in stateNames:
+        try:
+            print(
+                "{}: P vence com probabilidade {}".format(
+                    stateName, winTable.lookupName(stateName)
+                )
+            )
+        except ValueError as error:
+            print(error)
+
+
+def mainCompare(
+    probs,
+    simulationCount: int,
+    commonRandomNumbers=True,
+    antithetic=False,
+    workers=1,
+    masterSeed=None,
+):
+    """
+    Compara duas configurações da probabilidade de P vencer um ponto com
+    `variance.compareConfigs` e exibe as diferenças estimadas e o ganho de tamanho efetivo de
+    amostra obtido com a redução de variância.
+
+    Args:
+        probs ((float, float)): probabilidades das configurações A e B.
+        simulationCount (int): Quantidade de partidas por configuração.
+        commonRandomNumbers (bool): Usa os mesmos números aleatórios nas duas configurações.
+        antithetic (bool): Usa pares de partidas antitéticas.
+        workers (int): Quantidade de processos.
+        masterSeed (int): Seed mestre. Se omitido, é derivado do tempo atual.
+    """
+    from variance import compareConfigs
+
+    statePath = "tennis/stateList.csv"
+    buildChain(statePath)
+    if masterSeed is None:
+        masterSeed = getSeedFromTime(1)
+    print(
+        "Comparing p={} and p={} with {} matches each, common random numbers: {}, antithetic: {}, master seed {}".format(
+            probs[0], probs[1], simulationCount, commonRandomNumbers, antithetic, masterSeed
+        )
+    )
+    startTime = perf_counter()
+    report = compareConfigs(
+        probs,
+        simulationCount,
+        masterSeed,
+        commonRandomNumbers,
+        antithetic,
+        workers,
+        initializer=initWorker,
+        initargs=(statePath,),
+    )
+    elapsed = perf_counter() - startTime
+    for name, result in report.items():
+        print(
+            "{}: A = {}, B = {}, A - B = {} ± {} (erro padrão)".format(
+                name, result["a"], result["b"], result["difference"], result["standardError"]
+            )
+        )
+        print(
+            "    erro padrão com execuções independentes = {}, ganho de tamanho efetivo de amostra = {:.2f}x ({:.0f} partidas)".format(
+                result["independentStandardError"],
+                result["essGain"],
+                result["effectiveSampleSize"],
+            )
+        )
+    print("calculado em {:.3f} s".format(elapsed))
+
+
+def mainRare(
+    event: str,
+    simulationCount: int,
+    tiltedProbP=None,
+    probP=None,
+    longGamePoints=30,
+    masterSeed=None,
+):
+    """
+    Estima a probabilidade de um evento raro com `rare.estimateRareEvent` e exibe a
+    estimativa, o seu erro padrão e a comparação com a simulação direta.
+
+    Args:
+        event (str): evento, uma das chaves de `rare.RARE_EVENTS`.
+        simulationCount (int): Quantidade de partidas simuladas.
+        tiltedProbP (float | dict): probabilidade de ponto usada na simulação. Se omitida, é
+            usada a sugestão de `rare.getDefaultTilt`.
+        probP (float): probabilidade real de P vencer um ponto. Se omitida, é usada a da
+            cadeia (`markov.overridenProbabilityP`).
+        longGamePoints (int): pontos a partir dos quais um game é considerado longo.
+        masterSeed (int): Seed do gerador de números aleatórios.
+    """
+    from rare import estimateRareEvent, getDefaultTilt
+
+    buildChain("tennis/stateList.csv")
+    table = MarkovNode.compile(probP)
+    initialNode = MarkovNode.getNodeById("0-0")
+    if tiltedProbP is None:
+        tiltedProbP = getDefaultTilt(event, table, initialNode)
+    if masterSeed is None:
+        masterSeed = getSeedFromTime(1)
+    print(
+        "Estimating {} with {} matches under tilted p {} and seed {}".format(
+            event, simulationCount, tiltedProbP, masterSeed
+        )
+    )
+    startTime = perf_counter()
+    result = estimateRareEvent(
+        initialNode,
+        event,
+        simulationCount,
+        masterSeed,
+        tiltedProbP,
+        table,
+        longGamePoints,
+    )
+    elapsed = perf_counter() - startTime
+    print(
+        "probabilidade de {} = {} ± {} (erro padrão), intervalo de 95%: [{}, {}]".format(
+            event,
+            result["estimate"],
+            result["standardError"],
+            result["estimate"] - 1.96 * result["standardError"],
+            result["estimate"] + 1.96 * result["standardError"],
+        )
+    )
+    print(
+        "    erro padrão da simulação direta = {}, redução de variância = {:.2f}x".format(
+            result["naiveStandardError"], result["varianceReduction"]
+        )
+    )
+    print(
+        "    evento ocorreu em {} de {} partidas simuladas, tamanho efetivo de amostra dos pesos = {:.0f}".format(
+            result["hits"], result["matches"], result["effectiveSampleSize"]
+        )
+    )
+    print("calculado em {:.3f} s".format(elapsed))
+
+
+def mainServe(workers=1, cacheSize=256):
+    """
+    Constrói a cadeia de Markov uma única vez e responde a consultas em JSON Lines pela
+    entrada e saída padrão com `server.QueryServer`, até o fim da entrada. As mensagens do
+    servidor são escritas na saída de erro, para não se misturarem às respostas.
+
+    Args:
+        workers (int): Quantidade de threads que respondem às consultas.
+        cacheSize (int): Quantidade máxima de resultados em cache.
+    """
+    from server import QueryServer
+
+    startTime = perf_counter()
+    buildChain("tennis/stateList.csv")
+    server = QueryServer("0-0", workers, cacheSize)
+    print(
+        "servidor pronto em {:.3f} ms, {} threads, cache de {} resultados".format(
+            (perf_counter() - startTime) * 1000, workers, cacheSize
+        ),
+        file=sys.stderr,
+    )
+    server.serve(sys.stdin, sys.stdout)
+    print(json.dumps(server.getMetrics()), file=sys.stderr)
+
+
+def generateStats(datasetPath: str, shouldShowGraphs: bool, workers=1, useIndex=True):
+    """
+    Analisa os resultados de uma partida armazenados em um dataset. As partidas são
+    consumidas uma de cada vez por um `analysis.MatchStatsAggregator`, em uma única passada
+    e com memória constante. Com mais de um processo, cada arquivo do dataset é analisado
+    separadamente e os resultados parciais são combinados (ver `analysis.aggregateDataset`).
 
     Args:
         datasetPath (str): Caminho para o dataset a ser analisado.
         shouldShowGraphs (bool): Se True, gera gráficos dos resultados.
+        workers (int): Quantidade de processos usados na análise.
+        useIndex (bool): Se True, reaproveita e atualiza o índice de análise guardado na
+            pasta do dataset (ver `analysis.AnalysisIndex`), lendo apenas arquivos novos ou
+            alterados.
     """
-    datasetFiles = os.listdir(datasetPath)
-    dataset = []
-    for file in datasetFiles:
-        with open(os.path.join(datasetPath, file), "r") as inputFile:
-            data = json.loads(inputFile.read())
-            dataset.append(data)
-
-    rands = []
-    setCount = 0
-    setCountPerGameForP = []
-    setCountPerGameForQ = []
-    gameCount = 0
-    gameCountForP = []
-    gameCountForQ = []
-    pointCount = 0
-    pointCountForP = []
-    pointCountForQ = []
-    pWinsMatch = list(filter(lambda x: x["matchResult"]["winner"] == "p", dataset))
-
-    splitGames = []
-
-    for i in range(0, len(dataset), 3):
-        splitGames.append(dataset[i : i + 3])
-
-    print(splitGames[0][0]["matchResult"]["winner"])
-    pGroupWinsData = []
-    qGroupWinsData = []
-    for threeGames in splitGames:
-        p = 0
-        q = 0
-        for singleGame in threeGames:
-            if singleGame["matchResult"]["winner"] == "p":
-                p += 1
-            else:
-                q += 1
-        pGroupWinsData.append(p)
-        qGroupWinsData.append(q)
-
-    print("P wins mean = {}".format(mean(pGroupWinsData)))
-    print("Q wins mean = {}".format(mean(qGroupWinsData)))
-
-    print("P wins dp = {}".format(dp(pGroupWinsData)))
-    print("Q wins dp = {}".format(dp(qGroupWinsData)))
-
-    for match in dataset:
-        pSet = 0
-        qSet = 0
-        pGame = 0
-        qGame = 0
-        pPoint = 0
-        qPoint = 0
-        for setData in match["matchData"]:
-            setCount += 1
-            if setData["setResult"]["winner"] == "p":
-                pSet += 1
-            else:
-                qSet += 1
-            for gameData in setData["setData"]:
-                gameCount += 1
-                if gameData["gameWinner"] == "p":
-                    pGame += 1
-                else:
-                    qGame += 1
-                pointCount += len(gameData["gameData"])
-                for point in gameData["gameData"]:
-                    if point["scorer"] == "p":
-                        pPoint += 1
-                    else:
-                        qPoint += 1
-                    rands.append(point["resultValue"])
-        setCountPerGameForP.append(pSet)
-        setCountPerGameForQ.append(qSet)
-        gameCountForP.append(pGame)
-        gameCountForQ.append(qGame)
-        pointCountForP.append(pPoint)
-        pointCountForQ.append(qPoint)
-
-    print("media de pontos de P por partida = {}".format(mean(pointCountForP)))
-    print("media de pontos de Q por partida = {}".format(mean(pointCountForQ)))
-
-    print("dp de pontos de P por partida = {}".format(dp(pointCountForP)))
-    print("dp de pontos de Q por partida = {}".format(dp(pointCountForQ)))
-
-    print("media de sets de P por partida = {}".format(mean(setCountPerGameForP)))
-    print("media de sets de Q por partida = {}".format(mean(setCountPerGameForQ)))
-
-    print("dp de sets de P por partida = {}".format(dp(setCountPerGameForP)))
-    print("dp de sets de Q por partida = {}".format(dp(setCountPerGameForQ)))
-
-    print("media de games de P por partida = {}".format(mean(gameCountForP)))
-    print("media de games de Q por partida = {}".format(mean(gameCountForQ)))
-
-    print("dp de games de P por partida = {}".format(dp(gameCountForP)))
-    print("dp de games de Q por partida = {}".format(dp(gameCountForQ)))
+    from analysis import aggregateDataset
+
+    try:
+        aggregator = aggregateDataset(datasetPath, workers, useIndex)
+    except ValueError as error:
+        print(error)
+        exit(1)
+    printStats(aggregator)
+    if shouldShowGraphs and aggregator.getMatchCount() > 0:
+        showStatsGraphs(aggregator)
+
+
+def printStats(aggregator):
+    """
+    Exibe o relatório da análise de um dataset.
+
+    Args:
+        aggregator (`analysis.MatchStatsAggregator`): Valores acumulados do dataset.
+    """
+    matchCount = aggregator.getMatchCount()
+    if matchCount == 0:
+        print("nenhuma partida encontrada no dataset")
+        return
+    pWins = aggregator.getPWins()
+    setCount = aggregator.getTotal("setsP") + aggregator.getTotal("setsQ")
+    gameCount = aggregator.getTotal("gamesP") + aggregator.getTotal("gamesQ")
+    pointCount = aggregator.getTotal("pointsP") + aggregator.getTotal("pointsQ")
+    (pGroupWins, qGroupWins) = aggregator.getGroupStats()
+    draws = aggregator.getDraws()
+
+    print(aggregator.getFirstWinner())
+
+    print("P wins mean = {}".format(pGroupWins.getMean()))
+    print("Q wins mean = {}".format(qGroupWins.getMean()))
+
+    print("P wins dp = {}".format(pGroupWins.getDP()))
+    print("Q wins dp = {}".format(qGroupWins.getDP()))
+
+    for name, label in (("points", "pontos"), ("sets", "sets"), ("games", "games")):
+        statsP = aggregator.getStats(name + "P")
+        statsQ = aggregator.getStats(name + "Q")
+        print("media de {} de P por partida = {}".format(label, statsP.getMean()))
+        print("media de {} de Q por partida = {}".format(label, statsQ.getMean()))
+
+        print("dp de {} de P por partida = {}".format(label, statsP.getDP()))
+        print("dp de {} de Q por partida = {}".format(label, statsQ.getDP()))
 
     print("total de sets: {}".format(setCount))
     print("total de jogos: {}".format(gameCount))
     print("total de pontos: {}".format(pointCount))
 
-    med = sum(rands) / len(rands)
-    print("media dos numeros sorteados: {}".format(med))
+    if draws.getCount() > 0:
+        print("media dos numeros sorteados: {}".format(draws.getMean()))
     print(
         "p ganha em média {} de {} partidas, {}%".format(
-            len(pWinsMatch), len(dataset), len(pWinsMatch) / len(dataset) * 100
+            pWins, matchCount, pWins / matchCount * 100
         )
     )
-    randomValsDP = (sum(list(map(lambda x: (x - med) ** 2, rands))) / len(rands)) ** 0.5
-    print("desvio padrão dos numeros sorteados: {}".format(randomValsDP))
+    if draws.getCount() > 0:
+        print("desvio padrão dos numeros sorteados: {}".format(draws.getDP()))
     print("em média, cada partida tem {} pontos".format(pointCount / setCount))
     print("em média, cada jogo tem {} pontos".format(pointCount / gameCount))
     print("em média, cada set tem {} jogos".format(gameCount / setCount))
 
-    if not shouldShowGraphs:
-        return
 
-    fig1, ax1 = plt.subplots(1, 2)
-    ax1[0].set_title("Distribuição dos pontos de P ao longo das simulações")
-    ax1[1].set_title("Distribuição dos pontos de Q ao longo das simulações")
-    ax1[0].boxplot(pointCountForP, boxprops=dict(color="C0"))
-    ax1[1].boxplot(pointCountForQ, boxprops=dict(color="C2"))
-    plt.show()
+def showStatsGraphs(aggregator):
+    """
+    Exibe os gráficos da análise de um dataset. Os boxplots são desenhados a partir dos
+    histogramas acumulados, sem guardar um valor por partida.
 
-    fig2, ax2 = plt.subplots(1, 2)
-    ax2[0].set_title("Distribuição dos sets de P ao longo das simulações")
-    ax2[1].set_title("Distribuição dos sets de Q ao longo das simulações")
-    ax2[0].boxplot(setCountPerGameForP, boxprops=dict(color="C0"))
-    ax2[1].boxplot(setCountPerGameForQ, boxprops=dict(color="C2"))
-    plt.show()
+    Args:
+        aggregator (`analysis.MatchStatsAggregator`): Valores acumulados do dataset.
+    """
+    import matplotlib.pyplot as plt
 
-    fig3, ax3 = plt.subplots(1, 2)
-    ax3[0].set_title("Distribuição dos games de P ao longo das simulações")
-    ax3[1].set_title("Distribuição dos games de Q ao longo das simulações")
-    ax3[0].boxplot(gameCountForP, boxprops=dict(color="C0"))
-    ax3[1].boxplot(gameCountForQ, boxprops=dict(color="C2"))
-    plt.show()
+    for name, label in (("points", "pontos"), ("sets", "sets"), ("games", "games")):
+        fig, ax = plt.subplots(1, 2)
+        ax[0].set_title("Distribuição dos {} de P ao longo das simulações".format(label))
+        ax[1].set_title("Distribuição dos {} de Q ao longo das simulações".format(label))
+        ax[0].bxp(
+            [aggregator.getHistogram(name + "P").boxplotStats()],
+            boxprops=dict(color="C0"),
+        )
+        ax[1].bxp(
+            [aggregator.getHistogram(name + "Q").boxplotStats()],
+            boxprops=dict(color="C2"),
+        )
+        plt.show()
 
 
 def main(
@@ -230,6 +903,37 @@ def main(
     datasetPath=None,
     shouldShowGraphs=False,
     simulationCount=30,
+    useBatch=False,
+    shouldSolveExact=False,
+    workers=1,
+    masterSeed=None,
+    outputFormat="files",
+    outputPath=os.path.join("results", "matches"),
+    shardBytes=None,
+    shardRecords=None,
+    detail=DETAIL_POINT,
+    useIndex=True,
+    hierarchical=False,
+    flat=False,
+    sweepConfigs=None,
+    cachePath=os.path.join("results", "cache"),
+    curveProbs=None,
+    curveOutput=None,
+    lookupStates=None,
+    winTablePath=os.path.join("results", "winProbability"),
+    precision=None,
+    precisionTarget="winrate",
+    confidence=0.95,
+    compareProbs=None,
+    commonRandomNumbers=True,
+    antithetic=False,
+    rareEvent=None,
+    tiltedProbP=None,
+    probP=None,
+    longGamePoints=30,
+    queueSize=None,
+    shouldServe=False,
+    cacheSize=256,
 ):
     """
     Função principal do programa.
@@ -239,11 +943,108 @@ def main(
         shouldAnalyze (bool): Se True, analisa os dados de um dataset.
         datasetPath (str): Caminho para o dataset a ser analisado.]
         shouldShowGraphs (bool): Se True, mostra os gráficos gerados.
+        simulationCount (int): Quantidade de partidas a serem simuladas.
+        useBatch (bool): Se True, simula as partidas em lote com o motor vetorizado.
+        shouldSolveExact (bool): Se True, exibe os valores exatos da cadeia em vez de simular.
+        workers (int): Quantidade de processos usados na simulação ou na análise.
+        masterSeed (int): Seed mestre da simulação.
+        outputFormat (str): Formato de saída dos resultados, "files", "jsonl" ou "columnar".
+        outputPath (str): Pasta onde os resultados são escritos.
+        shardBytes (int): Tamanho máximo de cada shard, em bytes.
+        shardRecords (int): Quantidade máxima de partidas por shard.
+        detail (int): Nível de detalhe dos resultados da simulação.
+        useIndex (bool): Se True, usa o índice incremental na análise do dataset.
+        hierarchical (bool): Se True, simula as partidas sorteando cada game de uma só vez.
+        flat (bool): Se True, usa a cadeia da partida inteira com `useBatch` e
+            `shouldSolveExact`.
+        sweepConfigs ([float | dict]): Configurações de uma varredura de parâmetros. Se
+            informadas, executa a varredura com `mainSweep`.
+        cachePath (str): Pasta do cache de resultados da varredura.
+        curveProbs ([float]): Probabilidades de P vencer um ponto. Se informadas, calcula a
+            curva exata com `mainCurve`.
+        curveOutput (str): Arquivo `.npz` onde a curva é salva.
+        lookupStates ([str]): Estados consultados com `mainLookup`.
+        winTablePath (str): Caminho da tabela de probabilidades de vitória, sem extensão.
+        precision (float): Precisão desejada na simulação adaptativa.
+        precisionTarget (str): Estatística usada como critério de parada.
+        confidence (float): Nível de confiança do intervalo.
+        compareProbs ((float, float)): Se informadas, compara as duas configurações com
+            `mainCompare`.
+        commonRandomNumbers (bool): Usa números aleatórios comuns na comparação.
+        antithetic (bool): Usa variáveis antitéticas na comparação.
+        rareEvent (str): Se informado, estima a probabilidade do evento com `mainRare`.
+        tiltedProbP (float | dict): Probabilidade de ponto usada na amostragem por
+            importância.
+        probP (float): Probabilidade real de P vencer um ponto na estimação do evento raro.
+        longGamePoints (int): Pontos a partir dos quais um game é considerado longo.
+        queueSize (int): Tamanho da fila da escrita em segundo plano, ou None para escrever
+            na mesma thread da simulação.
+        shouldServe (bool): Se True, responde a consultas pela entrada padrão com
+            `mainServe`.
+        cacheSize (int): Quantidade máxima de resultados em cache no modo servidor.
     """
+    if shouldServe:
+        mainServe(workers, cacheSize)
+        return
+    if rareEvent:
+        mainRare(
+            rareEvent, simulationCount, tiltedProbP, probP, longGamePoints, masterSeed
+        )
+    if compareProbs:
+        mainCompare(
+            compareProbs,
+            simulationCount,
+            commonRandomNumbers,
+            antithetic,
+            workers,
+            masterSeed,
+        )
+    if lookupStates:
+        mainLookup(lookupStates, winTablePath)
+    if curveProbs:
+        mainCurve(curveProbs, curveOutput)
+    if sweepConfigs:
+        mainSweep(sweepConfigs, simulationCount, workers, masterSeed, cachePath)
+    if shouldSolveExact:
+        mainExact(flat)
+        return
     if shouldSimulate:
-        mainSimulate(simulationCount)
+        mainSimulate(
+            simulationCount,
+            useBatch,
+            workers,
+            masterSeed,
+            outputFormat,
+            outputPath,
+            shardBytes,
+            shardRecords,
+            detail,
+            hierarchical,
+            flat,
+            precision,
+            precisionTarget,
+            confidence,
+            queueSize,
+        )
     if shouldAnalyze:
-        generateStats(datasetPath, shouldShowGraphs)
+        generateStats(datasetPath, shouldShowGraphs, workers, useIndex)
+
+
+def writeProfile(profiler, profilePath: str):
+    """
+    Escreve o relatório de um `profiling.Profiler` em JSON.
+
+    Args:
+        profiler (`profiling.Profiler`): profiler já desinstalado.
+        profilePath (str): arquivo de saída, ou "-" para a saída padrão.
+    """
+    report = json.dumps(profiler.report(), indent=2)
+    if profilePath == "-":
+        print(report)
+    else:
+        with open(profilePath, "w") as profileFile:
+            profileFile.write(report)
+        print("profiling salvo em {}".format(profilePath))
 
 
 def checkArgs():
@@ -253,15 +1054,17 @@ def checkArgs():
     parser = argparse.ArgumentParser(
         description="Simulação de partidas de tênis usando Cadeias de Markov"
     )
+    # Cada execução roda apenas um dos modos do programa.
+    modes = parser.add_mutually_exclusive_group()
 
-    parser.add_argument(
+    modes.add_argument(
         "--simulate",
         "-S",
         action="store_true",
         help="Simula uma partida de tênis",
     )
 
-    parser.add_argument(
+    modes.add_argument(
         "--analyze",
         "-A",
         action="store_true",
@@ -280,25 +1083,339 @@ def checkArgs():
         help="Quantidade de partidas a serem simuladas",
     )
 
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Simula todas as partidas de uma vez usando o motor vetorizado",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-W",
+        type=int,
+        default=1,
+        help="Quantidade de processos usados para simular ou analisar as partidas",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Seed mestre da simulação, do qual são derivados os seeds de cada partida",
+    )
+
+    parser.add_argument(
+        "--output",
+        "-O",
+        choices=["files", "jsonl", "columnar"],
+        default="files",
+        help="Formato de saída: um arquivo JSON por partida, shards JSON Lines ou shards binários colunares (.npy)",
+    )
+
+    parser.add_argument(
+        "--output-path",
+        default=os.path.join("results", "matches"),
+        help="Pasta onde os resultados da simulação são escritos",
+    )
+
+    parser.add_argument(
+        "--shard-bytes",
+        type=int,
+        help="Tamanho máximo de cada shard, em bytes (padrão: 64 MiB para JSON Lines e 256 MiB para o formato colunar)",
+    )
+
+    parser.add_argument(
+        "--shard-records",
+        type=int,
+        help="Quantidade máxima de partidas por shard",
+    )
+
+    parser.add_argument(
+        "--background-writer",
+        nargs="?",
+        type=int,
+        const=1024,
+        metavar="QUEUE_SIZE",
+        help="Serializa e escreve os resultados em uma thread separada, com uma fila de no máximo QUEUE_SIZE partidas (padrão: 1024)",
+    )
+
+    parser.add_argument(
+        "--detail",
+        "-D",
+        choices=list(DETAIL_LEVELS),
+        default="point",
+        help="Nível de detalhe dos resultados: apenas o placar (none), totais por partida (summary), resultados de cada game (game) ou cada ponto (point)",
+    )
+
+    parser.add_argument(
+        "--hierarchical",
+        action="store_true",
+        help="Sorteia cada game de uma só vez a partir da distribuição exata dos seus resultados, sem simular os pontos (nível de detalhe máximo: game)",
+    )
+
+    parser.add_argument(
+        "--flat",
+        action="store_true",
+        help="Com --batch ou --exact, usa uma única cadeia absorvente para a partida inteira (ponto × games × sets)",
+    )
+
+    parser.add_argument(
+        "--precision",
+        type=float,
+        help="Simula em lotes até que a metade da largura do intervalo de confiança da estatística de --target seja no máximo este valor, ignorando --simulation-count",
+    )
+
+    parser.add_argument(
+        "--target",
+        default="winrate",
+        help="Estatística usada por --precision: taxa de vitória de P (winrate), pontos (points) ou games (games) por partida",
+    )
+
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Nível de confiança do intervalo usado por --precision",
+    )
+
+    modes.add_argument(
+        "--compare",
+        help="Compara duas probabilidades de P vencer um ponto, no formato pA,pB, com -C partidas por configuração",
+    )
+
+    parser.add_argument(
+        "--antithetic",
+        action="store_true",
+        help="Na comparação, simula pares de partidas com números aleatórios u e 1 - u",
+    )
+
+    parser.add_argument(
+        "--independent",
+        action="store_true",
+        help="Na comparação, usa números aleatórios independentes em cada configuração, em vez de números aleatórios comuns",
+    )
+
+    modes.add_argument(
+        "--rare",
+        help="Estima por amostragem por importância a probabilidade de um evento raro: vitória de Q (upset), game longo (long-game) ou set com 7 games (seven-game-set)",
+    )
+
+    parser.add_argument(
+        "--tilt",
+        help="Probabilidade de ponto usada na amostragem por importância: um valor ou um dicionário JSON {nó: probabilidade}",
+    )
+
+    parser.add_argument(
+        "--prob-p",
+        type=float,
+        help="Probabilidade real de P vencer um ponto usada por --rare",
+    )
+
+    parser.add_argument(
+        "--long-game-points",
+        type=int,
+        default=30,
+        help="Pontos a partir dos quais um game é considerado longo em --rare long-game",
+    )
+
+    modes.add_argument(
+        "--exact",
+        action="store_true",
+        help="Calcula de forma exata as probabilidades de vitória de games, sets e partidas",
+    )
+
+    modes.add_argument(
+        "--sweep",
+        help="Varredura da probabilidade de P vencer um ponto: lista (0.5,0.55,0.6) ou grade início:fim:passo (0.4:0.7:0.05)",
+    )
+
+    modes.add_argument(
+        "--sweep-file",
+        help="Arquivo JSON com a lista de configurações da varredura; cada uma é uma probabilidade ou um dicionário {nó: probabilidade}",
+    )
+
+    parser.add_argument(
+        "--cache-path",
+        default=os.path.join("results", "cache"),
+        help="Pasta do cache de resultados da varredura",
+    )
+
+    modes.add_argument(
+        "--curve",
+        help="Calcula de forma exata e vetorizada as probabilidades de vitória (e derivadas) para vários valores de p: lista ou grade início:fim:passo",
+    )
+
+    parser.add_argument(
+        "--curve-output",
+        help="Arquivo .npz onde a curva de --curve é salva, em vez de exibida",
+    )
+
+    modes.add_argument(
+        "--lookup",
+        action="append",
+        help="Consulta a probabilidade de P vencer a partida a partir de um estado, como \"30-15|4-3|1-1\" (nó do game, games e sets); pode ser repetida",
+    )
+
+    parser.add_argument(
+        "--win-table",
+        default=os.path.join("results", "winProbability"),
+        help="Caminho, sem extensão, da tabela pré-calculada de probabilidades de vitória (.npy e .json)",
+    )
+
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Não usa nem atualiza o índice incremental da análise guardado na pasta do dataset",
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="-",
+        help="Mede contadores (pontos, games, sets, partidas, bytes) e o tempo de cada fase (rng, stepping, serialization, io) e escreve um relatório JSON no arquivo informado, ou na saída padrão. Com -W > 1, a simulação nos processos auxiliares não é medida",
+    )
+
+    modes.add_argument(
+        "--serve",
+        action="store_true",
+        help="Mantém a cadeia compilada em memória e responde a consultas JSON Lines (simulate, exact, stats, metrics) pela entrada padrão, com -W threads",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=256,
+        help="Quantidade máxima de resultados guardados no cache do modo servidor",
+    )
+
     parser.add_argument("--path", "-p", help="Caminho para a pasta contendo o dataset")
     args = parser.parse_args()
+    # Os módulos usados só na validação de algumas opções são importados apenas quando
+    # essas opções são informadas, para não atrasar a inicialização dos demais modos.
+    if args.sweep or args.sweep_file or args.compare or args.curve:
+        from sweep import parseSweepValues, loadSweepFile
+    if args.precision is not None:
+        from adaptive import ADAPTIVE_TARGETS
+
+        if args.target not in ADAPTIVE_TARGETS:
+            parser.error(
+                "--target deve ser um de: {}".format(", ".join(ADAPTIVE_TARGETS))
+            )
+    if args.rare is not None:
+        from rare import RARE_EVENTS
+
+        if args.rare not in RARE_EVENTS:
+            parser.error("--rare deve ser um de: {}".format(", ".join(RARE_EVENTS)))
+        if args.simulation_count < 1:
+            parser.error("--rare exige --simulation-count de ao menos 1")
+    args.sweep_configs = []
+    if args.sweep:
+        try:
+            args.sweep_configs += parseSweepValues(args.sweep)
+            for prob in args.sweep_configs:
+                checkProbabilities(prob, [])
+        except ValueError as error:
+            parser.error("valores de --sweep inválidos: {} ({})".format(args.sweep, error))
+    if args.precision is not None and args.precision <= 0:
+        parser.error("--precision deve ser positivo")
+    if args.precision is not None and (
+        args.output != parser.get_default("output")
+        or args.output_path != parser.get_default("output_path")
+        or args.shard_bytes is not None
+        or args.shard_records is not None
+        or args.background_writer is not None
+    ):
+        parser.error(
+            "--precision não grava as partidas simuladas; não pode ser usado com --output, --output-path, --shard-bytes, --shard-records ou --background-writer"
+        )
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence deve estar entre 0 e 1")
+    args.compare_probs = None
+    if args.compare:
+        try:
+            args.compare_probs = parseSweepValues(args.compare)
+        except ValueError:
+            args.compare_probs = []
+        if len(args.compare_probs) != 2:
+            parser.error("--compare deve ter o formato pA,pB")
+    args.tilted_prob_p = None
+    if args.tilt:
+        try:
+            args.tilted_prob_p = json.loads(args.tilt)
+        except ValueError:
+            parser.error("--tilt deve ser um número ou um dicionário JSON")
+        try:
+            validateTilt(args.tilted_prob_p, loadStateTable("tennis/stateList.csv"))
+        except ValueError as error:
+            parser.error("--tilt inválido: {}".format(error))
+    args.curve_probs = []
+    if args.curve:
+        try:
+            args.curve_probs = parseSweepValues(args.curve)
+            for prob in args.curve_probs:
+                checkProbabilities(prob, [])
+        except ValueError as error:
+            parser.error("valores de --curve inválidos: {} ({})".format(args.curve, error))
+    if args.sweep_file:
+        try:
+            args.sweep_configs += loadSweepFile(
+                args.sweep_file, loadStateTable("tennis/stateList.csv")
+            )
+        except (OSError, ValueError) as error:
+            parser.error("--sweep-file inválido: {}".format(error))
     if args.analyze and not args.path:
         print("É necessário informar o caminho para o dataset")
         exit(1)
-    if args.analyze and args.simulate:
-        print(
-            "Não é possível gerar os dados e simular uma partida ao mesmo tempo. Faça a simulação primeiro e depois analise os resultados."
-        )
-        exit(1)
     return args
 
 
 if __name__ == "__main__":
     args = checkArgs()
+    profiler = None
+    if args.profile is not None:
+        from profiling import Profiler, getDirectorySize
+
+        profiler = Profiler()
+        outputSize = getDirectorySize(args.output_path)
+        profiler.install()
     main(
-        args.simulate,
-        args.analyze,
-        args.path,
-        not args.no_graphs,
-        args.simulation_count,
+        shouldSimulate=args.simulate,
+        shouldAnalyze=args.analyze,
+        datasetPath=args.path,
+        shouldShowGraphs=not args.no_graphs,
+        simulationCount=args.simulation_count,
+        useBatch=args.batch,
+        shouldSolveExact=args.exact,
+        workers=args.workers,
+        masterSeed=args.seed,
+        outputFormat=args.output,
+        outputPath=args.output_path,
+        shardBytes=args.shard_bytes,
+        shardRecords=args.shard_records,
+        detail=DETAIL_LEVELS[args.detail],
+        useIndex=not args.no_index,
+        hierarchical=args.hierarchical,
+        flat=args.flat,
+        sweepConfigs=args.sweep_configs,
+        cachePath=args.cache_path,
+        curveProbs=args.curve_probs,
+        curveOutput=args.curve_output,
+        lookupStates=args.lookup,
+        winTablePath=args.win_table,
+        precision=args.precision,
+        precisionTarget=args.target,
+        confidence=args.confidence,
+        compareProbs=args.compare_probs,
+        commonRandomNumbers=not args.independent,
+        antithetic=args.antithetic,
+        rareEvent=args.rare,
+        tiltedProbP=args.tilted_prob_p,
+        probP=args.prob_p,
+        longGamePoints=args.long_game_points,
+        queueSize=args.background_writer,
+        shouldServe=args.serve,
+        cacheSize=args.cache_size,
     )
+    if profiler is not None:
+        profiler.uninstall()
+        profiler.count("bytes", getDirectorySize(args.output_path) - outputSize)
+        writeProfile(profiler, args.profile)
@@ -2,7 +2,7 @@
 Este arquivo define a classe "Markov", que representa um modelo de Markov genérico.
 """
 import numpy as np
-from random import seed, random
+import hashlib
 import json
 from time import strftime
 import os
@@ -12,6 +12,365 @@ from pprint import pprint
 overridenProbabilityP = 0.55
 overridenProbabilityQ = 1 - overridenProbabilityP
 
+DETAIL_NONE = 0
+"""
+Nível de detalhe em que apenas o vencedor e o placar de cada partida são registrados.
+"""
+DETAIL_SUMMARY = 1
+"""
+Nível de detalhe em que, além do placar, são registrados os totais de games e pontos de cada
+jogador, sem guardar nenhum dado por game ou por ponto.
+"""
+DETAIL_GAME = 2
+"""
+Nível de detalhe em que o resultado de cada game é registrado, sem os dados de cada ponto.
+"""
+DETAIL_POINT = 3
+"""
+Nível de detalhe em que cada ponto é registrado. É o comportamento original do projeto.
+"""
+DETAIL_LEVELS = {
+    "none": DETAIL_NONE,
+    "summary": DETAIL_SUMMARY,
+    "game": DETAIL_GAME,
+    "point": DETAIL_POINT,
+}
+"""
+Nomes dos níveis de detalhe, como aceitos pela opção `--detail` da linha de comando.
+"""
+
+
+class UniformStream:
+    """
+    Gerador de números aleatórios uniformes em [0, 1) pertencente a uma única instância de
+    `MarkovGraph`. Os valores são sorteados em blocos por um `numpy.random.Generator`, em vez
+    de um sorteio por ponto. O primeiro bloco é pequeno e cada bloco seguinte tem o dobro do
+    tamanho do anterior, até `maxBlockSize`, para que partidas curtas não sorteiem valores
+    que nunca serão usados.
+
+    No modo antitético, cada valor u é substituído por 1 - u. Duas instâncias com o mesmo
+    seed, uma delas antitética, produzem sequências negativamente correlacionadas, usadas
+    para redução de variância (ver `tennis.variance`).
+    """
+
+    __slots__ = ("_rng", "_blockSize", "_maxBlockSize", "_antithetic")
+
+    def __init__(self, tgtSeed, maxBlockSize=65536, antithetic=False):
+        """
+        Inicializa o gerador.
+
+        Args:
+            tgtSeed (int): Seed para o gerador de números aleatórios.
+            maxBlockSize (int): Tamanho máximo de cada bloco sorteado.
+            antithetic (bool): Se True, gera 1 - u no lugar de cada valor u.
+        """
+        self._maxBlockSize = maxBlockSize
+        self._antithetic = antithetic
+        self.seed(tgtSeed)
+
+    def seed(self, tgtSeed):
+        """
+        Reinicia o gerador com um novo seed.
+
+        Args:
+            tgtSeed (int): Seed para o gerador de números aleatórios.
+        """
+        self._rng = np.random.default_rng(tgtSeed)
+        self._blockSize = 256
+
+    def nextBlock(self):
+        """
+        Sorteia um novo bloco de valores.
+
+        Returns:
+            iterator: iterador sobre os valores do bloco, como `float` do Python.
+        """
+        block = self._rng.random(self._blockSize)
+        if self._antithetic:
+            block = 1.0 - block
+        self._blockSize = min(self._blockSize * 2, self._maxBlockSize)
+        return iter(block.tolist())
+
+
+def solveAbsorbingChain(table):
+    """
+    Resolve de forma exata a cadeia absorvente descrita por uma `TransitionTable`.
+
+    Os estados são divididos em transientes e absorventes, e a matriz de transição é escrita
+    na forma canônica com os blocos `Q` (transiente para transiente) e `R` (transiente para
+    absorvente). A matriz fundamental `N = (I - Q)^-1` soma a série infinita de visitas a
+    cada estado, de modo que ciclos como Deuce/AdvA/AdvB são resolvidos em forma fechada,
+    sem truncamento.
+
+    Args:
+        table (`TransitionTable`): Tabela de transição compilada.
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                transient ([int]): estados transientes, na ordem das linhas das matrizes,
+                absorbing ([int]): estados absorventes, na ordem das colunas de `B`,
+                fundamental (np.ndarray): matriz fundamental `N`,
+                absorptionProbabilities (np.ndarray): matriz `B = N R`, com a probabilidade de
+                    cada estado transiente terminar em cada estado absorvente,
+                expectedSteps (np.ndarray): vetor `t = N 1`, com a quantidade esperada de pontos
+                    até a absorção a partir de cada estado transiente
+            }
+    """
+    transient = np.flatnonzero(~table.absorbing)
+    absorbing = np.flatnonzero(table.absorbing)
+    transientPos = {state: i for i, state in enumerate(transient)}
+    absorbingPos = {state: i for i, state in enumerate(absorbing)}
+    q = np.zeros((transient.size, transient.size))
+    r = np.zeros((transient.size, absorbing.size))
+    for i, state in enumerate(transient):
+        probP = table.probP[state]
+        for nextState, prob in (
+            (table.nextP[state], probP),
+            (table.nextQ[state], 1 - probP),
+        ):
+            if table.absorbing[nextState]:
+                r[i, absorbingPos[nextState]] += prob
+            else:
+                q[i, transientPos[nextState]] += prob
+    fundamental = np.linalg.inv(np.eye(transient.size) - q)
+    return {
+        "transient": transient.tolist(),
+        "absorbing": absorbing.tolist(),
+        "fundamental": fundamental,
+        "absorptionProbabilities": fundamental @ r,
+        "expectedSteps": fundamental.sum(axis=1),
+    }
+
+
+def findComponents(table):
+    """
+    Encontra as componentes fortemente conexas do grafo de transição de uma `TransitionTable`,
+    com o algoritmo de Tarjan (em versão iterativa, sem recursão). Estados absorventes formam
+    componentes próprias e não são percorridos.
+
+    Args:
+        table (`TransitionTable`): Tabela de transição compilada.
+
+    Returns:
+        [[int]]: componentes, em ordem topológica reversa: todo estado alcançável a partir de
+            uma componente pertence a ela mesma ou a uma componente anterior da lista.
+    """
+    (nextP, nextQ, _, absorbing) = table.asLists()
+    stateCount = len(table)
+    index = [-1] * stateCount
+    lowLink = [0] * stateCount
+    onStack = [False] * stateCount
+    stack = []
+    components = []
+    counter = 0
+    for root in range(stateCount):
+        if index[root] != -1:
+            continue
+        work = [(root, 0)]
+        while work:
+            (state, edge) = work.pop()
+            if edge == 0:
+                index[state] = lowLink[state] = counter
+                counter += 1
+                stack.append(state)
+                onStack[state] = True
+            successors = () if absorbing[state] else (nextP[state], nextQ[state])
+            recursed = False
+            while edge < len(successors):
+                nextState = successors[edge]
+                edge += 1
+                if index[nextState] == -1:
+                    work.append((state, edge))
+                    work.append((nextState, 0))
+                    recursed = True
+                    break
+                if onStack[nextState]:
+                    lowLink[state] = min(lowLink[state], index[nextState])
+            if recursed:
+                continue
+            if lowLink[state] == index[state]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    onStack[member] = False
+                    component.append(member)
+                    if member == state:
+                        break
+                components.append(component)
+            if work:
+                parent = work[-1][0]
+                lowLink[parent] = min(lowLink[parent], lowLink[state])
+    return components
+
+
+def solveAbsorbingChainSparse(table):
+    """
+    Resolve de forma exata a cadeia absorvente descrita por uma `TransitionTable`, como
+    `solveAbsorbingChain`, sem montar a matriz fundamental densa. As componentes fortemente
+    conexas (ver `findComponents`) são resolvidas uma de cada vez, dos estados finais para o
+    inicial; cada componente só depende de componentes já resolvidas, e apenas o seu pequeno
+    sistema linear (por exemplo, o ciclo Deuce/AdvA/AdvB) é resolvido com o NumPy. É adequada
+    para cadeias grandes, como a da partida inteira gerada por
+    `tennis.tennisClasses.compileMatchChain`.
+
+    Args:
+        table (`TransitionTable`): Tabela de transição compilada.
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                absorbing ([int]): estados absorventes, na ordem das colunas de
+                    `absorptionProbabilities`,
+                absorptionProbabilities (np.ndarray): matriz com uma linha por estado da
+                    tabela e a probabilidade de cada um terminar em cada estado absorvente,
+                expectedSteps (np.ndarray): quantidade esperada de passos até a absorção a
+                    partir de cada estado (zero nos estados absorventes),
+                components (int): quantidade de componentes resolvidas
+            }
+    """
+    (nextP, nextQ, probP, absorbing) = table.asLists()
+    absorbingStates = [state for state in range(len(table)) if absorbing[state]]
+    absorption = np.zeros((len(table), len(absorbingStates)))
+    for column, state in enumerate(absorbingStates):
+        absorption[state, column] = 1.0
+    steps = np.zeros(len(table))
+    components = findComponents(table)
+    for component in components:
+        if absorbing[component[0]]:
+            continue
+        position = {state: i for i, state in enumerate(component)}
+        size = len(component)
+        system = np.eye(size)
+        rhsAbsorption = np.zeros((size, len(absorbingStates)))
+        rhsSteps = np.ones(size)
+        for i, state in enumerate(component):
+            for nextState, prob in (
+                (nextP[state], probP[state]),
+                (nextQ[state], 1 - probP[state]),
+            ):
+                if nextState in position:
+                    system[i, position[nextState]] -= prob
+                else:
+                    rhsAbsorption[i] += prob * absorption[nextState]
+                    rhsSteps[i] += prob * steps[nextState]
+        if size == 1:
+            absorption[component[0]] = rhsAbsorption[0] / system[0, 0]
+            steps[component[0]] = rhsSteps[0] / system[0, 0]
+        else:
+            solution = np.linalg.solve(
+                system, np.column_stack((rhsAbsorption, rhsSteps))
+            )
+            absorption[component] = solution[:, :-1]
+            steps[component] = solution[:, -1]
+    return {
+        "absorbing": absorbingStates,
+        "absorptionProbabilities": absorption,
+        "expectedSteps": steps,
+        "components": len(components),
+    }
+
+
+def solveGame(table, initialNode):
+    """
+    Calcula de forma exata as probabilidades de vitória e a duração esperada de um game,
+    usando `solveAbsorbingChain`.
+
+    Args:
+        table (`TransitionTable`): Tabela de transição compilada.
+        initialNode (`MarkovNode`): Nó inicial do game.
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                pWins (float): probabilidade de P vencer o game,
+                qWins (float): probabilidade de Q vencer o game,
+                expectedPoints (float): quantidade esperada de pontos no game,
+                states: {
+                    nome do nó: {
+                        pWins (float): probabilidade de P vencer o game a partir do nó,
+                        expectedPoints (float): pontos esperados até o fim do game
+                    }
+                }
+            }
+    """
+    solution = solveAbsorbingChain(table)
+    pColumns = [
+        i for i, state in enumerate(solution["absorbing"]) if table.winner[state] == 1
+    ]
+    pWins = solution["absorptionProbabilities"][:, pColumns].sum(axis=1)
+    states = {}
+    for i, state in enumerate(solution["transient"]):
+        states[table.getName(state)] = {
+            "pWins": float(pWins[i]),
+            "expectedPoints": float(solution["expectedSteps"][i]),
+        }
+    initial = states[initialNode.getName()]
+    return {
+        "pWins": initial["pWins"],
+        "qWins": 1 - initial["pWins"],
+        "expectedPoints": initial["expectedPoints"],
+        "states": states,
+    }
+
+
+def solveGameCurve(table, initialNode, probs):
+    """
+    Versão vetorizada de `solveGame` para um vetor de probabilidades de P vencer um ponto,
+    aplicadas a todos os nós transientes (como em `MarkovNode.compile` com um único valor).
+
+    A matriz de transição entre estados transientes é escrita como `Q(p) = p A + (1 - p) B`,
+    em que `A` e `B` são as transições quando P e Q vencem o ponto, e o mesmo vale para o
+    vetor `r(p)` de transições que terminam o game com vitória de P. Todos os sistemas
+    `(I - Q(p)) x = r(p)` são resolvidos de uma só vez por `np.linalg.solve`, e a derivada
+    em relação a p é obtida derivando o sistema:
+    `(I - Q(p)) x' = (a - b) + (A - B) x`.
+
+    Args:
+        table (`TransitionTable`): Tabela de transição compilada.
+        initialNode (`MarkovNode`): Nó inicial do game.
+        probs (np.ndarray): probabilidades de P vencer um ponto.
+
+    Returns:
+        dict: vetores com uma posição por probabilidade, no formato
+
+            {
+                pWins (np.ndarray): probabilidade de P vencer o game,
+                dPWins (np.ndarray): derivada de `pWins` em relação a p
+            }
+    """
+    probs = np.asarray(probs, dtype=float)
+    transient = np.flatnonzero(~table.absorbing)
+    position = {state: i for i, state in enumerate(transient)}
+    size = transient.size
+    stepP = np.zeros((size, size))
+    stepQ = np.zeros((size, size))
+    winsP = np.zeros(size)
+    winsQ = np.zeros(size)
+    for i, state in enumerate(transient):
+        for nextState, step, wins in (
+            (table.nextP[state], stepP, winsP),
+            (table.nextQ[state], stepQ, winsQ),
+        ):
+            if not table.absorbing[nextState]:
+                step[i, position[nextState]] += 1
+            elif table.winner[nextState] == 1:
+                wins[i] += 1
+    p = probs.reshape(-1, 1, 1)
+    system = np.eye(size) - (p * stepP + (1 - p) * stepQ)
+    rhs = (p[:, :, 0] * winsP + (1 - p[:, :, 0]) * winsQ)[:, :, np.newaxis]
+    pWins = np.linalg.solve(system, rhs)
+    dRhs = (winsP - winsQ)[:, np.newaxis] + (stepP - stepQ) @ pWins
+    dPWins = np.linalg.solve(system, dRhs)
+    initial = position[table.getStateId(initialNode.getName())]
+    return {
+        "pWins": pWins[:, initial, 0].reshape(probs.shape),
+        "dPWins": dPWins[:, initial, 0].reshape(probs.shape),
+    }
+
 
 class MarkovGraph:
     """
@@ -20,53 +379,73 @@ class MarkovGraph:
     O uso geral da classe segue o seguinte fluxo:
         - Criação dos nós da classe `MarkovNode`;
         - Instanciação da classe `MarkovGraph` usando o `MarkovNode` inicial como parâmetro
-        e um valor aleatório como tgtSeed (sugestão: tempo atual em milissegundos);
+        e um valor aleatório como tgtSeed (sugestão: tempo atual em milissegundos). Cada
+        instância possui o seu próprio gerador de números aleatórios (`UniformStream`),
+        semeado uma única vez por partida;
         - Chamada de `simulateGame` para simular um game;
         - Chamada de `getResults` para obter os resultados em JSON, ou passar `True` para
         `simulateGame` no passo anterior para salvar os resultados em JSON de forma automática;
         - Chamada de `reset` para reiniciar o modelo para um novo game.
     """
 
-    def __init__(self, initialNode, tgtSeed):
+    def __init__(
+        self, initialNode, tgtSeed, table=None, detail=DETAIL_POINT, antithetic=False
+    ):
         """
         Construtor da classe.
         Args:
             initialNode (`MarkovNode`): Nó inicial do modelo.
             tgtSeed (int): Seed para o gerador de números aleatórios.
-        """
-        self._initialNode = initialNode
-        self._currentNode = initialNode
+            table (`TransitionTable`): Tabela de transição compilada sobre a qual o modelo
+                é executado. Se omitida, é usada a tabela de `MarkovNode.getTable`.
+            detail (int): Nível de detalhe dos resultados, como `DETAIL_POINT`. Abaixo de
+                `DETAIL_POINT`, nenhum registro é criado por ponto.
+            antithetic (bool): Se True, usa os valores antitéticos (1 - u) do gerador de
+                números aleatórios, como em `UniformStream`.
+        """
+        self._table = table if table is not None else MarkovNode.getTable()
+        (
+            self._nextP,
+            self._nextQ,
+            self._probP,
+            self._absorbing,
+        ) = self._table.asLists()
+        self._initialState = self._table.getStateId(initialNode.getName())
+        self._state = self._initialState
         self._seed = tgtSeed
         self._pScore = 0
         self._qScore = 0
         self._logFileData = []
-        seed(tgtSeed)
+        self._detail = detail
+        self._stream = UniformStream(tgtSeed, antithetic=antithetic)
+        self._draws = iter(())
 
     def getNextNode(self):
         """
-        Gera um novo valor aleatoriamente e atualiza a variável de instância "currentNode"
-        com o próximo nó. Não faz nada se um dos próximos nós não existir. Também registra
-        a operação no log da instância.
+        Gera um novo valor aleatoriamente e atualiza o estado atual com o próximo nó.
+        Não faz nada se o estado atual for absorvente. No nível de detalhe `DETAIL_POINT`,
+        também registra a operação no log da instância, guardando apenas o número do estado;
+        os nomes dos nós só são resolvidos em `getResults`.
         """
-        currentLogData = {}
-        (nodeP, nodeQ) = self._currentNode.getNextNodes()
-        currentLogData["originalNode"] = self._currentNode.toJSON()
-        if nodeP == None or nodeQ == None:
+        state = self._state
+        if self._absorbing[state]:
             return
-        result = random()
-        scorer = ""
-        if result < self._currentNode.getProbP():
-            self._currentNode = nodeP
+        result = next(self._draws, None)
+        if result is None:
+            self._draws = self._stream.nextBlock()
+            result = next(self._draws)
+        if result < self._probP[state]:
+            self._state = self._nextP[state]
             self._pScore += 1
             scorer = "p"
         else:
-            self._currentNode = nodeQ
+            self._state = self._nextQ[state]
             self._qScore += 1
             scorer = "q"
-        currentLogData["resultValue"] = result
-        currentLogData["partialResults"] = "{}-{}".format(self._pScore, self._qScore)
-        currentLogData["scorer"] = scorer
-        self._logFileData.append(currentLogData)
+        if self._detail >= DETAIL_POINT:
+            self._logFileData.append(
+                (state, result, self._pScore, self._qScore, scorer)
+            )
 
     def getCurrentNode(self):
         """
@@ -75,7 +454,7 @@ class MarkovGraph:
         Returns:
             `MarkovNode`: Nó atual.
         """
-        return self._currentNode
+        return MarkovNode.getNodeById(self._table.getName(self._state))
 
     def simulateGame(self, shouldDumpResultsToFile=False):
         """
@@ -84,10 +463,9 @@ class MarkovGraph:
             shouldDumpResultsToFile (bool): Se True, salva os resultados do game no arquivo de log.
                 Os detalhes sobre o log estão descritos em `MarkovGraph.dumpResultsToFile`.
         """
-        (nodeP, nodeQ) = self._currentNode.getNextNodes()
-        while nodeP != None and nodeQ != None:
+        absorbing = self._absorbing
+        while not absorbing[self._state]:
             self.getNextNode()
-            (nodeP, nodeQ) = self._currentNode.getNextNodes()
         if shouldDumpResultsToFile:
             self.dumpResultsToFile()
 
@@ -100,6 +478,24 @@ class MarkovGraph:
         """
         return "p" if self._pScore > self._qScore else "q"
 
+    def getScore(self):
+        """
+        Retorna os pontos de cada jogador no game.
+
+        Returns:
+            (int, int): pontos do jogador P e pontos do jogador Q.
+        """
+        return (self._pScore, self._qScore)
+
+    def getDetail(self):
+        """
+        Retorna o nível de detalhe dos resultados.
+
+        Returns:
+            int: Nível de detalhe, como `DETAIL_POINT`.
+        """
+        return self._detail
+
     def getResults(self):
         """
         Retorna os resultados do game formatados em JSON.
@@ -133,12 +529,53 @@ class MarkovGraph:
             }
 
         O formato do objeto "originalNode" é descrito no método `MarkovNode.toJSON`.
+
+        O campo ``data`` só está presente no nível de detalhe `DETAIL_POINT`.
         """
-        return {
-            "gameData": self._logFileData,
-            "gameResult": {"p": self._pScore, "q": self._qScore},
-            "gameWinner": "p" if self._pScore > self._qScore else "q",
+        return self.formatResults(self.getLog())
+
+    def getLog(self):
+        """
+        Retorna os dados do game atual sem convertê-los para JSON, para que a conversão
+        (`formatResults`) só seja feita quando necessária.
+
+        Returns:
+            (int, int, list): pontos de P, pontos de Q e o registro de cada ponto, como
+                (estado, valor sorteado, pontos de P, pontos de Q, "p" ou "q"), ou None
+                abaixo do nível de detalhe `DETAIL_POINT`.
+        """
+        return (
+            self._pScore,
+            self._qScore,
+            self._logFileData if self._detail >= DETAIL_POINT else None,
+        )
+
+    def formatResults(self, log: tuple):
+        """
+        Converte os dados de um game, no formato de `getLog`, para o formato de `getResults`.
+
+        Args:
+            log (tuple): dados do game, como retornados por `getLog`.
+
+        Returns:
+            dict: os resultados do game
+        """
+        (pScore, qScore, points) = log
+        results = {
+            "gameResult": {"p": pScore, "q": qScore},
+            "gameWinner": "p" if pScore > qScore else "q",
         }
+        if points is not None:
+            results["gameData"] = [
+                {
+                    "originalNode": self._table.stateToJSON(state),
+                    "resultValue": result,
+                    "partialResults": "{}-{}".format(pointsP, pointsQ),
+                    "scorer": scorer,
+                }
+                for (state, result, pointsP, pointsQ, scorer) in points
+            ]
+        return results
 
     def dumpResultsToFile(self):
         """
@@ -159,19 +596,22 @@ class MarkovGraph:
         ) as logFile:
             logFile.write(self.getResults())
 
-    def reset(self, tgtSeed):
+    def reset(self, tgtSeed=None):
         """
         Reseta o modelo para um novo game.
         Args:
-            tgtSeed (int): Seed para o gerador de números aleatórios. Esse seed deve ser diferente
-                do usado originalmente, para evitar que o gerador de números aleatórios gere
-                os mesmos resultados.
+            tgtSeed (int): Seed para o gerador de números aleatórios. Se omitido, o gerador
+                da instância continua a sequência atual, o que mantém a partida inteira
+                reprodutível a partir do seed original. Se informado, deve ser diferente do
+                usado originalmente, para evitar que o gerador gere os mesmos resultados.
         """
-        self._currentNode = self._initialNode
+        self._state = self._initialState
         self._pScore = 0
         self._qScore = 0
         self._logFileData = []
-        seed(tgtSeed)
+        if tgtSeed is not None:
+            self._stream.seed(tgtSeed)
+            self._draws = iter(())
 
     def getSeed(self):
         """
@@ -183,13 +623,49 @@ class MarkovGraph:
         return self._seed
 
 
+def checkProbabilities(probP, names):
+    """
+    Verifica as probabilidades de vitória de P informadas para `MarkovNode.compile`: um
+    número entre 0 e 1, ou um dicionário que associa nomes de nós existentes a números entre
+    0 e 1.
+
+    Args:
+        probP (float | dict): as probabilidades
+        names ([str]): nomes dos nós da cadeia
+
+    Raises:
+        ValueError: se algum nó for desconhecido ou alguma probabilidade for inválida
+    """
+    entries = probP.items() if isinstance(probP, dict) else [(None, probP)]
+    for name, prob in entries:
+        if name is not None and name not in names:
+            raise ValueError("Nó desconhecido: {}".format(name))
+        if (
+            isinstance(prob, bool)
+            or not isinstance(prob, (int, float))
+            or not 0 <= prob <= 1
+        ):
+            raise ValueError(
+                "Probabilidade inválida{}: {}".format(
+                    "" if name is None else " no nó {}".format(name), prob
+                )
+            )
+
+
 class MarkovNode:
     """
     A classe que representa um determinado nó no grafo de Markov.
     """
 
+    __slots__ = ("_name", "_probP", "_probQ", "_nodeP", "_nodeQ")
+
     _nodes = {}
 
+    _table = None
+    """
+    Tabela de transição compilada a partir dos nós registrados. Ver `MarkovNode.getTable`.
+    """
+
     def __init__(self, name, probP, probQ, nodeP: str, nodeQ: str):
         """
         Inicializa um novo nó do grafo de Markov. Note que os nós `nodeP` e `nodeQ` devem
@@ -281,6 +757,70 @@ class MarkovNode:
                 MarkovNode._nodes[key]._nodeP = MarkovNode._nodes[nodePName]
             if nodeQName != None:
                 MarkovNode._nodes[key]._nodeQ = MarkovNode._nodes[nodeQName]
+        MarkovNode._table = None
+
+    @staticmethod
+    def compile(probP=None):
+        """
+        Congela o grafo de Markov em uma `TransitionTable`, na qual cada nó é identificado
+        por um número inteiro. Deve ser chamada depois de `MarkovNode.populateNodes`.
+
+        Args:
+            probP (float | dict): Probabilidade de vitória de P usada em todos os nós, ou um
+                dicionário que associa nomes de nós a probabilidades. Nós não informados usam
+                o valor de `MarkovNode.getProbP`.
+
+        Returns:
+            `TransitionTable`: A tabela compilada.
+
+        Raises:
+            ValueError: se o dicionário tiver um nó desconhecido, ou se alguma probabilidade
+                informada não for um número entre 0 e 1.
+        """
+        nodes = MarkovNode.getNodes()
+        names = [node.getName() for node in nodes]
+        ids = {name: i for i, name in enumerate(names)}
+        if probP is not None:
+            checkProbabilities(probP, ids)
+        stateCount = len(nodes)
+        nextP = np.arange(stateCount)
+        nextQ = np.arange(stateCount)
+        probs = np.zeros(stateCount)
+        absorbing = np.ones(stateCount, dtype=bool)
+        winner = np.zeros(stateCount, dtype=np.int8)
+        for i, node in enumerate(nodes):
+            (nodeP, nodeQ) = node.getNextNodes()
+            if nodeP is None or nodeQ is None:
+                continue
+            nextP[i] = ids[nodeP.getName()]
+            nextQ[i] = ids[nodeQ.getName()]
+            if isinstance(probP, dict):
+                probs[i] = float(probP.get(names[i], node.getProbP()))
+            elif probP is not None:
+                probs[i] = float(probP)
+            else:
+                probs[i] = float(node.getProbP())
+            absorbing[i] = False
+        for i in range(stateCount):
+            if not absorbing[i]:
+                if absorbing[nextP[i]]:
+                    winner[nextP[i]] = 1
+                if absorbing[nextQ[i]]:
+                    winner[nextQ[i]] = 2
+        return TransitionTable(names, nextP, nextQ, probs, absorbing, winner)
+
+    @staticmethod
+    def getTable():
+        """
+        Retorna a tabela de transição compilada dos nós registrados, compilando-a na
+        primeira chamada após `MarkovNode.populateNodes`.
+
+        Returns:
+            `TransitionTable`: A tabela compilada.
+        """
+        if MarkovNode._table is None:
+            MarkovNode._table = MarkovNode.compile()
+        return MarkovNode._table
 
     def getNodes():
         """
@@ -332,3 +872,122 @@ class MarkovNode:
             "nodeP": self._nodeP._name if self._nodeP != None else None,
             "nodeQ": self._nodeQ._name if self._nodeQ != None else None,
         }
+
+
+class TransitionTable:
+    """
+    Representação compacta do grafo de Markov, gerada por `MarkovNode.compile`. Cada estado é
+    identificado por um número inteiro, e os vetores abaixo são indexados por esse número:
+        - `nextP`: estado seguinte quando P vence o ponto;
+        - `nextQ`: estado seguinte quando Q vence o ponto;
+        - `probP`: probabilidade de P vencer o ponto;
+        - `absorbing`: True se o estado é absorvente (fim do game);
+        - `winner`: 1 se o estado absorvente indica vitória de P, 2 se indica vitória de Q
+        e 0 para estados não absorventes.
+
+    Estados absorventes apontam para si mesmos em `nextP` e `nextQ`.
+    """
+
+    __slots__ = (
+        "names",
+        "nextP",
+        "nextQ",
+        "probP",
+        "absorbing",
+        "winner",
+        "_ids",
+        "_lists",
+        "_fingerprint",
+    )
+
+    def __init__(self, names, nextP, nextQ, probP, absorbing, winner):
+        """
+        Inicializa a tabela. Normalmente não é chamado diretamente; ver `MarkovNode.compile`.
+
+        Args:
+            names ([str]): Nome de cada estado.
+            nextP (np.ndarray): Estado seguinte quando P vence o ponto.
+            nextQ (np.ndarray): Estado seguinte quando Q vence o ponto.
+            probP (np.ndarray): Probabilidade de P vencer o ponto em cada estado.
+            absorbing (np.ndarray): Indica se cada estado é absorvente.
+            winner (np.ndarray): Vencedor associado a cada estado absorvente.
+        """
+        self.names = list(names)
+        self.nextP = nextP
+        self.nextQ = nextQ
+        self.probP = probP
+        self.absorbing = absorbing
+        self.winner = winner
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self._lists = None
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def getStateId(self, name: str):
+        """
+        Retorna o número do estado associado a um nome de nó.
+
+        Returns:
+            int: O número do estado.
+        """
+        return self._ids[name]
+
+    def getName(self, stateId: int):
+        """
+        Retorna o nome do nó associado a um número de estado.
+
+        Returns:
+            str: O nome do nó.
+        """
+        return self.names[stateId]
+
+    def asLists(self):
+        """
+        Retorna os vetores `nextP`, `nextQ`, `probP` e `absorbing` como listas Python, que são
+        mais rápidas que vetores do NumPy para acessos a um elemento por vez.
+
+        Returns:
+            ([int], [int], [float], [bool]): Os vetores convertidos.
+        """
+        if self._lists is None:
+            self._lists = (
+                self.nextP.tolist(),
+                self.nextQ.tolist(),
+                self.probP.tolist(),
+                self.absorbing.tolist(),
+            )
+        return self._lists
+
+    def getFingerprint(self):
+        """
+        Calcula um hash SHA-256 dos nós, das transições e das probabilidades da tabela, usado
+        para identificar resultados calculados a partir dela. Assim como em `asLists`, o
+        valor é calculado uma única vez, pois a tabela não é alterada depois de criada.
+
+        Returns:
+            str: o hash, em hexadecimal
+        """
+        if self._fingerprint is None:
+            description = {
+                "names": self.names,
+                "nextP": self.nextP.tolist(),
+                "nextQ": self.nextQ.tolist(),
+                "probP": self.probP.tolist(),
+            }
+            encoded = json.dumps(description, sort_keys=True).encode("utf-8")
+            self._fingerprint = hashlib.sha256(encoded).hexdigest()
+        return self._fingerprint
+
+    def stateToJSON(self, stateId: int):
+        """
+        Converte as informações de um estado para o mesmo formato de `MarkovNode.toJSON`.
+        """
+        if self.absorbing[stateId]:
+            return {"selfNode": self.names[stateId], "nodeP": None, "nodeQ": None}
+        return {
+            "selfNode": self.names[stateId],
+            "nodeP": self.names[self.nextP[stateId]],
+            "nodeQ": self.names[self.nextQ[stateId]],
+        }
@@ -0,0 +1,253 @@
+"""
+Este arquivo define o modo de profiling, que mede contadores (pontos, games, sets, partidas e
+bytes escritos) e o tempo gasto em cada fase da simulação e da escrita dos resultados.
+
+Nenhum código de medição existe nos caminhos críticos: `Profiler.install` substitui os
+métodos instrumentados por versões que medem o tempo e atualizam os contadores, e
+`Profiler.uninstall` restaura os originais. Com o modo desligado, o custo é nulo.
+
+Como a instrumentação só existe no processo principal, a simulação feita em processos
+auxiliares (`--workers` maior que 1) não é medida: nesse caso, o relatório cobre apenas o
+que roda no processo principal, como a escrita dos resultados.
+"""
+import os
+import threading
+from time import perf_counter
+
+from markov import MarkovGraph, UniformStream
+from hierarchical import SampledGameGraph
+from tennisClasses import TennisSet, TennisMatch
+from batch import BatchGameEngine
+import sinks
+from sinks import FileSink, JsonLinesSink, ColumnarSink
+
+PROFILE_VERSION = 1
+"""
+Versão do formato do relatório de `Profiler.report`.
+"""
+
+
+def _countGame(profiler, args, result):
+    profiler.count("games")
+    profiler.count("points", sum(args[0].getScore()))
+
+
+def _countBatchGames(profiler, args, result):
+    profiler.count("games", len(result["winner"]))
+    profiler.count("points", int(result["pPoints"].sum() + result["qPoints"].sum()))
+
+
+def _countSet(profiler, args, result):
+    profiler.count("sets")
+
+
+def _countMatch(profiler, args, result):
+    profiler.count("matches")
+
+
+def _countRecord(profiler, args, result):
+    profiler.count("records")
+
+
+INSTRUMENTATION = (
+    (UniformStream, "nextBlock", "rng", None),
+    (MarkovGraph, "simulateGame", "stepping", _countGame),
+    (SampledGameGraph, "simulateGame", "stepping", _countGame),
+    (BatchGameEngine, "simulateGames", "stepping", _countBatchGames),
+    (TennisSet, "simulate", "set", _countSet),
+    (TennisMatch, "simulate", "match", _countMatch),
+    (MarkovGraph, "formatResults", "serialization", None),
+    (TennisSet, "toJSON", "serialization", None),
+    (TennisMatch, "toJSON", "serialization", None),
+    (TennisMatch, "toRows", "serialization", None),
+    (sinks, "serializeRecord", "serialization", None),
+    (TennisMatch, "dumpToFile", "io", None),
+    (FileSink, "write", "io", _countRecord),
+    (JsonLinesSink, "write", "io", _countRecord),
+    (JsonLinesSink, "close", "io", None),
+    (ColumnarSink, "write", "serialization", _countRecord),
+    (ColumnarSink, "_flush", "io", None),
+)
+"""
+Métodos instrumentados, no formato (classe ou módulo, atributo, fase, contador). O tempo de
+cada fase é exclusivo: o tempo de chamadas instrumentadas internas, na mesma thread, é
+descontado da fase externa (por exemplo, o tempo de "rng" não entra em "stepping", e o de
+"stepping" não entra em "set"). O contador, se informado, é chamado com o profiler, os
+argumentos e o retorno.
+"""
+
+
+def getDirectorySize(path: str):
+    """
+    Returns:
+        int: soma dos tamanhos dos arquivos dentro de `path`, ou zero se a pasta não existir
+    """
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class Profiler:
+    """
+    Acumulador de contadores e tempos por fase. O uso geral da classe segue o fluxo:
+        - `install`, antes da execução a ser medida;
+        - execução normal do programa;
+        - `uninstall` e `report`, para obter o relatório.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._threadTimers = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patches = []
+        self._startTime = None
+        self._wallSeconds = 0.0
+
+    def count(self, name: str, value=1):
+        """
+        Incrementa um contador.
+
+        Args:
+            name (str): nome do contador
+            value (int): valor a ser somado
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def wrap(self, owner, attribute: str, phase: str, counter=None):
+        """
+        Substitui `owner.attribute` por uma versão que acumula o tempo exclusivo da chamada
+        em `phase` e chama `counter` ao final.
+
+        Args:
+            owner (type | module): classe ou módulo do atributo
+            attribute (str): nome da função ou método
+            phase (str): nome da fase
+            counter (function): função chamada com (profiler, args, retorno), ou None
+        """
+        original = owner.__dict__[attribute]
+        local = self._local
+        profiler = self
+
+        def instrumented(*args, **kwargs):
+            stack = getattr(local, "stack", None)
+            if stack is None:
+                stack = profiler._initThread()
+            timers = local.timers
+            stack.append(0.0)
+            startTime = perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - startTime
+                children = stack.pop()
+                timer = timers.get(phase)
+                if timer is None:
+                    timer = timers[phase] = [0.0, 0]
+                timer[0] += elapsed - children
+                timer[1] += 1
+                if stack:
+                    stack[-1] += elapsed
+            if counter is not None:
+                counter(profiler, args, result)
+            return result
+
+        setattr(owner, attribute, instrumented)
+        self._patches.append((owner, attribute, original))
+
+    def _initThread(self):
+        """
+        Cria a pilha de chamadas e os tempos da thread atual. Cada thread atualiza apenas os
+        seus próprios tempos, que são somados em `report`.
+
+        Returns:
+            list: a pilha de chamadas da thread.
+        """
+        self._local.stack = []
+        self._local.timers = {}
+        with self._lock:
+            self._threadTimers.append(self._local.timers)
+        return self._local.stack
+
+    def _getTimers(self):
+        """
+        Returns:
+            dict: tempos de todas as threads somados, no formato { fase: [segundos, chamadas] }
+        """
+        merged = {}
+        with self._lock:
+            threadTimers = list(self._threadTimers)
+        for timers in threadTimers:
+            for phase, (seconds, calls) in list(timers.items()):
+                timer = merged.setdefault(phase, [0.0, 0])
+                timer[0] += seconds
+                timer[1] += calls
+        return merged
+
+    def install(self):
+        """
+        Instrumenta os métodos de `INSTRUMENTATION` e inicia a contagem do tempo total.
+        """
+        for owner, attribute, phase, counter in INSTRUMENTATION:
+            self.wrap(owner, attribute, phase, counter)
+        self._startTime = perf_counter()
+
+    def uninstall(self):
+        """
+        Restaura os métodos originais e encerra a contagem do tempo total.
+        """
+        if self._startTime is not None:
+            self._wallSeconds += perf_counter() - self._startTime
+            self._startTime = None
+        while self._patches:
+            (owner, attribute, original) = self._patches.pop()
+            setattr(owner, attribute, original)
+
+    def report(self):
+        """
+        Returns:
+            dict: relatório no formato
+
+                {
+                    version (int): `PROFILE_VERSION`,
+                    wallSeconds (float): tempo total entre `install` e `uninstall`,
+                    counters: { nome (str): valor (int) },
+                    phases: {
+                        nome (str): {
+                            seconds (float): tempo exclusivo da fase,
+                            calls (int): quantidade de chamadas,
+                            share (float): fração do tempo total
+                        }
+                    },
+                    unaccountedSeconds (float): tempo total fora das fases medidas,
+                    rates: { contador por segundo (float) }
+                }
+        """
+        wallSeconds = self._wallSeconds
+        timers = self._getTimers()
+        with self._lock:
+            counters = dict(self._counters)
+        measured = sum(seconds for (seconds, _) in timers.values())
+        return {
+            "version": PROFILE_VERSION,
+            "wallSeconds": wallSeconds,
+            "counters": counters,
+            "phases": {
+                phase: {
+                    "seconds": seconds,
+                    "calls": calls,
+                    "share": seconds / wallSeconds if wallSeconds > 0 else 0.0,
+                }
+                for phase, (seconds, calls) in sorted(timers.items())
+            },
+            "unaccountedSeconds": wallSeconds - measured,
+            "rates": {
+                "{}PerSecond".format(name): value / wallSeconds
+                if wallSeconds > 0
+                else 0.0
+                for name, value in sorted(counters.items())
+            },
+        }
@@ -0,0 +1,132 @@
+"""
+Este arquivo define a estimação de probabilidades de eventos raros em uma partida por
+amostragem por importância: as partidas são simuladas com uma probabilidade de ponto
+alterada, e cada uma é reponderada pela sua razão de verossimilhança.
+"""
+import numpy as np
+
+from analysis import RunningStats
+from batch import BatchGameEngine
+from tennisClasses import TennisMatch
+
+RARE_EVENTS = {
+    "upset": lambda results, longGamePoints: ~results["winner"],
+    "long-game": lambda results, longGamePoints: (
+        results["maxGamePoints"] >= longGamePoints
+    ),
+    "seven-game-set": lambda results, longGamePoints: results["maxSetGames"] >= 7,
+}
+"""
+Eventos que podem ser estimados, associados à função que indica, para cada partida de
+`tennis.tennisClasses.TennisMatch.simulateBatch`, se o evento ocorreu: vitória de Q, algum
+game com ao menos `longGamePoints` pontos (longos ciclos por Deuce/AdvA/AdvB) e algum set
+em que um jogador chegou a 7 games.
+"""
+
+
+def getDefaultTilt(event: str, table, initialNode):
+    """
+    Sugere uma probabilidade de ponto alterada para um evento: para "upset", o ponto médio
+    entre a probabilidade real do nó inicial e 0.5; para "long-game", valores que favorecem a
+    volta ao Deuce nos nós AdvA e AdvB; para os demais, a própria probabilidade real, ou seja,
+    simulação direta.
+
+    Args:
+        event (str): evento, uma das chaves de `RARE_EVENTS`
+        table (`tennis.markov.TransitionTable`): Tabela de transição com as probabilidades
+            reais.
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+
+    Returns:
+        float | dict: probabilidade alterada, no formato de `estimateRareEvent`
+    """
+    probP = float(table.probP[table.getStateId(initialNode.getName())])
+    if event == "upset":
+        return (probP + 0.5) / 2
+    if event == "long-game":
+        return {"AdvA": 0.35, "AdvB": 0.65}
+    return probP
+
+
+def estimateRareEvent(
+    initialNode,
+    event: str,
+    matchCount: int,
+    seed: int,
+    tiltedProbP,
+    table=None,
+    longGamePoints=30,
+    batchSize=100_000,
+):
+    """
+    Estima a probabilidade de um evento de `RARE_EVENTS` por amostragem por importância. As
+    partidas são simuladas por `tennis.batch.BatchGameEngine` com a probabilidade de ponto
+    `tiltedProbP`, e o estimador é a média de `indicador * peso`, em que o peso é a razão de
+    verossimilhança da partida entre a probabilidade da tabela e `tiltedProbP`. O estimador é
+    não enviesado para qualquer `tiltedProbP` estritamente entre 0 e 1.
+
+    Args:
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+        event (str): evento, uma das chaves de `RARE_EVENTS`
+        matchCount (int): quantidade de partidas simuladas
+        seed (int): seed do gerador de números aleatórios
+        tiltedProbP (float | dict): probabilidade de P vencer um ponto usada na simulação,
+            em todos os nós ou por nó, como em `tennis.batch.BatchGameEngine`
+        table (`tennis.markov.TransitionTable`): Tabela de transição com as probabilidades
+            reais. Se omitida, é usada a tabela de `MarkovNode.getTable`.
+        longGamePoints (int): pontos a partir dos quais um game é considerado longo
+        batchSize (int): quantidade de partidas simuladas por vez
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                estimate (float): probabilidade estimada do evento,
+                standardError (float): erro padrão do estimador,
+                naiveStandardError (float): erro padrão da simulação direta com a mesma
+                    quantidade de partidas, sqrt(p (1 - p) / n), usando a estimativa de p,
+                varianceReduction (float): razão entre as variâncias da simulação direta e
+                    da amostragem por importância,
+                hits (int): partidas simuladas em que o evento ocorreu,
+                effectiveSampleSize (float): tamanho efetivo de amostra dos pesos,
+                    (soma dos pesos)^2 / soma dos quadrados dos pesos,
+                matches (int): quantidade de partidas simuladas
+            }
+    """
+    indicator = RARE_EVENTS[event]
+    engine = BatchGameEngine(initialNode, seed, table, tiltedProbP=tiltedProbP)
+    stats = RunningStats()
+    weightSum = 0.0
+    weightSquareSum = 0.0
+    hits = 0
+    remaining = matchCount
+    while remaining > 0:
+        count = min(batchSize, remaining)
+        results = TennisMatch.simulateBatch(engine, count)
+        weights = np.exp(results["logWeight"])
+        occurred = indicator(results, longGamePoints)
+        stats.addArray(np.where(occurred, weights, 0.0))
+        weightSum += float(weights.sum())
+        weightSquareSum += float((weights**2).sum())
+        hits += int(np.count_nonzero(occurred))
+        remaining -= count
+    estimate = stats.getMean()
+    standardError = stats.getStandardError()
+    naiveStandardError = (
+        (estimate * (1 - estimate) / matchCount) ** 0.5
+        if matchCount > 0
+        else float("inf")
+    )
+    return {
+        "estimate": estimate,
+        "standardError": standardError,
+        "naiveStandardError": naiveStandardError,
+        "varianceReduction": (naiveStandardError / standardError) ** 2
+        if standardError > 0
+        else float("inf"),
+        "hits": hits,
+        "effectiveSampleSize": weightSum**2 / weightSquareSum
+        if weightSquareSum > 0
+        else 0.0,
+        "matches": matchCount,
+    }
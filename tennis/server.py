@@ -0,0 +1,422 @@
+"""
+Este arquivo define o modo servidor, um processo de longa duração que mantém a cadeia de
+Markov compilada em memória e responde a consultas em JSON Lines pela entrada e saída
+padrão, sem o custo de inicialização de uma nova execução do programa a cada consulta.
+"""
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict, deque
+from time import perf_counter
+import threading
+import json
+import numpy as np
+
+from markov import MarkovNode, solveGame
+from batch import BatchGameEngine
+from tennisClasses import TennisMatch, solveMatch
+from lookup import WinProbabilityTable
+from analysis import aggregateDataset
+from utils import getSeedFromTime
+
+LATENCY_WINDOW = 1024
+"""
+Quantidade de latências mais recentes guardadas por operação, usadas nos percentis de
+`QueryServer.getMetrics`.
+"""
+
+
+class LRUCache:
+    """
+    Cache de tamanho limitado que descarta a entrada usada há mais tempo. Pode ser usado por
+    várias threads ao mesmo tempo: com `getOrCompute`, threads que pedem a mesma chave ao
+    mesmo tempo esperam por um único cálculo.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity (int): quantidade máxima de entradas; com 0, nada é guardado
+        """
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def put(self, key, value):
+        """
+        Guarda uma entrada, descartando a usada há mais tempo se o cache estiver cheio.
+
+        Args:
+            key (str): chave da entrada
+            value (object): valor da entrada
+        """
+        if self._capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+    def getOrCompute(self, key, compute):
+        """
+        Retorna o valor de uma entrada, calculando-o com `compute` se ele não estiver no
+        cache. Se outra thread já estiver calculando a mesma chave, espera pelo seu
+        resultado em vez de repetir o cálculo.
+
+        Args:
+            key (str): chave da entrada
+            compute (function): função sem argumentos que calcula o valor
+
+        Returns:
+            (object, bool): o valor e se ele veio do cache (ou de um cálculo em andamento)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return (self._entries[key], True)
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                self._misses += 1
+                future = self._pending[key] = Future()
+            else:
+                self._hits += 1
+        if not owner:
+            return (future.result(), True)
+        try:
+            value = compute()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+        self.put(key, value)
+        future.set_result(value)
+        return (value, False)
+
+    def getStats(self):
+        """
+        Returns:
+            dict: { hits (int), misses (int), size (int), capacity (int) }
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._entries),
+                "capacity": self._capacity,
+            }
+
+
+def _getLatencyStats(count: int, totalSeconds: float, samples):
+    ordered = sorted(samples)
+
+    def percentile(q):
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "count": count,
+        "meanMs": totalSeconds / count * 1000 if count > 0 else 0.0,
+        "p50Ms": percentile(0.5),
+        "p95Ms": percentile(0.95),
+        "p99Ms": percentile(0.99),
+        "maxMs": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+class QueryServer:
+    """
+    Servidor de consultas sobre a cadeia já construída por `MarkovNode.populateNodes`. Cada
+    linha da entrada é um objeto JSON no formato
+
+        { id: identificador opcional, devolvido na resposta, op (str): operação, ...parâmetros }
+
+    e cada resposta é uma linha no formato
+
+        {
+            id: identificador da consulta,
+            ok (bool): se a consulta foi respondida,
+            result: resultado da operação, se `ok`,
+            error (str): mensagem de erro, se não `ok`,
+            cached (bool): se o resultado veio do cache,
+            elapsedMs (float): tempo de resposta
+        }
+
+    As consultas são respondidas em paralelo por `workers` threads, e as respostas são
+    escritas na ordem em que ficam prontas. Operações:
+        - "simulate": simula `count` partidas em lote (ver `simulate`);
+        - "exact": probabilidades exatas de vitória (ver `exact`);
+        - "stats": análise de um dataset (ver `stats`);
+        - "metrics": latência, vazão e uso do cache (ver `getMetrics`).
+
+    Os resultados de "simulate" com `seed` e de "exact" são guardados em um `LRUCache`,
+    identificados pela operação e pelos parâmetros.
+    """
+
+    CACHEABLE = ("simulate", "exact")
+    """
+    Operações cujo resultado depende apenas dos parâmetros.
+    """
+
+    def __init__(self, initialName="0-0", workers=1, cacheSize=256):
+        """
+        Args:
+            initialName (str): nome do nó inicial de cada game
+            workers (int): quantidade de threads que respondem às consultas
+            cacheSize (int): quantidade máxima de resultados em cache
+        """
+        self._initialNode = MarkovNode.getNodeById(initialName)
+        self._workers = max(1, workers)
+        self._cache = LRUCache(cacheSize)
+        self._tables = LRUCache(max(1, cacheSize // 8))
+        self._operations = {
+            "simulate": self.simulate,
+            "exact": self.exact,
+            "stats": self.stats,
+            "metrics": lambda request: self.getMetrics(),
+        }
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._errors = 0
+        self._startTime = perf_counter()
+        self._tables.put(json.dumps(None), MarkovNode.getTable())
+
+    def getTable(self, probP=None):
+        """
+        Args:
+            probP (float | dict): probabilidade de P vencer um ponto, como em
+                `MarkovNode.compile`, ou None para a da cadeia
+
+        Returns:
+            `tennis.markov.TransitionTable`: a tabela compilada, reaproveitada entre consultas
+        """
+        return self._tables.getOrCompute(
+            json.dumps(probP, sort_keys=True), lambda: MarkovNode.compile(probP)
+        )[0]
+
+    def simulate(self, request: dict):
+        """
+        Simula partidas em lote com `tennis.batch.BatchGameEngine`.
+
+        Args:
+            request (dict): { count (int, padrão 1000), seed (int, opcional), probP (float |
+                dict, opcional) }
+
+        Returns:
+            dict: {
+                seed (int), matches (int), pWins (float): fração das partidas vencidas por P,
+                points, games, sets: { mean (float), dp (float) }: valores por partida
+            }
+        """
+        count = int(request.get("count", 1000))
+        if count <= 0:
+            raise ValueError("count deve ser positivo")
+        seed = request.get("seed")
+        if seed is None:
+            seed = getSeedFromTime(1)
+        table = self.getTable(request.get("probP"))
+        results = TennisMatch.simulateBatch(
+            BatchGameEngine(self._initialNode, int(seed), table), count
+        )
+        lengths = {
+            "points": results["pPoints"] + results["qPoints"],
+            "games": results["gamesP"] + results["gamesQ"],
+            "sets": results["scoreP"] + results["scoreQ"],
+        }
+        return dict(
+            {
+                "seed": int(seed),
+                "matches": count,
+                "pWins": float(np.count_nonzero(results["winner"])) / count,
+            },
+            **{
+                name: {"mean": float(values.mean()), "dp": float(values.std())}
+                for name, values in lengths.items()
+            }
+        )
+
+    def exact(self, request: dict):
+        """
+        Calcula as probabilidades exatas de P vencer um game, um set e uma partida e, se
+        `state` for informado, a partir de um estado no meio da partida (ver
+        `tennis.lookup.WinProbabilityTable.lookupName`).
+
+        Args:
+            request (dict): { probP (float | dict, opcional), state (str, opcional) }
+
+        Returns:
+            dict: { game (float), set (float), match (float), expectedGamePoints (float),
+                state (float): apenas se `state` for informado }
+        """
+        probP = request.get("probP")
+        table = self.getTable(probP)
+        game = solveGame(table, self._initialNode)
+        match = solveMatch(game["pWins"])
+        result = {
+            "game": game["pWins"],
+            "set": match["set"]["pWins"],
+            "match": match["pWins"],
+            "expectedGamePoints": game["expectedPoints"],
+        }
+        if request.get("state") is not None:
+            (winTable, _) = self._tables.getOrCompute(
+                "winTable:" + table.getFingerprint(),
+                lambda: WinProbabilityTable.build(table, self._initialNode),
+            )
+            result["state"] = winTable.lookupName(request["state"])
+        return result
+
+    def stats(self, request: dict):
+        """
+        Analisa um dataset com `tennis.analysis.aggregateDataset`. O resultado não é
+        guardado em cache, pois o dataset pode mudar; o índice da análise já evita reler os
+        arquivos que não mudaram.
+
+        Args:
+            request (dict): { path (str), index (bool, padrão True) }
+
+        Returns:
+            dict: { matches (int), pWins (int), points, games, sets: { p, q: { mean (float),
+                dp (float) } }: valores por partida }
+        """
+        aggregator = aggregateDataset(request["path"], 1, request.get("index", True))
+        result = {
+            "matches": aggregator.getMatchCount(),
+            "pWins": aggregator.getPWins(),
+        }
+        for name in ("points", "games", "sets"):
+            result[name] = {
+                player: {
+                    "mean": aggregator.getStats(name + player.upper()).getMean(),
+                    "dp": aggregator.getStats(name + player.upper()).getDP(),
+                }
+                for player in ("p", "q")
+            }
+        return result
+
+    def getMetrics(self):
+        """
+        Returns:
+            dict: métricas no formato
+
+                {
+                    uptimeSeconds (float): tempo desde o início do servidor,
+                    requests (int): consultas respondidas,
+                    errors (int): consultas com erro,
+                    requestsPerSecond (float): vazão média,
+                    cache: { hits, misses, size, capacity (int) },
+                    operations: {
+                        nome (str): { count (int), meanMs, p50Ms, p95Ms, p99Ms, maxMs (float) }
+                    }
+                }
+
+            Os percentis consideram as últimas `LATENCY_WINDOW` consultas de cada operação.
+        """
+        uptime = perf_counter() - self._startTime
+        with self._lock:
+            operations = {
+                name: _getLatencyStats(count, total, samples)
+                for name, (count, total, samples) in sorted(self._latencies.items())
+            }
+            errors = self._errors
+        requests = sum(operation["count"] for operation in operations.values())
+        return {
+            "uptimeSeconds": uptime,
+            "requests": requests,
+            "errors": errors,
+            "requestsPerSecond": requests / uptime if uptime > 0 else 0.0,
+            "cache": self._cache.getStats(),
+            "operations": operations,
+        }
+
+    def _record(self, operation: str, elapsed: float, failed: bool):
+        with self._lock:
+            if failed:
+                self._errors += 1
+            entry = self._latencies.get(operation)
+            if entry is None:
+                entry = self._latencies[operation] = [0, 0.0, deque(maxlen=LATENCY_WINDOW)]
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2].append(elapsed)
+
+    def handle(self, line: str):
+        """
+        Responde a uma consulta.
+
+        Args:
+            line (str): a consulta, em JSON
+
+        Returns:
+            dict: a resposta, no formato descrito na classe
+        """
+        startTime = perf_counter()
+        requestId = None
+        operation = "invalid"
+        response = {"ok": True, "cached": False}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a consulta deve ser um objeto JSON")
+            requestId = request.get("id")
+            operation = request.get("op")
+            if not isinstance(operation, str) or operation not in self._operations:
+                raise ValueError("operação desconhecida: {}".format(operation))
+            parameters = {key: value for key, value in request.items() if key != "id"}
+            cacheable = operation in QueryServer.CACHEABLE and (
+                operation != "simulate" or request.get("seed") is not None
+            )
+            if cacheable:
+                (result, found) = self._cache.getOrCompute(
+                    json.dumps(parameters, sort_keys=True),
+                    lambda: self._operations[operation](request),
+                )
+            else:
+                (result, found) = (self._operations[operation](request), False)
+            response["result"] = result
+            response["cached"] = found
+        except Exception as error:
+            response = {"ok": False, "error": "{}: {}".format(type(error).__name__, error)}
+        elapsed = perf_counter() - startTime
+        if not isinstance(operation, str) or operation not in self._operations:
+            operation = "invalid"
+        self._record(operation, elapsed, not response["ok"])
+        response["id"] = requestId
+        response["elapsedMs"] = elapsed * 1000
+        return response
+
+    def serve(self, inputFile, outputFile):
+        """
+        Lê consultas de `inputFile`, uma por linha, até o fim do arquivo, e escreve as
+        respostas em `outputFile`. Linhas em branco são ignoradas. Cada thread recebe no
+        máximo algumas consultas pendentes, para que uma entrada muito rápida não acumule
+        consultas em memória.
+
+        Args:
+            inputFile (file): entrada, normalmente `sys.stdin`
+            outputFile (file): saída, normalmente `sys.stdout`
+        """
+        writeLock = threading.Lock()
+        pending = threading.BoundedSemaphore(self._workers * 4)
+
+        def respond(line):
+            try:
+                response = self.handle(line)
+                with writeLock:
+                    outputFile.write(json.dumps(response) + "\n")
+                    outputFile.flush()
+            finally:
+                pending.release()
+
+        with ThreadPoolExecutor(self._workers) as executor:
+            for line in inputFile:
+                if line.strip() == "":
+                    continue
+                pending.acquire()
+                executor.submit(respond, line)
@@ -0,0 +1,768 @@
+"""
+Este arquivo define os destinos ("sinks") dos resultados das simulações, e a leitura dos
+datasets gerados por eles.
+"""
+from time import strftime
+import numpy as np
+import os
+import json
+import queue
+import threading
+
+MANIFEST_FILE = "manifest.json"
+"""
+Nome do arquivo de manifesto escrito pelos destinos com shards.
+"""
+
+
+def serializeRecord(record: dict):
+    """
+    Converte um registro em texto JSON, no formato usado por `FileSink` e `JsonLinesSink`.
+
+    Args:
+        record (dict): Dados de uma partida.
+
+    Returns:
+        str: O registro em JSON, em uma única linha.
+    """
+    return json.dumps(record)
+
+
+class ResultSink:
+    """
+    Classe base dos destinos de resultados. Cada registro é um dicionário no formato de
+    `tennis.tennisClasses.TennisMatch.toJSON`.
+    O uso geral segue o seguinte fluxo:
+        - Instanciação de uma subclasse, como `FileSink` ou `JsonLinesSink`;
+        - Chamada de `write` para cada partida simulada;
+        - Chamada de `close` ao final, ou uso da instância em um bloco `with`.
+    """
+
+    def write(self, record: dict):
+        """
+        Escreve um registro no destino.
+
+        Args:
+            record (dict): Dados de uma partida.
+        """
+        raise NotImplementedError
+
+    def writeBatch(self, records):
+        """
+        Escreve vários registros no destino, na ordem.
+
+        Args:
+            records ([dict]): Dados das partidas.
+        """
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        """
+        Finaliza a escrita, liberando os recursos usados pelo destino.
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FileSink(ResultSink):
+    """
+    Escreve cada partida em um arquivo JSON próprio, no caminho
+    `path/data-hora-do-jogo-idx.json`. É o formato original do projeto.
+    """
+
+    def __init__(self, path: str):
+        """
+        Inicializa o destino, criando a pasta de saída caso ela não exista.
+
+        Args:
+            path (str): Pasta onde os arquivos são escritos.
+        """
+        self._path = path
+        self._idx = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, record: dict):
+        currentTime = strftime("%Y-%m-%d-%H-%M-%S")
+        with open(
+            os.path.join(self._path, "{}-{}.json".format(currentTime, self._idx)), "w"
+        ) as outputFile:
+            outputFile.write(serializeRecord(record))
+        self._idx += 1
+
+
+class JsonLinesSink(ResultSink):
+    """
+    Escreve as partidas em arquivos JSON Lines (um registro JSON por linha), com escrita
+    bufferizada e apenas por acréscimo. Os arquivos ("shards") são nomeados
+    `matches-00000.jsonl`, `matches-00001.jsonl`, ..., e um novo shard é iniciado quando o
+    atual atinge `maxBytes` bytes ou `maxRecords` registros.
+
+    A pasta de saída contém também o arquivo `manifest.json`, no formato
+
+        {
+            format: "jsonl",
+            records (int): total de registros,
+            shards: [
+                {
+                    file (str): nome do shard,
+                    records (int): registros no shard,
+                    bytes (int): tamanho do shard
+                }
+            ]
+        }
+
+    Se a pasta já possuir um manifesto, os novos shards são acrescentados aos existentes; se
+    ele for de outro formato, é lançado um ValueError.
+    """
+
+    def __init__(
+        self, path: str, maxBytes=64 * 1024 * 1024, maxRecords=None, bufferSize=1 << 20
+    ):
+        """
+        Inicializa o destino, criando a pasta de saída caso ela não exista.
+
+        Args:
+            path (str): Pasta onde os shards são escritos.
+            maxBytes (int): Tamanho máximo de cada shard, em bytes.
+            maxRecords (int): Quantidade máxima de registros por shard. Se omitido, os
+                shards são rotacionados apenas pelo tamanho.
+            bufferSize (int): Tamanho do buffer de escrita, em bytes.
+        """
+        self._path = path
+        self._maxBytes = maxBytes
+        self._maxRecords = maxRecords
+        self._bufferSize = bufferSize
+        self._file = None
+        os.makedirs(path, exist_ok=True)
+        self._manifest = readManifest(path, "jsonl") or {
+            "format": "jsonl",
+            "records": 0,
+            "shards": [],
+        }
+
+    def write(self, record: dict):
+        line = (serializeRecord(record) + "\n").encode()
+        shard = self._manifest["shards"][-1] if self._file is not None else None
+        if shard is None or (
+            shard["records"] > 0
+            and (
+                shard["bytes"] + len(line) > self._maxBytes
+                or (
+                    self._maxRecords is not None
+                    and shard["records"] >= self._maxRecords
+                )
+            )
+        ):
+            shard = self._rotate()
+        self._file.write(line)
+        shard["records"] += 1
+        shard["bytes"] += len(line)
+        self._manifest["records"] += 1
+
+    def _rotate(self):
+        """
+        Fecha o shard atual e inicia um novo.
+
+        Returns:
+            dict: A entrada do novo shard no manifesto.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._writeManifest()
+        shard = {
+            "file": "matches-{:05d}.jsonl".format(len(self._manifest["shards"])),
+            "records": 0,
+            "bytes": 0,
+        }
+        self._manifest["shards"].append(shard)
+        self._file = open(
+            os.path.join(self._path, shard["file"]), "ab", buffering=self._bufferSize
+        )
+        return shard
+
+    def _writeManifest(self):
+        with open(os.path.join(self._path, MANIFEST_FILE), "w") as manifestFile:
+            manifestFile.write(json.dumps(self._manifest, indent=4))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._writeManifest()
+
+
+POINT_DTYPE = np.dtype(
+    [
+        ("matchId", np.int64),
+        ("setIdx", np.int16),
+        ("gameIdx", np.int16),
+        ("stateId", np.int16),
+        ("draw", np.float64),
+        ("scorer", np.int8),
+    ]
+)
+"""
+Colunas da tabela de pontos do formato colunar. `scorer` vale 1 para P e 2 para Q.
+"""
+
+GAME_DTYPE = np.dtype(
+    [
+        ("matchId", np.int64),
+        ("setIdx", np.int16),
+        ("gameIdx", np.int16),
+        ("winner", np.int8),
+        ("pPoints", np.int16),
+        ("qPoints", np.int16),
+    ]
+)
+"""
+Colunas da tabela de games do formato colunar. `winner` vale 1 para P e 2 para Q.
+"""
+
+SET_DTYPE = np.dtype(
+    [
+        ("matchId", np.int64),
+        ("setIdx", np.int16),
+        ("winner", np.int8),
+        ("gamesP", np.int16),
+        ("gamesQ", np.int16),
+    ]
+)
+"""
+Colunas da tabela de sets do formato colunar. `winner` vale 1 para P e 2 para Q.
+"""
+
+MATCH_DTYPE = np.dtype(
+    [
+        ("matchId", np.int64),
+        ("seed", np.uint64),
+        ("winner", np.int8),
+        ("setsP", np.int16),
+        ("setsQ", np.int16),
+        ("gamesP", np.int32),
+        ("gamesQ", np.int32),
+        ("pointsP", np.int32),
+        ("pointsQ", np.int32),
+    ]
+)
+"""
+Colunas da tabela de partidas do formato colunar. `winner` vale 1 para P e 2 para Q.
+"""
+
+COLUMNAR_TABLES = {
+    "points": POINT_DTYPE,
+    "games": GAME_DTYPE,
+    "sets": SET_DTYPE,
+    "matches": MATCH_DTYPE,
+}
+"""
+Tabelas de cada shard colunar, associadas aos seus tipos.
+"""
+
+
+COLUMNAR_CHUNK_BYTES = 1024 * 1024
+"""
+Tamanho máximo, em bytes, de cada bloco alocado pelos buffers de `ColumnarSink`.
+"""
+
+
+class _ColumnBuffer:
+    """
+    Buffer de uma tabela colunar, formado por blocos pré-alocados de `chunkRows` linhas.
+    As linhas são escritas diretamente nos blocos, e um novo bloco só é alocado quando o
+    atual está cheio, sem copiar os anteriores.
+    """
+
+    def __init__(self, dtype, chunkRows: int):
+        self._dtype = dtype
+        self._chunkRows = chunkRows
+        self._chunks = []
+        self._used = chunkRows
+        self.rows = 0
+
+    @property
+    def nbytes(self):
+        """
+        Bytes efetivamente alocados pelos blocos do buffer.
+        """
+        return len(self._chunks) * self._chunkRows * self._dtype.itemsize
+
+    @property
+    def usedBytes(self):
+        """
+        Bytes ocupados pelas linhas escritas no buffer.
+        """
+        return self.rows * self._dtype.itemsize
+
+    def append(self, row: tuple):
+        if self._used == self._chunkRows:
+            self._chunks.append(np.empty(self._chunkRows, dtype=self._dtype))
+            self._used = 0
+        self._chunks[-1][self._used] = row
+        self._used += 1
+        self.rows += 1
+
+    def save(self, path: str):
+        """
+        Escreve as linhas do buffer em um arquivo `.npy`, bloco a bloco, sem concatená-los.
+
+        Args:
+            path (str): Caminho do arquivo.
+        """
+        with open(path, "wb") as outputFile:
+            np.lib.format.write_array_header_1_0(
+                outputFile,
+                {
+                    "descr": np.lib.format.dtype_to_descr(self._dtype),
+                    "fortran_order": False,
+                    "shape": (self.rows,),
+                },
+            )
+            for chunk in self._chunks[:-1]:
+                chunk.tofile(outputFile)
+            if self._chunks:
+                self._chunks[-1][: self._used].tofile(outputFile)
+
+
+def _winnerCode(winner: str):
+    return 1 if winner == "p" else 2
+
+
+def summarizeMatch(record: dict):
+    """
+    Retorna os totais de games e pontos de cada jogador em uma partida. Usa o campo
+    `matchSummary` quando presente e, caso contrário, percorre os dados de cada game.
+
+    Args:
+        record (dict): Dados de uma partida, no formato de
+            `tennis.tennisClasses.TennisMatch.toJSON`.
+
+    Returns:
+        (int, int, int, int): games de P, games de Q, pontos de P e pontos de Q, ou None
+            se a partida foi registrada sem esses totais.
+    """
+    if "matchSummary" in record:
+        summary = record["matchSummary"]
+        return (
+            summary["games"]["p"],
+            summary["games"]["q"],
+            summary["points"]["p"],
+            summary["points"]["q"],
+        )
+    if "matchData" not in record:
+        return None
+    gamesP = 0
+    gamesQ = 0
+    pointsP = 0
+    pointsQ = 0
+    for setData in record["matchData"]:
+        for gameData in setData["setData"]:
+            if gameData["gameWinner"] == "p":
+                gamesP += 1
+            else:
+                gamesQ += 1
+            pointsP += gameData["gameResult"]["p"]
+            pointsQ += gameData["gameResult"]["q"]
+    return (gamesP, gamesQ, pointsP, pointsQ)
+
+
+class ColumnarSink(ResultSink):
+    """
+    Escreve as partidas em um formato colunar binário, adequado para análises sobre
+    bilhões de pontos. Cada shard é uma pasta `columnar-00000`, `columnar-00001`, ...,
+    contendo um arquivo `.npy` (vetor estruturado do NumPy) por tabela, com as colunas
+    descritas em `POINT_DTYPE`, `GAME_DTYPE`, `SET_DTYPE` e `MATCH_DTYPE`. Os arquivos podem
+    ser abertos sem cópia com `openColumnarShard`.
+
+    As tabelas de pontos, games e sets só recebem linhas quando as partidas foram simuladas
+    com o nível de detalhe correspondente (ver `tennis.markov.DETAIL_POINT`); a tabela de
+    partidas contém os totais de cada partida, ou -1 quando a partida foi simulada sem eles
+    (`tennis.markov.DETAIL_NONE`).
+
+    Além dos registros no formato de `tennis.tennisClasses.TennisMatch.toJSON`, `write` aceita
+    os de `tennis.tennisClasses.TennisMatch.toRows`, cujos pontos já trazem o número do
+    estado e o valor sorteado, sem os dicionários de cada ponto.
+
+    As partidas são escritas diretamente em vetores estruturados pré-alocados, que crescem
+    em blocos de até `COLUMNAR_CHUNK_BYTES` bytes, até que a memória alocada por eles
+    atinja `maxBytes` bytes ou o shard atinja `maxRecords` partidas. O manifesto tem o
+    mesmo formato do de `JsonLinesSink`, com `format` igual a "columnar", o campo `dir` em
+    cada shard e a lista `states` com o nome de cada estado, indexada por `stateId`.
+    """
+
+    def __init__(self, path: str, table, maxBytes=256 * 1024 * 1024, maxRecords=None):
+        """
+        Inicializa o destino, criando a pasta de saída caso ela não exista.
+
+        Args:
+            path (str): Pasta onde os shards são escritos.
+            table (`tennis.markov.TransitionTable`): Tabela usada para converter os nomes
+                dos nós em números de estado.
+            maxBytes (int): Memória máxima alocada para as linhas de cada shard, em bytes.
+            maxRecords (int): Quantidade máxima de partidas por shard.
+
+        Raises:
+            ValueError: se a pasta já contiver um dataset de outro formato ou de uma cadeia
+                com outros estados.
+        """
+        self._path = path
+        self._table = table
+        self._maxBytes = maxBytes
+        self._maxRecords = maxRecords
+        os.makedirs(path, exist_ok=True)
+        self._manifest = readManifest(path, "columnar") or {
+            "format": "columnar",
+            "records": 0,
+            "shards": [],
+            "states": list(table.names),
+        }
+        if self._manifest["states"] != list(table.names):
+            raise ValueError(
+                "A pasta {} já contém um dataset colunar com outros estados; não é possível "
+                "acrescentar resultados de outra cadeia".format(path)
+            )
+        self._resetBuffers()
+
+    def _resetBuffers(self):
+        chunkBytes = max(1, min(COLUMNAR_CHUNK_BYTES, self._maxBytes // 16))
+        self._buffers = {
+            name: _ColumnBuffer(dtype, max(1, chunkBytes // dtype.itemsize))
+            for name, dtype in COLUMNAR_TABLES.items()
+        }
+        self._bufferedRecords = 0
+
+    def _getAllocatedBytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def write(self, record: dict):
+        matchId = self._manifest["records"]
+        if "rows" in record:
+            self._writeRows(matchId, record["rows"])
+        else:
+            self._writeRecord(matchId, record)
+        self._manifest["records"] += 1
+        self._bufferedRecords += 1
+        if self._getAllocatedBytes() >= self._maxBytes or (
+            self._maxRecords is not None and self._bufferedRecords >= self._maxRecords
+        ):
+            self._flush()
+
+    def _writeRows(self, matchId: int, rows: dict):
+        """
+        Escreve uma partida a partir das linhas de `tennis.tennisClasses.TennisMatch.toRows`,
+        em que os pontos já trazem o número do estado e o valor sorteado.
+        """
+        points = self._buffers["points"]
+        for setIdx, gameIdx, state, result, scorer in rows["points"]:
+            points.append(
+                (matchId, setIdx, gameIdx, state, result, _winnerCode(scorer))
+            )
+        games = self._buffers["games"]
+        for setIdx, gameIdx, winner, pScore, qScore in rows["games"]:
+            games.append(
+                (matchId, setIdx, gameIdx, _winnerCode(winner), pScore, qScore)
+            )
+        sets = self._buffers["sets"]
+        for setIdx, winner, gamesP, gamesQ in rows["sets"]:
+            sets.append((matchId, setIdx, _winnerCode(winner), gamesP, gamesQ))
+        (seed, winner, *totals) = rows["match"]
+        self._buffers["matches"].append((matchId, seed, _winnerCode(winner), *totals))
+
+    def _writeRecord(self, matchId: int, record: dict):
+        """
+        Escreve uma partida a partir de um registro no formato de
+        `tennis.tennisClasses.TennisMatch.toJSON`, convertendo o nome do nó de cada ponto
+        para o número do estado. Usado quando a partida não está no formato de `toRows`.
+        """
+        getStateId = self._table.getStateId
+        points = self._buffers["points"]
+        games = self._buffers["games"]
+        sets = self._buffers["sets"]
+        for setIdx, setData in enumerate(record.get("matchData", [])):
+            for gameIdx, gameData in enumerate(setData.get("setData", [])):
+                for point in gameData.get("gameData", []):
+                    points.append(
+                        (
+                            matchId,
+                            setIdx,
+                            gameIdx,
+                            getStateId(point["originalNode"]["selfNode"]),
+                            point["resultValue"],
+                            _winnerCode(point["scorer"]),
+                        )
+                    )
+                games.append(
+                    (
+                        matchId,
+                        setIdx,
+                        gameIdx,
+                        _winnerCode(gameData["gameWinner"]),
+                        gameData["gameResult"]["p"],
+                        gameData["gameResult"]["q"],
+                    )
+                )
+            sets.append(
+                (
+                    matchId,
+                    setIdx,
+                    _winnerCode(setData["setResult"]["winner"]),
+                    setData["setResult"]["score"]["p"],
+                    setData["setResult"]["score"]["q"],
+                )
+            )
+        self._buffers["matches"].append(
+            (
+                matchId,
+                record["seed"],
+                _winnerCode(record["matchResult"]["winner"]),
+                record["matchResult"]["score"]["p"],
+                record["matchResult"]["score"]["q"],
+            )
+            + (summarizeMatch(record) or (-1, -1, -1, -1))
+        )
+
+    def _flush(self):
+        """
+        Escreve as partidas acumuladas em um novo shard e atualiza o manifesto.
+        """
+        if self._bufferedRecords == 0:
+            return
+        shard = {
+            "dir": "columnar-{:05d}".format(len(self._manifest["shards"])),
+            "records": self._bufferedRecords,
+            "bytes": sum(buffer.usedBytes for buffer in self._buffers.values()),
+        }
+        shardPath = os.path.join(self._path, shard["dir"])
+        os.makedirs(shardPath, exist_ok=True)
+        for name, buffer in self._buffers.items():
+            buffer.save(os.path.join(shardPath, "{}.npy".format(name)))
+        self._manifest["shards"].append(shard)
+        self._resetBuffers()
+        with open(os.path.join(self._path, MANIFEST_FILE), "w") as manifestFile:
+            manifestFile.write(json.dumps(self._manifest, indent=4))
+
+    def close(self):
+        self._flush()
+
+
+class BackgroundSink(ResultSink):
+    """
+    Envolve outro destino e faz a serialização e a escrita em uma thread dedicada, para que
+    a simulação não espere pelo `json.dumps` e pelo disco. `write` apenas coloca o registro
+    em uma fila limitada a `queueSize` registros; quando a fila está cheia, `write` bloqueia
+    até que a thread de escrita a esvazie, o que limita a memória usada. A thread retira os
+    registros em lotes de até `batchSize` e os escreve com `ResultSink.writeBatch`, na mesma
+    ordem em que foram recebidos.
+
+    Erros da thread de escrita são repassados na próxima chamada de `write` ou em `close`.
+    """
+
+    _END = object()
+    """
+    Marcador de fim da fila.
+    """
+
+    def __init__(self, sink, queueSize=1024, batchSize=64):
+        """
+        Inicializa o destino e inicia a thread de escrita.
+
+        Args:
+            sink (`ResultSink`): Destino em que os registros são escritos.
+            queueSize (int): Quantidade máxima de registros na fila.
+            batchSize (int): Quantidade máxima de registros escritos por vez.
+        """
+        self._sink = sink
+        self._batchSize = batchSize
+        self._queue = queue.Queue(maxsize=queueSize)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="result-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        finished = False
+        while not finished:
+            batch = [self._queue.get()]
+            while len(batch) < self._batchSize:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is BackgroundSink._END:
+                batch.pop()
+                finished = True
+            if self._error is None and batch:
+                try:
+                    self._sink.writeBatch(batch)
+                except BaseException as error:
+                    self._error = error
+
+    def _raiseError(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def write(self, record: dict):
+        self._raiseError()
+        self._queue.put(record)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(BackgroundSink._END)
+        self._thread.join()
+        try:
+            self._raiseError()
+        finally:
+            self._sink.close()
+
+
+def openColumnarShard(path: str):
+    """
+    Abre as tabelas de um shard colunar como vetores mapeados em memória, sem carregá-los.
+
+    Args:
+        path (str): Pasta do shard.
+
+    Returns:
+        dict: um vetor estruturado somente leitura para cada tabela de `COLUMNAR_TABLES`.
+    """
+    return {
+        name: np.load(os.path.join(path, "{}.npy".format(name)), mmap_mode="r")
+        for name in COLUMNAR_TABLES
+    }
+
+
+def readManifest(path: str, outputFormat=None):
+    """
+    Lê o manifesto de uma pasta de resultados.
+
+    Args:
+        path (str): Pasta de resultados.
+        outputFormat (str): Se informado, formato que o manifesto deve ter, como "jsonl".
+
+    Returns:
+        dict: O manifesto, ou None se a pasta não possuir um.
+
+    Raises:
+        ValueError: se o manifesto for de um formato diferente de `outputFormat`.
+    """
+    manifestPath = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifestPath):
+        return None
+    with open(manifestPath, "r") as manifestFile:
+        manifest = json.loads(manifestFile.read())
+    if outputFormat is not None and manifest.get("format") != outputFormat:
+        raise ValueError(
+            'A pasta {} já contém um dataset no formato "{}"; não é possível acrescentar '
+            'resultados no formato "{}"'.format(
+                path, manifest.get("format"), outputFormat
+            )
+        )
+    return manifest
+
+
+def createSink(
+    outputFormat: str,
+    path: str,
+    maxBytes=None,
+    maxRecords=None,
+    table=None,
+    queueSize=None,
+):
+    """
+    Cria um destino de resultados a partir das opções da linha de comando.
+
+    Args:
+        outputFormat (str): "files" para um arquivo por partida, "jsonl" para shards
+            JSON Lines ou "columnar" para shards binários colunares.
+        path (str): Pasta de saída.
+        maxBytes (int): Tamanho máximo de cada shard, em bytes.
+        maxRecords (int): Quantidade máxima de registros por shard.
+        table (`tennis.markov.TransitionTable`): Tabela da cadeia, necessária para o
+            formato colunar.
+        queueSize (int): Se informado, o destino é envolvido por um `BackgroundSink` com
+            uma fila deste tamanho.
+
+    Returns:
+        `ResultSink`: O destino criado.
+    """
+    if outputFormat == "columnar":
+        if maxBytes is None:
+            sink = ColumnarSink(path, table, maxRecords=maxRecords)
+        else:
+            sink = ColumnarSink(path, table, maxBytes, maxRecords)
+    elif outputFormat == "jsonl":
+        if maxBytes is None:
+            sink = JsonLinesSink(path, maxRecords=maxRecords)
+        else:
+            sink = JsonLinesSink(path, maxBytes, maxRecords)
+    else:
+        sink = FileSink(path)
+    if queueSize is not None:
+        return BackgroundSink(sink, queueSize)
+    return sink
+
+
+def listDatasetFiles(datasetPath: str):
+    """
+    Lista os arquivos de dados de uma pasta de resultados, em ordem, ignorando o manifesto
+    e arquivos ocultos.
+
+    Args:
+        datasetPath (str): Pasta de resultados.
+
+    Returns:
+        [str]: Caminhos dos arquivos `.json` e `.jsonl` da pasta.
+    """
+    return [
+        os.path.join(datasetPath, file)
+        for file in sorted(os.listdir(datasetPath))
+        if file != MANIFEST_FILE
+        and not file.startswith(".")
+        and file.endswith((".json", ".jsonl"))
+    ]
+
+
+def readFileRecords(path: str):
+    """
+    Lê os registros de um único arquivo de dados, um de cada vez.
+
+    Args:
+        path (str): Arquivo `.json` (uma partida) ou `.jsonl` (uma partida por linha).
+
+    Yields:
+        dict: Dados de cada partida.
+    """
+    with open(path, "r") as inputFile:
+        if path.endswith(".jsonl"):
+            for line in inputFile:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield json.loads(inputFile.read())
+
+
+def readRecords(datasetPath: str):
+    """
+    Lê os registros de todos os arquivos de uma pasta de resultados, um de cada vez,
+    independentemente do destino usado para escrevê-los.
+
+    Args:
+        datasetPath (str): Pasta de resultados.
+
+    Yields:
+        dict: Dados de cada partida.
+    """
+    for path in listDatasetFiles(datasetPath):
+        yield from readFileRecords(path)
@@ -0,0 +1,286 @@
+"""
+Este arquivo define a varredura de parâmetros, que simula e resolve de forma exata várias
+configurações da probabilidade de P vencer um ponto, guardando os resultados em cache.
+"""
+import numpy as np
+import hashlib
+import json
+import os
+
+from markov import MarkovNode, checkProbabilities, solveGame
+from batch import BatchGameEngine
+from tennisClasses import TennisMatch, solveMatch
+
+CACHE_VERSION = 1
+"""
+Versão do formato dos resultados em cache. Deve ser incrementada sempre que o cálculo dos
+resultados mudar, para que resultados antigos não sejam reaproveitados.
+"""
+
+
+def parseSweepValues(spec: str):
+    """
+    Interpreta os valores de uma varredura, informados como uma lista ("0.5,0.55,0.6") ou
+    como uma grade no formato "início:fim:passo", com o fim incluído ("0.4:0.6:0.05").
+
+    Args:
+        spec (str): valores da varredura
+
+    Returns:
+        [float]: os valores, na ordem informada
+
+    Raises:
+        ValueError: se os valores não puderem ser interpretados, ou se a grade tiver passo
+            não positivo ou fim menor que o início
+    """
+    if ":" in spec:
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError("a grade deve ter o formato início:fim:passo")
+        (start, stop, step) = (float(value) for value in parts)
+        if step <= 0:
+            raise ValueError("o passo deve ser positivo")
+        if stop < start:
+            raise ValueError("o fim deve ser maior ou igual ao início")
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 12) for i in range(count)]
+    return [float(value) for value in spec.split(",") if value.strip() != ""]
+
+
+def loadSweepFile(path: str, nodeNames=None):
+    """
+    Carrega as configurações de uma varredura a partir de um arquivo JSON. O arquivo deve
+    conter uma lista em que cada elemento é a probabilidade de P vencer o ponto em todos os
+    nós, ou um dicionário que associa nomes de nós a probabilidades (ver
+    `tennis.markov.MarkovNode.compile`).
+
+    Args:
+        path (str): caminho do arquivo
+        nodeNames ([str]): Se informado, nomes dos nós da cadeia, usados para verificar as
+            configurações com `tennis.markov.checkProbabilities`.
+
+    Returns:
+        [float | dict]: as configurações
+
+    Raises:
+        ValueError: se o arquivo não for uma lista de configurações, ou se alguma delas
+            tiver um nó desconhecido ou uma probabilidade fora de [0, 1]
+    """
+    with open(path, "r") as sweepFile:
+        configs = json.loads(sweepFile.read())
+    if not isinstance(configs, list):
+        raise ValueError("o arquivo deve conter uma lista de configurações")
+    if nodeNames is not None:
+        for config in configs:
+            checkProbabilities(config, nodeNames)
+    return configs
+
+
+def getConfigLabel(config):
+    """
+    Returns:
+        str: representação curta de uma configuração, usada na tabela de resultados
+    """
+    if isinstance(config, dict):
+        return ",".join(
+            "{}={}".format(name, prob) for name, prob in sorted(config.items())
+        )
+    return "{}".format(config)
+
+
+def getCacheKey(table, initialName: str, simulationCount: int, seed: int):
+    """
+    Calcula a chave de cache de uma configuração: o SHA-256 da tabela de transição compilada
+    (ver `tennis.markov.TransitionTable.getFingerprint`), do nó inicial, da quantidade de partidas e do seed.
+
+    Returns:
+        str: a chave, em hexadecimal
+    """
+    description = {
+        "version": CACHE_VERSION,
+        "table": table.getFingerprint(),
+        "initial": initialName,
+        "simulationCount": simulationCount,
+        "seed": seed,
+    }
+    encoded = json.dumps(description, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def evaluateConfig(config, initialName: str, simulationCount: int, seed: int):
+    """
+    Resolve de forma exata e simula em lote uma configuração. Pode ser executada em qualquer
+    processo em que a cadeia de Markov já tenha sido construída.
+
+    Args:
+        config (float | dict): configuração, como em `loadSweepFile`
+        initialName (str): nome do nó inicial de cada game
+        simulationCount (int): quantidade de partidas simuladas
+        seed (int): seed do gerador de números aleatórios
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                exact: { game (float), set (float), match (float) }: probabilidades
+                    exatas de P vencer um game, um set e uma partida,
+                expectedGamePoints (float): quantidade esperada de pontos em um game,
+                simulated: {
+                    pWins (float): fração das partidas simuladas vencidas por P,
+                    points: { mean (float), dp (float) }: pontos por partida,
+                    games: { mean (float), dp (float) }: games por partida,
+                    sets: { mean (float), dp (float) }: sets por partida
+                }
+            }
+    """
+    table = MarkovNode.compile(config)
+    initialNode = MarkovNode.getNodeById(initialName)
+    game = solveGame(table, initialNode)
+    match = solveMatch(game["pWins"])
+    results = TennisMatch.simulateBatch(
+        BatchGameEngine(initialNode, seed, table), simulationCount
+    )
+    lengths = {
+        "points": results["pPoints"] + results["qPoints"],
+        "games": results["gamesP"] + results["gamesQ"],
+        "sets": results["scoreP"] + results["scoreQ"],
+    }
+    return {
+        "exact": {
+            "game": game["pWins"],
+            "set": match["set"]["pWins"],
+            "match": match["pWins"],
+        },
+        "expectedGamePoints": game["expectedPoints"],
+        "simulated": dict(
+            {"pWins": float(np.count_nonzero(results["winner"])) / simulationCount},
+            **{
+                name: {"mean": float(values.mean()), "dp": float(values.std())}
+                for name, values in lengths.items()
+            }
+        ),
+    }
+
+
+def _evaluateTask(task):
+    return evaluateConfig(*task)
+
+
+def runSweep(
+    configs,
+    initialName: str,
+    simulationCount: int,
+    seed: int,
+    workers=1,
+    cachePath=os.path.join("results", "cache"),
+    initializer=None,
+    initargs=(),
+):
+    """
+    Executa uma varredura de parâmetros. Cada configuração é identificada por
+    `getCacheKey`; resultados já calculados são lidos de `cachePath/<chave>.json`, e apenas
+    as configurações restantes são avaliadas, possivelmente em paralelo. Todas as
+    configurações usam o mesmo seed, de modo que as diferenças entre elas não dependem do
+    sorteio.
+
+    Args:
+        configs ([float | dict]): configurações, como em `loadSweepFile`
+        initialName (str): nome do nó inicial de cada game
+        simulationCount (int): quantidade de partidas simuladas por configuração
+        seed (int): seed do gerador de números aleatórios
+        workers (int): quantidade de processos
+        cachePath (str): pasta do cache, ou None para não usar cache
+        initializer (function): função de inicialização de cada processo, que deve
+            construir a cadeia de Markov
+        initargs (tuple): argumentos de `initializer`
+
+    Returns:
+        [dict]: um resultado por configuração, na ordem de `configs`, no formato de
+            `evaluateConfig`, com os campos adicionais `config`, `key` e `cached`
+    """
+    keys = [
+        getCacheKey(MarkovNode.compile(config), initialName, simulationCount, seed)
+        for config in configs
+    ]
+    results = [None] * len(configs)
+    if cachePath is not None:
+        for i, key in enumerate(keys):
+            path = os.path.join(cachePath, "{}.json".format(key))
+            if os.path.exists(path):
+                with open(path, "r") as cacheFile:
+                    results[i] = json.loads(cacheFile.read())
+                results[i]["cached"] = True
+    pending = []
+    for i, result in enumerate(results):
+        if result is None and keys[i] not in (keys[j] for j in pending):
+            pending.append(i)
+    tasks = [(configs[i], initialName, simulationCount, seed) for i in pending]
+    if workers > 1 and len(tasks) > 1:
+        from multiprocessing import Pool
+
+        with Pool(workers, initializer=initializer, initargs=initargs) as pool:
+            evaluated = pool.map(_evaluateTask, tasks)
+    else:
+        evaluated = [_evaluateTask(task) for task in tasks]
+
+    if cachePath is not None and pending and not os.path.exists(cachePath):
+        os.makedirs(cachePath)
+    for i, result in zip(pending, evaluated):
+        result["config"] = configs[i]
+        result["key"] = keys[i]
+        if cachePath is not None:
+            path = os.path.join(cachePath, "{}.json".format(keys[i]))
+            with open(path + ".tmp", "w") as cacheFile:
+                cacheFile.write(json.dumps(result))
+            os.replace(path + ".tmp", path)
+        result["cached"] = False
+        results[i] = result
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = results[keys.index(keys[i])]
+    return results
+
+
+def formatSweepTable(results):
+    """
+    Formata os resultados de `runSweep` como uma tabela de texto, com uma linha por
+    configuração.
+
+    Returns:
+        str: a tabela
+    """
+    header = (
+        "config",
+        "P(game)",
+        "P(set)",
+        "P(partida)",
+        "P simulado",
+        "pontos",
+        "dp",
+        "games",
+        "dp",
+        "sets",
+        "cache",
+    )
+    rows = [header]
+    for result in results:
+        simulated = result["simulated"]
+        rows.append(
+            (
+                getConfigLabel(result["config"]),
+                "{:.4f}".format(result["exact"]["game"]),
+                "{:.4f}".format(result["exact"]["set"]),
+                "{:.4f}".format(result["exact"]["match"]),
+                "{:.4f}".format(simulated["pWins"]),
+                "{:.2f}".format(simulated["points"]["mean"]),
+                "{:.2f}".format(simulated["points"]["dp"]),
+                "{:.2f}".format(simulated["games"]["mean"]),
+                "{:.2f}".format(simulated["games"]["dp"]),
+                "{:.2f}".format(simulated["sets"]["mean"]),
+                "sim" if result["cached"] else "não",
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    )
@@ -1,11 +1,346 @@
-from markov import MarkovGraph
+from markov import (
+    MarkovGraph,
+    TransitionTable,
+    solveGameCurve,
+    DETAIL_SUMMARY,
+    DETAIL_GAME,
+)
 from time import time, strftime
 from typing import Type
-from utils import getSeedFromTime
+import numpy as np
 import os
 import json
 
 
+def getSetWinner(scoreP: int, scoreQ: int):
+    """
+    Aplica as regras de término de set usadas por `TennisSet.simulate` a um placar de games.
+    As regras são avaliadas em sequência, e a última regra satisfeita define o vencedor.
+
+    Args:
+        scoreP (int): games vencidos por P
+        scoreQ (int): games vencidos por Q
+
+    Returns:
+        (str): "p" ou "q" se o set terminou com esse placar, ou None caso contrário
+    """
+    winner = None
+    if scoreP > scoreQ + 2 and scoreP >= 6:
+        winner = "p"
+    if scoreQ > scoreP + 2 and scoreQ >= 6:
+        winner = "q"
+    if scoreQ == 7:
+        winner = "p"
+    if scoreP == 7:
+        winner = "q"
+    return winner
+
+
+def getSetWinners(scoreP, scoreQ):
+    """
+    Versão vetorizada de `getSetWinner`, aplicada a vetores de placares.
+
+    Args:
+        scoreP (np.ndarray): games vencidos por P em cada set
+        scoreQ (np.ndarray): games vencidos por Q em cada set
+
+    Returns:
+        (np.ndarray): 1 se P venceu o set, 2 se Q venceu o set e 0 se o set não terminou
+    """
+    return np.select(
+        [
+            scoreP == 7,
+            scoreQ == 7,
+            (scoreQ > scoreP + 2) & (scoreQ >= 6),
+            (scoreP > scoreQ + 2) & (scoreP >= 6),
+        ],
+        [2, 1, 2, 1],
+        0,
+    )
+
+
+def getMatchWinner(scoreP: int, scoreQ: int):
+    """
+    Aplica as regras de término de partida usadas por `TennisMatch.simulate` a um placar de sets.
+
+    Args:
+        scoreP (int): sets vencidos por P
+        scoreQ (int): sets vencidos por Q
+
+    Returns:
+        (str): "p" ou "q" se a partida terminou com esse placar, ou None caso contrário
+    """
+    if scoreP == 2:
+        return "p"
+    if scoreQ == 2:
+        return "q"
+    return None
+
+
+def solveScores(probP, getWinner):
+    """
+    Programação dinâmica memoizada sobre placares (pontuação de P, pontuação de Q) em que cada
+    rodada é vencida por P com probabilidade `probP`. É usada tanto para sets (placar de
+    games) quanto para partidas (placar de sets).
+
+    Args:
+        probP (float): probabilidade de P vencer cada rodada
+        getWinner (function): regra de término, como `getSetWinner` ou `getMatchWinner`
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                pWins (float): probabilidade de P vencer a partir de 0-0,
+                qWins (float): probabilidade de Q vencer a partir de 0-0,
+                scores: {
+                    "X-Y" (str): probabilidade de o placar final ser X-Y
+                }
+            }
+    """
+    memo = {}
+
+    def pWinsFrom(scoreP, scoreQ):
+        key = (scoreP, scoreQ)
+        if key not in memo:
+            winner = getWinner(scoreP, scoreQ)
+            if winner is not None:
+                memo[key] = 1.0 if winner == "p" else 0.0
+            else:
+                memo[key] = probP * pWinsFrom(scoreP + 1, scoreQ) + (
+                    1 - probP
+                ) * pWinsFrom(scoreP, scoreQ + 1)
+        return memo[key]
+
+    pWins = pWinsFrom(0, 0)
+
+    scores = {}
+    reach = {(0, 0): 1.0}
+    while reach:
+        nextReach = {}
+        for (scoreP, scoreQ), prob in reach.items():
+            if getWinner(scoreP, scoreQ) is not None:
+                scores["{}-{}".format(scoreP, scoreQ)] = prob
+                continue
+            for key, stepProb in (
+                ((scoreP + 1, scoreQ), probP),
+                ((scoreP, scoreQ + 1), 1 - probP),
+            ):
+                nextReach[key] = nextReach.get(key, 0.0) + prob * stepProb
+        reach = nextReach
+
+    return {"pWins": pWins, "qWins": 1 - pWins, "scores": scores}
+
+
+def solveSet(pGame):
+    """
+    Calcula de forma exata as probabilidades de vitória de um set e a distribuição dos
+    placares finais, usando as mesmas regras de `TennisSet.simulate`.
+
+    Args:
+        pGame (float): probabilidade de P vencer um game, como calculada por
+            `tennis.markov.solveGame`
+
+    Returns:
+        dict: resultado no formato descrito em `solveScores`
+    """
+    return solveScores(pGame, getSetWinner)
+
+
+def solveMatch(pGame):
+    """
+    Calcula de forma exata as probabilidades de vitória de uma partida, usando as mesmas
+    regras de `TennisMatch.simulate`.
+
+    Args:
+        pGame (float): probabilidade de P vencer um game, como calculada por
+            `tennis.markov.solveGame`
+
+    Returns:
+        dict: resultado no formato
+
+            {
+                set: resultado de `solveSet`,
+                pWins (float): probabilidade de P vencer a partida,
+                qWins (float): probabilidade de Q vencer a partida,
+                scores: {
+                    "X-Y" (str): probabilidade de o placar final de sets ser X-Y
+                }
+            }
+    """
+    setResult = solveSet(pGame)
+    matchResult = solveScores(setResult["pWins"], getMatchWinner)
+    matchResult["set"] = setResult
+    return matchResult
+
+
+def solveScoresCurve(probP, getWinner):
+    """
+    Versão vetorizada da probabilidade de vitória de `solveScores`, que também calcula a
+    derivada em relação a `probP`. A mesma recursão memoizada é aplicada a vetores, e a
+    derivada segue a regra do produto:
+    `f'(x, y) = f(x + 1, y) - f(x, y + 1) + p f'(x + 1, y) + (1 - p) f'(x, y + 1)`.
+
+    Args:
+        probP (np.ndarray): probabilidades de P vencer cada rodada
+        getWinner (function): regra de término, como `getSetWinner` ou `getMatchWinner`
+
+    Returns:
+        (np.ndarray, np.ndarray): probabilidade de P vencer a partir de 0-0 e a sua derivada
+            em relação a `probP`
+    """
+    probP = np.asarray(probP, dtype=float)
+    memo = {}
+
+    def pWinsFrom(scoreP, scoreQ):
+        key = (scoreP, scoreQ)
+        if key not in memo:
+            winner = getWinner(scoreP, scoreQ)
+            if winner is not None:
+                memo[key] = (
+                    np.full(probP.shape, 1.0 if winner == "p" else 0.0),
+                    np.zeros(probP.shape),
+                )
+            else:
+                (winsP, derivativeP) = pWinsFrom(scoreP + 1, scoreQ)
+                (winsQ, derivativeQ) = pWinsFrom(scoreP, scoreQ + 1)
+                memo[key] = (
+                    probP * winsP + (1 - probP) * winsQ,
+                    winsP - winsQ + probP * derivativeP + (1 - probP) * derivativeQ,
+                )
+        return memo[key]
+
+    return pWinsFrom(0, 0)
+
+
+def solveMatchCurve(table, initialNode, probs):
+    """
+    Calcula de forma exata, em uma única passada vetorizada, as probabilidades de P vencer um
+    game, um set e uma partida para cada probabilidade de P vencer um ponto em `probs`, junto
+    das derivadas em relação a essa probabilidade (pela regra da cadeia).
+
+    Args:
+        table (`tennis.markov.TransitionTable`): Tabela de transição de um game.
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+        probs (np.ndarray): probabilidades de P vencer um ponto.
+
+    Returns:
+        dict: vetores com uma posição por probabilidade, no formato
+
+            {
+                game, set, match (np.ndarray): probabilidades de P vencer,
+                dGame, dSet, dMatch (np.ndarray): derivadas em relação à probabilidade de P
+                    vencer um ponto
+            }
+    """
+    game = solveGameCurve(table, initialNode, probs)
+    (pSet, dSetByGame) = solveScoresCurve(game["pWins"], getSetWinner)
+    (pMatch, dMatchBySet) = solveScoresCurve(pSet, getMatchWinner)
+    dSet = dSetByGame * game["dPWins"]
+    return {
+        "game": game["pWins"],
+        "set": pSet,
+        "match": pMatch,
+        "dGame": game["dPWins"],
+        "dSet": dSet,
+        "dMatch": dMatchBySet * dSet,
+    }
+
+
+def compileMatchChain(table, initialNode):
+    """
+    Compila a cadeia de pontos de um game em uma única cadeia absorvente para a partida
+    inteira, cujo espaço de estados é o produto (ponto do game × placar de games do set ×
+    placar de sets da partida), com as mesmas regras de `getSetWinner` e `getMatchWinner`.
+    Apenas os estados alcançáveis a partir do início da partida são gerados.
+
+    Os estados transientes são nomeados no formato "30-15|3-2|1-0" (nó do game, games de P e
+    de Q no set atual, sets de P e de Q), e os absorventes no formato "PWins|2-1" ou
+    "QWins|1-2", com o placar final de sets. O estado inicial é o nó inicial do game com os
+    placares zerados, por exemplo "0-0|0-0|0-0".
+
+    A tabela resultante pode ser usada diretamente por `tennis.batch.BatchGameEngine`, em que
+    cada "game" simulado passa a ser uma partida inteira, e por
+    `tennis.markov.solveAbsorbingChainSparse`.
+
+    Args:
+        table (`tennis.markov.TransitionTable`): Tabela de transição de um game.
+        initialNode (`MarkovNode`): Nó inicial de cada game.
+
+    Returns:
+        `tennis.markov.TransitionTable`: A tabela de transição da partida.
+    """
+    (pointNextP, pointNextQ, pointProbP, pointAbsorbing) = table.asLists()
+    gameWinners = table.winner.tolist()
+    initialPoint = table.getStateId(initialNode.getName())
+
+    def advance(key, nextPoint):
+        (point, gamesP, gamesQ, setsP, setsQ) = key
+        if not pointAbsorbing[nextPoint]:
+            return (nextPoint, gamesP, gamesQ, setsP, setsQ)
+        if gameWinners[nextPoint] == 1:
+            gamesP += 1
+        else:
+            gamesQ += 1
+        setWinner = getSetWinner(gamesP, gamesQ)
+        if setWinner is None:
+            return (initialPoint, gamesP, gamesQ, setsP, setsQ)
+        if setWinner == "p":
+            setsP += 1
+        else:
+            setsQ += 1
+        if getMatchWinner(setsP, setsQ) is None:
+            return (initialPoint, 0, 0, setsP, setsQ)
+        return (None, 0, 0, setsP, setsQ)
+
+    ids = {}
+    keys = []
+    transitions = []
+
+    def getId(key):
+        if key not in ids:
+            ids[key] = len(keys)
+            keys.append(key)
+        return ids[key]
+
+    getId((initialPoint, 0, 0, 0, 0))
+    current = 0
+    while current < len(keys):
+        key = keys[current]
+        if key[0] is None:
+            transitions.append(None)
+        else:
+            point = key[0]
+            transitions.append(
+                (
+                    getId(advance(key, pointNextP[point])),
+                    getId(advance(key, pointNextQ[point])),
+                    pointProbP[point],
+                )
+            )
+        current += 1
+
+    stateCount = len(keys)
+    names = []
+    nextP = np.arange(stateCount)
+    nextQ = np.arange(stateCount)
+    probP = np.zeros(stateCount)
+    absorbing = np.ones(stateCount, dtype=bool)
+    winner = np.zeros(stateCount, dtype=np.int8)
+    for i, (point, gamesP, gamesQ, setsP, setsQ) in enumerate(keys):
+        if point is None:
+            matchWinner = getMatchWinner(setsP, setsQ)
+            names.append("{}Wins|{}-{}".format(matchWinner.upper(), setsP, setsQ))
+            winner[i] = 1 if matchWinner == "p" else 2
+            continue
+        names.append(
+            "{}|{}-{}|{}-{}".format(table.getName(point), gamesP, gamesQ, setsP, setsQ)
+        )
+        (nextP[i], nextQ[i], probP[i]) = transitions[i]
+        absorbing[i] = False
+    return TransitionTable(names, nextP, nextQ, probP, absorbing, winner)
+
+
 class TennisSet:
     """
     Classe que representa um Set (conjunto de games) de Tênis.
@@ -25,7 +360,9 @@ class TennisSet:
         self._winner = None
         self._game = game
         self._results = {}
-        self._gameResults = []
+        self._gameLogs = []
+        self._pointsP = 0
+        self._pointsQ = 0
         self._shouldRun = True
 
     def simulate(self):
@@ -34,7 +371,12 @@ class TennisSet:
         jogadores atinja ao menos seis sets E uma diferença de ao menos dois sets em relação ao
         seu adversário. O valor da variável de instância `_winner` indica o vencedor do game ao
         fim da execução do método, e pode ser acessada via `getWinner`
+
+        Os dados de cada game só são guardados se o nível de detalhe do grafo for ao menos
+        `tennis.markov.DETAIL_GAME`, sem conversão para JSON (ver
+        `tennis.markov.MarkovGraph.getLog`).
         """
+        keepGames = self._game.getDetail() >= DETAIL_GAME
         while self._shouldRun:
             self._game.simulateGame()
             winner = self._game.getWinner()
@@ -42,23 +384,68 @@ class TennisSet:
                 self._scoreP += 1
             else:
                 self._scoreQ += 1
-            self._gameResults.append(self._game.getResults())
-            self._game.reset(getSeedFromTime(self._scoreP + self._scoreQ))
-            if self._scoreP > self._scoreQ + 2 and self._scoreP >= 6:
-                self._winner = "p"
+            (pointsP, pointsQ) = self._game.getScore()
+            self._pointsP += pointsP
+            self._pointsQ += pointsQ
+            if keepGames:
+                self._gameLogs.append(self._game.getLog())
+            self._game.reset()
+            self._winner = getSetWinner(self._scoreP, self._scoreQ)
+            if self._winner is not None:
                 self._shouldRun = False
 
-            if self._scoreQ > self._scoreP + 2 and self._scoreQ >= 6:
-                self._winner = "q"
-                self._shouldRun = False
+    @staticmethod
+    def simulateBatch(engine, count: int):
+        """
+        Simula `count` sets independentes de uma só vez, usando as mesmas regras de
+        `simulate`. A cada rodada, um game é simulado para todos os sets ainda em andamento.
 
-            if self._scoreQ == 7:
-                self._winner = "p"
-                self._shouldRun = False
+        Args:
+            engine (`tennis.batch.BatchGameEngine`): Motor usado para simular os games.
+            count (int): Quantidade de sets a serem simulados.
 
-            if self._scoreP == 7:
-                self._winner = "q"
-                self._shouldRun = False
+        Returns:
+            dict: vetores com uma posição por set, no formato
+
+                {
+                    winner (bool): True se o jogador P venceu o set,
+                    scoreP (int): games vencidos por P,
+                    scoreQ (int): games vencidos por Q,
+                    pPoints (int): pontos do jogador P,
+                    qPoints (int): pontos do jogador Q,
+                    maxGamePoints (int): pontos do game mais longo do set,
+                    logWeight (float): soma dos `logWeight` dos games do set
+                }
+        """
+        scoreP = np.zeros(count, dtype=np.int64)
+        scoreQ = np.zeros(count, dtype=np.int64)
+        pPoints = np.zeros(count, dtype=np.int64)
+        qPoints = np.zeros(count, dtype=np.int64)
+        maxGamePoints = np.zeros(count, dtype=np.int64)
+        logWeight = np.zeros(count)
+        winners = np.zeros(count, dtype=np.int64)
+        active = np.arange(count)
+        while active.size > 0:
+            games = engine.simulateGames(active.size)
+            scoreP[active] += games["winner"]
+            scoreQ[active] += ~games["winner"]
+            pPoints[active] += games["pPoints"]
+            qPoints[active] += games["qPoints"]
+            maxGamePoints[active] = np.maximum(
+                maxGamePoints[active], games["pPoints"] + games["qPoints"]
+            )
+            logWeight[active] += games["logWeight"]
+            winners[active] = getSetWinners(scoreP[active], scoreQ[active])
+            active = active[winners[active] == 0]
+        return {
+            "winner": winners == 1,
+            "scoreP": scoreP,
+            "scoreQ": scoreQ,
+            "pPoints": pPoints,
+            "qPoints": qPoints,
+            "maxGamePoints": maxGamePoints,
+            "logWeight": logWeight,
+        }
 
     def getWinner(self):
         """
@@ -69,6 +456,24 @@ class TennisSet:
         """
         return self._winner
 
+    def getScore(self):
+        """
+        Retorna os games vencidos por cada jogador no set.
+
+        Returns:
+            (int, int): games de P e games de Q.
+        """
+        return (self._scoreP, self._scoreQ)
+
+    def getPoints(self):
+        """
+        Retorna os pontos de cada jogador no set.
+
+        Returns:
+            (int, int): pontos de P e pontos de Q.
+        """
+        return (self._pointsP, self._pointsQ)
+
     def toJSON(self):
         """
         Retorna uma representação em JSON dos dados do game atual.
@@ -87,18 +492,50 @@ class TennisSet:
                         winner (str): "p" se o vencedor for P, e "q" se o vencedor for Q
                     },
                 }
-            A estrutura de `data` é descrita em detalhes em `tennis.markov.MarkovGraph.getResults`.
+            A estrutura de `data` é descrita em detalhes em `tennis.markov.MarkovGraph.getResults`,
+            e o campo só está presente a partir do nível de detalhe `tennis.markov.DETAIL_GAME`.
         """
-        return {
-            "setData": self._gameResults,
+        return self.formatResults(self.getLog())
+
+    def getLog(self):
+        """
+        Retorna os dados do set atual sem convertê-los para JSON.
+
+        Returns:
+            (int, int, str, list): games de P, games de Q, vencedor e os dados de cada game,
+                no formato de `tennis.markov.MarkovGraph.getLog`, ou None abaixo do nível
+                de detalhe `tennis.markov.DETAIL_GAME`.
+        """
+        return (
+            self._scoreP,
+            self._scoreQ,
+            self._winner,
+            self._gameLogs if self._game.getDetail() >= DETAIL_GAME else None,
+        )
+
+    def formatResults(self, log: tuple):
+        """
+        Converte os dados de um set, no formato de `getLog`, para o formato de `toJSON`.
+
+        Args:
+            log (tuple): dados do set, como retornados por `getLog`.
+
+        Returns:
+            dict: os resultados do set
+        """
+        (scoreP, scoreQ, winner, games) = log
+        results = {
             "setResult": {
                 "score": {
-                    "p": self._scoreP,
-                    "q": self._scoreQ,
+                    "p": scoreP,
+                    "q": scoreQ,
                 },
-                "winner": "{}".format(self._winner),
+                "winner": "{}".format(winner),
             },
         }
+        if games is not None:
+            results["setData"] = [self._game.formatResults(game) for game in games]
+        return results
 
     def dumpResultsToFile(self):
         """
@@ -124,7 +561,9 @@ class TennisSet:
         self._scoreQ = 0
         self._matches = []
         self._winner = None
-        self._gameResults = []
+        self._gameLogs = []
+        self._pointsP = 0
+        self._pointsQ = 0
         self._shouldRun = True
 
 
@@ -152,6 +591,10 @@ class TennisMatch:
         self._results = {}
         self._scoreP = 0
         self._scoreQ = 0
+        self._gamesP = 0
+        self._gamesQ = 0
+        self._pointsP = 0
+        self._pointsQ = 0
         self._graph = graph
 
     def simulate(self, shouldDumpToFile=False):
@@ -159,7 +602,12 @@ class TennisMatch:
         Simula uma partida - ou seja, um conjunto de sets. Os jogos são simulados até que um dos
         jogadores atinja ao menos dois sets. O valor da variável de instância `_winner` indica o
         vencedor do game ao fim da execução do método, e pode ser acessada via `getWinner`
+
+        Os dados de cada set só são guardados se o nível de detalhe do grafo for ao menos
+        `tennis.markov.DETAIL_GAME`, sem conversão para JSON (ver `TennisSet.getLog`);
+        abaixo disso, a partida guarda apenas contadores.
         """
+        keepSets = self._graph.getDetail() >= DETAIL_GAME
         while True:
             self._set.simulate()
             winner = self._set.getWinner()
@@ -167,17 +615,87 @@ class TennisMatch:
                 self._scoreP += 1
             else:
                 self._scoreQ += 1
-            self._sets.append(self._set.toJSON())
+            (gamesP, gamesQ) = self._set.getScore()
+            (pointsP, pointsQ) = self._set.getPoints()
+            self._gamesP += gamesP
+            self._gamesQ += gamesQ
+            self._pointsP += pointsP
+            self._pointsQ += pointsQ
+            if keepSets:
+                self._sets.append(self._set.getLog())
             self._set.reset()
-            if self._scoreP == 2:
-                self._winner = "p"
-                break
-            if self._scoreQ == 2:
-                self._winner = "q"
+            self._winner = getMatchWinner(self._scoreP, self._scoreQ)
+            if self._winner is not None:
                 break
         if shouldDumpToFile:
             self.dumpToFile()
 
+    @staticmethod
+    def simulateBatch(engine, count: int):
+        """
+        Simula `count` partidas independentes de uma só vez, usando as mesmas regras de
+        `simulate`. A cada rodada, um set é simulado para todas as partidas ainda em andamento
+        através de `TennisSet.simulateBatch`.
+
+        Args:
+            engine (`tennis.batch.BatchGameEngine`): Motor usado para simular os games.
+            count (int): Quantidade de partidas a serem simuladas.
+
+        Returns:
+            dict: vetores com uma posição por partida, no formato
+
+                {
+                    winner (bool): True se o jogador P venceu a partida,
+                    scoreP (int): sets vencidos por P,
+                    scoreQ (int): sets vencidos por Q,
+                    gamesP (int): games vencidos por P,
+                    gamesQ (int): games vencidos por Q,
+                    pPoints (int): pontos do jogador P,
+                    qPoints (int): pontos do jogador Q,
+                    maxGamePoints (int): pontos do game mais longo da partida,
+                    maxSetGames (int): maior quantidade de games de um jogador em um set,
+                    logWeight (float): soma dos `logWeight` dos games da partida
+                }
+        """
+        scoreP = np.zeros(count, dtype=np.int64)
+        scoreQ = np.zeros(count, dtype=np.int64)
+        gamesP = np.zeros(count, dtype=np.int64)
+        gamesQ = np.zeros(count, dtype=np.int64)
+        pPoints = np.zeros(count, dtype=np.int64)
+        qPoints = np.zeros(count, dtype=np.int64)
+        maxGamePoints = np.zeros(count, dtype=np.int64)
+        maxSetGames = np.zeros(count, dtype=np.int64)
+        logWeight = np.zeros(count)
+        active = np.arange(count)
+        while active.size > 0:
+            sets = TennisSet.simulateBatch(engine, active.size)
+            scoreP[active] += sets["winner"]
+            scoreQ[active] += ~sets["winner"]
+            gamesP[active] += sets["scoreP"]
+            gamesQ[active] += sets["scoreQ"]
+            pPoints[active] += sets["pPoints"]
+            qPoints[active] += sets["qPoints"]
+            maxGamePoints[active] = np.maximum(
+                maxGamePoints[active], sets["maxGamePoints"]
+            )
+            maxSetGames[active] = np.maximum(
+                maxSetGames[active], np.maximum(sets["scoreP"], sets["scoreQ"])
+            )
+            logWeight[active] += sets["logWeight"]
+            active = active[(scoreP[active] < 2) & (scoreQ[active] < 2)]
+        return {
+            "winner": scoreP > scoreQ,
+            "scoreP": scoreP,
+            "scoreQ": scoreQ,
+            "gamesP": gamesP,
+            "gamesQ": gamesQ,
+            "pPoints": pPoints,
+            "qPoints": qPoints,
+            "maxGamePoints": maxGamePoints,
+            "maxSetGames": maxSetGames,
+            "logWeight": logWeight,
+        }
+
     def toJSON(self):
         """
         Retorna uma representação em JSON dos dados da partida atual.
@@ -194,13 +712,20 @@ class TennisMatch:
                             q (int): pontuação de Q
                         }
                     },
-                    winner (str): "p" se o vencedor for P, e "q" se o vencedor for Q
+                    winner (str): "p" se o vencedor for P, e "q" se o vencedor for Q,
+                    matchSummary: {
+                        games: { p (int): games de P, q (int): games de Q },
+                        points: { p (int): pontos de P, q (int): pontos de Q }
+                    }
                 }
             A estrutura de `data` é descrita em detalhes em `TennisSet.toJSON`.
+
+            O campo `matchSummary` só está presente a partir do nível de detalhe
+            `tennis.markov.DETAIL_SUMMARY`, e o campo `data` a partir de
+            `tennis.markov.DETAIL_GAME`.
         """
-        return {
+        results = {
             "seed": self._graph.getSeed(),
-            "matchData": self._sets,
             "matchResult": {
                 "score": {
                     "p": self._scoreP,
@@ -209,6 +734,76 @@ class TennisMatch:
                 "winner": "{}".format(self._winner),
             },
         }
+        detail = self._graph.getDetail()
+        if detail >= DETAIL_SUMMARY:
+            results["matchSummary"] = {
+                "games": {"p": self._gamesP, "q": self._gamesQ},
+                "points": {"p": self._pointsP, "q": self._pointsQ},
+            }
+        if detail >= DETAIL_GAME:
+            results["matchData"] = [self._set.formatResults(log) for log in self._sets]
+        return results
+
+    def toRows(self):
+        """
+        Retorna os dados da partida atual como linhas das tabelas do formato colunar de
+        `tennis.sinks.ColumnarSink`, sem a coluna `matchId`. As linhas são montadas a partir
+        dos dados guardados por `TennisSet.getLog` e `tennis.markov.MarkovGraph.getLog`,
+        sem criar os dicionários de `toJSON`.
+
+        Formato:
+
+            {
+                rows: {
+                    points: [(set, game, estado, valor sorteado, "p" ou "q")],
+                    games: [(set, game, vencedor, pontos de P, pontos de Q)],
+                    sets: [(set, vencedor, games de P, games de Q)],
+                    match: (seed, vencedor, sets de P, sets de Q, games de P, games de Q,
+                        pontos de P, pontos de Q)
+                }
+            }
+
+            Os totais da partida valem -1 abaixo do nível de detalhe
+            `tennis.markov.DETAIL_SUMMARY`, e as demais tabelas só têm linhas a partir de
+            `tennis.markov.DETAIL_GAME`.
+        """
+        points = []
+        games = []
+        sets = []
+        if self._graph.getDetail() >= DETAIL_GAME:
+            for setIdx, (gamesP, gamesQ, setWinner, gameLogs) in enumerate(self._sets):
+                for gameIdx, (pScore, qScore, pointLog) in enumerate(gameLogs):
+                    if pointLog is not None:
+                        for state, result, _, _, scorer in pointLog:
+                            points.append((setIdx, gameIdx, state, result, scorer))
+                    games.append(
+                        (
+                            setIdx,
+                            gameIdx,
+                            "p" if pScore > qScore else "q",
+                            pScore,
+                            qScore,
+                        )
+                    )
+                sets.append((setIdx, setWinner, gamesP, gamesQ))
+        if self._graph.getDetail() >= DETAIL_SUMMARY:
+            totals = (self._gamesP, self._gamesQ, self._pointsP, self._pointsQ)
+        else:
+            totals = (-1, -1, -1, -1)
+        return {
+            "rows": {
+                "points": points,
+                "games": games,
+                "sets": sets,
+                "match": (
+                    self._graph.getSeed(),
+                    self._winner,
+                    self._scoreP,
+                    self._scoreQ,
+                )
+                + totals,
+            }
+        }
 
     def dumpToFile(self):
         """
@@ -238,3 +833,12 @@ class TennisMatch:
             (str): "p", se o vencedor for P, e "q", se o vencedor for Q
         """
         return self._winner
+
+    def getPoints(self):
+        """
+        Retorna os pontos de cada jogador na partida.
+
+        Returns:
+            (int, int): pontos de P e pontos de Q.
+        """
+        return (self._pointsP, self._pointsQ)
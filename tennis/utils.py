@@ -1,4 +1,5 @@
 from time import time
+import numpy as np
 
 
 def getSeedFromTime(iter: int):
@@ -12,6 +13,24 @@ def getSeedFromTime(iter: int):
     return round(time() * 1000 * iter)
 
 
+def spawnSeeds(masterSeed: int, count: int):
+    """
+    Deriva `count` seeds estatisticamente independentes a partir de um único seed mestre,
+    usando `numpy.random.SeedSequence.spawn`. O i-ésimo seed depende apenas do seed mestre
+    e de i, de modo que os resultados não dependem de como as partidas são distribuídas
+    entre processos.
+
+    Args:
+        masterSeed (int): seed mestre
+        count (int): quantidade de seeds a serem gerados
+
+    Returns:
+        ([int]) seeds de 64 bits, um por partida
+    """
+    children = np.random.SeedSequence(masterSeed).spawn(count)
+    return [int(child.generate_state(1, np.uint64)[0]) for child in children]
+
+
 def mean(list):
     """
     Calcula a média de um vetor de números.
@@ -37,6 +56,5 @@ def dp(list):
         (float) desvio padrão dos números
 
     """
-    return (sum(list) / len(list)) ** 0.5
     iMean = mean(list)
     return (sum([(x - iMean) ** 2 for x in list]) / len(list)) ** 0.5
@@ -0,0 +1,176 @@
+"""
+Este arquivo define a comparação de duas configurações da probabilidade de P vencer um ponto
+com redução de variância, usando números aleatórios comuns e variáveis antitéticas.
+"""
+from functools import partial
+
+from markov import MarkovGraph, MarkovNode, DETAIL_SUMMARY
+from tennisClasses import TennisMatch
+from analysis import RunningStats
+from utils import spawnSeeds
+
+COMPARISON_METRICS = ("winrate", "points")
+"""
+Estatísticas comparadas: taxa de vitória de P e pontos por partida.
+"""
+
+_tables = {}
+"""
+Cache das tabelas compiladas de cada configuração, por processo.
+"""
+
+
+def _getTable(probP: float):
+    if probP not in _tables:
+        _tables[probP] = MarkovNode.compile(probP)
+    return _tables[probP]
+
+
+def _simulateMetrics(probP: float, matchSeed: int, antithetic: bool):
+    graph = MarkovGraph(
+        MarkovNode.getNodeById("0-0"),
+        matchSeed,
+        _getTable(probP),
+        detail=DETAIL_SUMMARY,
+        antithetic=antithetic,
+    )
+    match = TennisMatch(graph)
+    match.simulate()
+    record = match.toJSON()
+    points = record["matchSummary"]["points"]
+    return (1.0 if match.getWinner() == "p" else 0.0, points["p"] + points["q"])
+
+
+def simulateUnit(matchSeed: int, probs, commonRandomNumbers=True, antithetic=False):
+    """
+    Simula uma unidade da comparação: uma partida em cada configuração ou, com
+    `antithetic`, um par de partidas (u e 1 - u) em cada configuração. Pode ser executada em
+    qualquer processo em que a cadeia de Markov já tenha sido construída.
+
+    Args:
+        matchSeed (int): Seed da unidade.
+        probs ((float, float)): probabilidades de P vencer um ponto nas configurações A e B.
+        commonRandomNumbers (bool): Se True, as duas configurações usam o mesmo seed; caso
+            contrário, a configuração B usa um seed independente derivado de `matchSeed`.
+        antithetic (bool): Se True, cada configuração simula também a partida antitética.
+
+    Returns:
+        ([float], [float]): valores de cada estatística de `COMPARISON_METRICS` nas
+            configurações A e B, como médias sobre as partidas da unidade.
+    """
+    seeds = (matchSeed, matchSeed if commonRandomNumbers else spawnSeeds(matchSeed, 1)[0])
+    values = []
+    for probP, seed in zip(probs, seeds):
+        runs = [_simulateMetrics(probP, seed, False)]
+        if antithetic:
+            runs.append(_simulateMetrics(probP, seed, True))
+        values.append([sum(run[i] for run in runs) / len(runs) for i in range(2)])
+    return (values[0], values[1])
+
+
+def compareConfigs(
+    probs,
+    matchCount: int,
+    masterSeed: int,
+    commonRandomNumbers=True,
+    antithetic=False,
+    workers=1,
+    initializer=None,
+    initargs=(),
+):
+    """
+    Estima a diferença (A - B) entre duas configurações em cada estatística de
+    `COMPARISON_METRICS`, simulando `matchCount` partidas por configuração.
+
+    O ganho de tamanho efetivo de amostra é a razão entre a variância que o estimador teria
+    com execuções independentes, `(var(A) + var(B)) / matchCount`, e a variância observada do
+    estimador usado, `var(A - B) / unidades`, em que cada unidade é uma partida (ou um par
+    antitético) de cada configuração.
+
+    Args:
+        probs ((float, float)): probabilidades de P vencer um ponto nas configurações A e B.
+        matchCount (int): quantidade de partidas por configuração.
+        masterSeed (int): seed mestre, do qual são derivados os seeds das unidades.
+        commonRandomNumbers (bool): usa os mesmos números aleatórios nas duas configurações.
+        antithetic (bool): usa pares antitéticos; cada par conta como duas partidas.
+        workers (int): quantidade de processos.
+        initializer (function): função de inicialização de cada processo, que deve
+            construir a cadeia de Markov.
+        initargs (tuple): argumentos de `initializer`.
+
+    Returns:
+        dict: um resultado por estatística, no formato
+
+            {
+                nome da estatística: {
+                    a (float), b (float): médias em cada configuração,
+                    difference (float): diferença estimada A - B,
+                    standardError (float): erro padrão da diferença,
+                    independentStandardError (float): erro padrão equivalente com execuções
+                        independentes,
+                    essGain (float): ganho de tamanho efetivo de amostra,
+                    effectiveSampleSize (float): tamanho efetivo de amostra por configuração
+                }
+            }
+    """
+    unitCount = max(2, matchCount // 2 if antithetic else matchCount)
+    matchesPerConfig = unitCount * (2 if antithetic else 1)
+    seeds = spawnSeeds(masterSeed, unitCount)
+    simulate = partial(
+        simulateUnit,
+        probs=tuple(probs),
+        commonRandomNumbers=commonRandomNumbers,
+        antithetic=antithetic,
+    )
+    statsA = [RunningStats() for _ in COMPARISON_METRICS]
+    statsB = [RunningStats() for _ in COMPARISON_METRICS]
+    differences = [RunningStats() for _ in COMPARISON_METRICS]
+    # Variâncias por partida, para o estimador de referência com execuções independentes.
+    marginalA = [RunningStats() for _ in COMPARISON_METRICS]
+    marginalB = [RunningStats() for _ in COMPARISON_METRICS]
+
+    def collect(units):
+        for (valuesA, valuesB) in units:
+            for i in range(len(COMPARISON_METRICS)):
+                statsA[i].add(valuesA[i])
+                statsB[i].add(valuesB[i])
+                differences[i].add(valuesA[i] - valuesB[i])
+
+    if workers > 1:
+        from multiprocessing import Pool
+
+        with Pool(workers, initializer=initializer, initargs=initargs) as pool:
+            collect(pool.imap(simulate, seeds, max(1, unitCount // (workers * 8))))
+    else:
+        collect(map(simulate, seeds))
+
+    if antithetic:
+        # A variância por partida não é observável a partir das médias dos pares, então é
+        # estimada com uma amostra independente de partidas simples.
+        for seed in spawnSeeds(masterSeed + 1, min(unitCount, 2000)):
+            (valuesA, valuesB) = simulateUnit(seed, probs, False, False)
+            for i in range(len(COMPARISON_METRICS)):
+                marginalA[i].add(valuesA[i])
+                marginalB[i].add(valuesB[i])
+    else:
+        marginalA = statsA
+        marginalB = statsB
+
+    report = {}
+    for i, name in enumerate(COMPARISON_METRICS):
+        standardError = differences[i].getStandardError()
+        independentVariance = (
+            marginalA[i].getStandardError() ** 2 * marginalA[i].getCount()
+            + marginalB[i].getStandardError() ** 2 * marginalB[i].getCount()
+        ) / matchesPerConfig
+        gain = independentVariance / standardError ** 2 if standardError > 0 else float("inf")
+        report[name] = {
+            "a": statsA[i].getMean(),
+            "b": statsB[i].getMean(),
+            "difference": differences[i].getMean(),
+            "standardError": standardError,
+            "independentStandardError": independentVariance ** 0.5,
+            "essGain": gain,
+            "effectiveSampleSize": gain * matchesPerConfig,
+        }
+    return report